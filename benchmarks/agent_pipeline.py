@@ -0,0 +1,159 @@
+"""
+Offline benchmarks of the agent pipeline with a fake LLM
+
+Runs the crews against ``FakeLLM``, so nothing goes over the network and no
+tokens are spent, and measures:
+
+- crew construction: building the agents the first time (cold) and creating
+  a per-execution crew instance from a template afterwards (warm);
+- orchestration overhead: crew kickoff time per task that is not spent in
+  the LLM, with a zero-latency fake;
+- pipeline throughput: payments per second through risk assessment and, for
+  payments not rated high risk, the payment crew, with LLM latencies drawn
+  from a log-normal distribution.
+
+Usage:
+    python benchmarks/agent_pipeline.py [--payments N] [--concurrency N]
+        [--llm-latency S] [--llm-sigma S] [--iterations N] [--json]
+
+The fake must be the LLM crewai calls. A crewai release that replaces
+LangChain chat models with its own client would bypass it; the benchmark
+then stops instead of reporting numbers that include no LLM calls.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from typing import Any, Dict, List
+
+from synapse_protocol.agents.agent_manager import AgentManager
+from synapse_protocol.agents.fake_llm import FakeLLM, lognormal_latency
+
+def manager_with(llm: FakeLLM, concurrency: int = 4) -> AgentManager:
+    manager = AgentManager(api_key="offline", llm=llm, max_concurrent_crews=concurrency)
+    manager.create_risk_assessment_crew()
+    manager.create_payment_crew()
+    return manager
+
+def payments(count: int) -> List[Dict[str, Any]]:
+    """Payments with distinct senders, so no risk decision comes from the cache."""
+    amounts = (25.0, 150.0, 900.0, 4200.0, 18000.0)
+    return [
+        {
+            "payment_id": f"bench-{i}",
+            "sender_account": f"rSender{i}",
+            "receiver_account": f"rReceiver{i % 97}",
+            "amount": amounts[i % len(amounts)],
+            "currency": "XRP",
+            "description": "Benchmark payment"
+        }
+        for i in range(count)
+    ]
+
+def risk_level(result: Any) -> str:
+    """Risk level from a crew result: a dict, a JSON verdict or a crewai output object."""
+    if isinstance(result, dict):
+        return str(result.get("risk_level", "high"))
+    text = getattr(result, "raw", None) or str(result)
+    try:
+        return str(json.loads(text).get("risk_level", "high"))
+    except (ValueError, AttributeError):
+        return "high"
+
+def require_fake_calls(llm: FakeLLM) -> None:
+    if llm.stats()["calls"] == 0:
+        sys.exit("crewai did not call the injected FakeLLM; this crewai release bypasses LangChain chat models")
+
+def construction(iterations: int) -> Dict[str, float]:
+    start = time.perf_counter()
+    manager = manager_with(FakeLLM())
+    with manager.crew_registry.execution("risk_crew"):
+        pass
+    cold = time.perf_counter() - start
+    
+    results = {"cold_ms": cold * 1e3}
+    for crew_name in ("risk_crew", "payment_crew"):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            with manager.crew_registry.execution(crew_name):
+                pass
+        results[f"{crew_name}_warm_us"] = (time.perf_counter() - start) / iterations * 1e6
+    return results
+
+def orchestration(iterations: int) -> Dict[str, float]:
+    llm = FakeLLM()
+    manager = manager_with(llm)
+    payment = payments(1)[0]
+    manager.execute_crew("risk_crew", inputs=payment)
+    require_fake_calls(llm)
+    llm.reset_stats()
+    tasks = len(manager.crew_registry.templates["risk_crew"].tasks)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        manager.execute_crew("risk_crew", inputs=payment)
+    elapsed = time.perf_counter() - start
+    stats = llm.stats()
+    return {
+        "overhead_per_task_ms": (elapsed - stats["busy_seconds"]) / (iterations * tasks) * 1e3,
+        "llm_calls_per_task": stats["calls"] / (iterations * tasks)
+    }
+
+async def pipeline(count: int, concurrency: int, latency: float, sigma: float) -> Dict[str, float]:
+    llm = FakeLLM(latency=lognormal_latency(latency, sigma))
+    manager = manager_with(llm, concurrency)
+    queue = iter(payments(count))
+    latencies: List[float] = []
+    processed = 0
+    
+    async def worker() -> None:
+        nonlocal processed
+        for payment in queue:
+            start = time.perf_counter()
+            assessment = await manager.assess_payment_risk_async(payment)
+            if risk_level(assessment) != "high":
+                await manager.execute_crew_async("payment_crew", inputs=payment)
+                processed += 1
+            latencies.append(time.perf_counter() - start)
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    manager.close()
+    require_fake_calls(llm)
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        "payments_per_second": count / elapsed,
+        "processed": processed,
+        "p50_ms": quantiles[49] * 1e3,
+        "p95_ms": quantiles[94] * 1e3,
+        "llm_calls_per_payment": llm.stats()["calls"] / count
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--payments", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Median fake LLM latency in seconds")
+    parser.add_argument("--llm-sigma", type=float, default=0.5, help="Spread of the log-normal latencies")
+    parser.add_argument("--iterations", type=int, default=1000, help="Executions for construction and overhead")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args()
+    
+    results = {
+        "construction": construction(args.iterations),
+        "orchestration": orchestration(args.iterations),
+        "pipeline": asyncio.run(pipeline(args.payments, args.concurrency, args.llm_latency, args.llm_sigma))
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for section, values in results.items():
+        print(section)
+        for name, value in values.items():
+            print(f"  {name:<24} {value:>12.3f}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
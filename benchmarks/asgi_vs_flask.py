@@ -0,0 +1,169 @@
+"""
+Requests per second and latency of the Flask and ASGI serving modes
+
+Starts the payment API in a subprocess, once per mode, backed by a simulated
+XRP client with a fixed ledger latency, and drives it with keep-alive HTTP
+connections issuing payment creations and balance lookups.
+
+Usage:
+    python benchmarks/asgi_vs_flask.py [--modes flask asgi] [--connections N]
+        [--duration SECONDS] [--xrp-latency SECONDS]
+
+The Flask mode needs eventlet and the ASGI mode needs uvicorn
+(``pip install synapse-protocol[asgi]``).
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import List
+
+class SimulatedXrpClient:
+    """XRP client answering after a fixed delay without touching a ledger."""
+    
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.counter = itertools.count()
+    
+    async def sendPayment(self, request):
+        await asyncio.sleep(self.latency)
+        return {"success": True, "transaction_hash": f"{next(self.counter):064X}"}
+    
+    async def getBalance(self, account_id):
+        await asyncio.sleep(self.latency)
+        return 1000.0
+    
+    async def verifyTransaction(self, tx_hash):
+        await asyncio.sleep(self.latency)
+        return True
+
+def serve(mode: str, port: int, xrp_latency: float) -> None:
+    config = {
+        "API_KEY": "benchmark",
+        "ENVIRONMENT": "sandbox",
+        "XRP_CLIENT": SimulatedXrpClient(xrp_latency)
+    }
+    if mode == "flask":
+        import logging
+        from synapse_protocol.app import create_app
+        app = create_app(config)
+        logging.disable(logging.CRITICAL)
+        app.websocket_manager.socketio.run(app, host="127.0.0.1", port=port, log_output=False)
+    else:
+        import uvicorn
+        from synapse_protocol.app import create_asgi_app
+        uvicorn.run(create_asgi_app(config), host="127.0.0.1", port=port, log_level="warning", lifespan="on")
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+async def request(reader, writer, method: str, path: str, body: bytes = b"") -> int:
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+    )
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    length = 0
+    for line in head.split(b"\r\n"):
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":", 1)[1])
+    await reader.readexactly(length)
+    return status
+
+async def worker(port: int, deadline: float, latencies: List[float], errors: List[int], index: int) -> None:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    payment = json.dumps({
+        "sender_account": f"rSender{index}",
+        "receiver_account": f"rReceiver{index}",
+        "amount": 1.5,
+        "currency": "XRP"
+    }).encode()
+    try:
+        for i in itertools.count():
+            if time.perf_counter() >= deadline:
+                break
+            start = time.perf_counter()
+            if i % 4 == 3:
+                status = await request(reader, writer, "GET", f"/api/v1/payments/balance/rSender{index}")
+            else:
+                status = await request(reader, writer, "POST", "/api/v1/payments/create", payment)
+            latencies.append(time.perf_counter() - start)
+            if status >= 400:
+                errors.append(status)
+    finally:
+        writer.close()
+
+async def wait_ready(port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            await request(reader, writer, "GET", "/api/v1/payments/verify/ready")
+            writer.close()
+            return
+        except (OSError, asyncio.IncompleteReadError):
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+async def load(port: int, connections: int, duration: float) -> dict:
+    await wait_ready(port)
+    latencies: List[float] = []
+    errors: List[int] = []
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        worker(port, start + duration, latencies, errors, i) for i in range(connections)
+    ))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    percentile = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(0.50),
+        "p99_ms": percentile(0.99)
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--modes", nargs="+", default=["flask", "asgi"], choices=["flask", "asgi"])
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--xrp-latency", type=float, default=0.005)
+    parser.add_argument("--serve", choices=["flask", "asgi"], help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.serve:
+        serve(args.serve, args.port, args.xrp_latency)
+        return
+    
+    print(f"{args.connections} connections, {args.duration:.0f}s per mode, "
+          f"simulated XRP latency {args.xrp_latency * 1000:.1f} ms")
+    print(f"{'mode':<6} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for mode in args.modes:
+        port = free_port()
+        server = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--serve", mode, "--port", str(port),
+             "--xrp-latency", str(args.xrp_latency)],
+            stdout=subprocess.DEVNULL
+        )
+        try:
+            result = asyncio.run(load(port, args.connections, args.duration))
+        finally:
+            server.terminate()
+            server.wait()
+        print(f"{mode:<6} {result['requests']:>9} {result['errors']:>7} {result['rps']:>9.0f} "
+              f"{result['p50_ms']:>8.2f} {result['p99_ms']:>8.2f}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
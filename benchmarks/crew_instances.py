@@ -0,0 +1,96 @@
+"""
+Construction cost and memory of crew executions
+
+Runs N sequential executions of the risk-assessment crew two ways: rebuilding
+every agent, task and crew per execution with ``create_agent`` /
+``create_task`` / ``create_crew`` (how the built-in crews were created
+before templates), and creating per-execution instances from the registered
+template. Crews are instantiated and released but not kicked off, so no LLM
+is called and the numbers are the orchestration overhead alone. Reports time
+per execution, allocation peak, memory retained afterwards and the number of
+live Agent, Task and Crew objects.
+
+Usage:
+    python benchmarks/crew_instances.py [--executions N]
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+from typing import Any, Callable, Dict
+
+from crewai import Agent, Task, Crew
+
+from synapse_protocol.agents.agent_manager import AgentManager
+
+def rebuild(manager: AgentManager, i: int) -> None:
+    manager.create_agent(
+        name="risk_analyzer",
+        role="Risk Analyzer",
+        goal="Analyze payment risks and provide risk assessment",
+        backstory="Expert in financial risk analysis and fraud detection"
+    )
+    manager.create_agent(
+        name="compliance_checker",
+        role="Compliance Checker",
+        goal="Verify compliance with regulations and policies",
+        backstory="Specialist in financial regulations and compliance requirements"
+    )
+    tasks = [
+        manager.create_task(
+            description="Analyze payment risks and provide detailed assessment",
+            agent_name="risk_analyzer",
+            expected_output="Risk assessment report with risk levels and recommendations",
+            async_execution=True
+        ),
+        manager.create_task(
+            description="Verify compliance with relevant regulations",
+            agent_name="compliance_checker",
+            expected_output="Compliance verification report"
+        )
+    ]
+    manager.create_crew(name="risk_crew", agent_names=["risk_analyzer", "compliance_checker"], tasks=tasks)
+
+def from_template(manager: AgentManager, i: int) -> None:
+    with manager.crew_registry.execution("risk_crew", f"payment-{i}"):
+        pass
+
+def live_objects() -> Dict[str, int]:
+    counts = {"Agent": 0, "Task": 0, "Crew": 0}
+    for obj in gc.get_objects():
+        for cls in (Agent, Task, Crew):
+            if isinstance(obj, cls):
+                counts[cls.__name__] += 1
+    return counts
+
+def measure(label: str, run: Callable[[AgentManager, int], Any], executions: int) -> None:
+    manager = AgentManager(api_key="sk-benchmark")
+    manager.create_risk_assessment_crew()
+    run(manager, -1)  # warm up lazy construction and imports
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    for i in range(executions):
+        run(manager, i)
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    objects = live_objects()
+    print(f"{label:<10} {elapsed / executions * 1e6:>10.1f} {(peak - baseline) / 1024:>10.1f} "
+          f"{(current - baseline) / 1024:>12.1f} {objects['Agent']:>7} {objects['Task']:>6} {objects['Crew']:>6}")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--executions", type=int, default=10000)
+    args = parser.parse_args()
+    
+    print(f"{args.executions} sequential executions")
+    print(f"{'crews':<10} {'us/exec':>10} {'peak KiB':>10} {'retained KiB':>12} {'agents':>7} {'tasks':>6} {'crews':>6}")
+    measure("rebuilt", rebuild, args.executions)
+    measure("template", from_template, args.executions)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,111 @@
+"""
+Fan-out latency of the cross-process Socket.IO message queue backends
+
+Publishes timestamped emit messages through a client manager while N worker
+processes listen on the same queue, as Socket.IO servers behind a load
+balancer would, and reports the publish-to-delivery latency seen by the
+workers for each worker count.
+
+Usage:
+    python benchmarks/fanout_latency.py [--workers 1 2 4 8] [--messages N]
+        [--rate MESSAGES_PER_SECOND] [--url unix:///path | redis://host]
+
+The default ``unix://`` backend needs no broker; other URLs need the client
+library of their queue (e.g. ``redis``).
+"""
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+from typing import List
+
+from synapse_protocol.websocket.fanout import create_client_manager
+
+def listen(url: str, messages: int, results) -> None:
+    """Worker process: collect the delivery latency of every benchmark message."""
+    manager = create_client_manager(url)
+    latencies: List[float] = []
+    for message in manager._listen():
+        received = time.monotonic()
+        data = message if isinstance(message, dict) else manager.json.loads(message)
+        if data.get("event") != "benchmark":
+            continue
+        latencies.append(received - data["sent"])
+        if data["data"][0] == messages - 1:
+            break
+    results.put(latencies)
+
+def run(url: str, workers: int, messages: int, rate: float) -> dict:
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    publisher = create_client_manager(url)
+    hub = getattr(publisher, "hub", None)
+    if hub is not None:
+        # Keep the hub in this process so it outlives the workers
+        hub.try_start()
+    processes = [
+        context.Process(target=listen, args=(url, messages, results), daemon=True)
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    deadline = time.monotonic() + 30
+    if hub is not None:
+        while hub.connections < workers and time.monotonic() < deadline:
+            time.sleep(0.01)
+    else:
+        time.sleep(2.0)
+    
+    interval = 1.0 / rate
+    start = time.monotonic()
+    for i in range(messages):
+        next_send = start + i * interval
+        delay = next_send - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        publisher._publish({
+            "method": "emit",
+            "event": "benchmark",
+            "data": [i],
+            "namespace": "/",
+            "room": "payment_benchmark",
+            "host_id": "benchmark",
+            "sent": time.monotonic()
+        })
+    
+    latencies: List[float] = []
+    for _ in processes:
+        latencies.extend(results.get(timeout=60))
+    for process in processes:
+        process.join(timeout=5)
+    latencies.sort()
+    percentile = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1e6
+    return {
+        "delivered": len(latencies),
+        "expected": messages * workers,
+        "p50_us": percentile(0.50),
+        "p99_us": percentile(0.99),
+        "max_us": latencies[-1] * 1e6 if latencies else 0.0
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--rate", type=float, default=2000.0)
+    parser.add_argument("--url", help="Message queue URL (default: a temporary unix:// socket)")
+    args = parser.parse_args()
+    
+    print(f"{args.messages} messages at {args.rate:.0f}/s per run")
+    print(f"{'workers':>7} {'delivered':>10} {'p50 us':>9} {'p99 us':>9} {'max us':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        for workers in args.workers:
+            url = args.url or f"unix://{os.path.join(directory, f'fanout-{workers}.sock')}"
+            result = run(url, workers, args.messages, args.rate)
+            print(f"{workers:>7} {result['delivered']:>5}/{result['expected']:<4} {result['p50_us']:>9.0f} "
+                  f"{result['p99_us']:>9.0f} {result['max_us']:>9.0f}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
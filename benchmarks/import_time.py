@@ -0,0 +1,80 @@
+"""
+Import time and memory of synapse_protocol entry points
+
+Imports each entry point in a fresh interpreter and reports the best wall
+time over ``--repeat`` runs, the resident set size the interpreter grew by
+and which heavy dependencies were loaded. ``import synapse_protocol`` must
+not load any of them; the script exits non-zero if it does, or if it takes
+longer than ``--max-import-ms``, so it can guard against regressions in CI.
+
+Usage:
+    python benchmarks/import_time.py [--repeat N] [--max-import-ms MS]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from typing import Any, Dict
+
+HEAVY_MODULES = ("crewai", "langchain", "langchain_openai", "flask", "flask_socketio", "socketio", "websockets")
+
+ENTRY_POINTS = {
+    "import synapse_protocol": "import synapse_protocol",
+    "PaymentProtocol": "from synapse_protocol import PaymentProtocol",
+    "SynapseProtocol client": "from synapse_protocol.protocol import SynapseProtocol",
+    "AsyncWebSocketManager": "from synapse_protocol.websocket import AsyncWebSocketManager",
+    "WebSocketManager": "from synapse_protocol import WebSocketManager",
+    "AgentManager": "from synapse_protocol import AgentManager"
+}
+
+PROBE = """
+import json, resource, sys, time
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+try:
+    exec({statement!r})
+    error = None
+except ImportError as exc:
+    error = str(exc)
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "ms": elapsed * 1e3,
+    "rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss,
+    "heavy": [m for m in {heavy!r} if m in sys.modules],
+    "error": error
+}}))
+"""
+
+def probe(statement: str) -> Dict[str, Any]:
+    code = PROBE.format(statement=statement, heavy=HEAVY_MODULES)
+    output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-import-ms", type=float, default=50.0,
+                        help="Fail if 'import synapse_protocol' takes longer")
+    args = parser.parse_args()
+    
+    failures = []
+    print(f"{'entry point':<24} {'ms':>8} {'RSS MiB':>8}  heavy modules loaded")
+    for label, statement in ENTRY_POINTS.items():
+        runs = [probe(statement) for _ in range(args.repeat)]
+        best = min(runs, key=lambda run: run["ms"])
+        if best["error"]:
+            print(f"{label:<24} {'-':>8} {'-':>8}  not importable here: {best['error']}")
+            continue
+        print(f"{label:<24} {best['ms']:>8.1f} {best['rss_kib'] / 1024:>8.1f}  {', '.join(best['heavy']) or '-'}")
+        if statement == "import synapse_protocol":
+            if best["heavy"]:
+                failures.append(f"import synapse_protocol loaded {', '.join(best['heavy'])}")
+            if best["ms"] > args.max_import_ms:
+                failures.append(f"import synapse_protocol took {best['ms']:.1f} ms")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,104 @@
+"""
+Memory footprint of in-flight payments
+
+Measures the bytes retained per in-flight payment (request, stored record and
+response) with tracemalloc, for the slotted payment types and for the
+``__dict__``-backed layout they replaced.
+
+Usage:
+    python benchmarks/payment_memory.py [--payments N] [--accounts N]
+"""
+
+import argparse
+import gc
+import tracemalloc
+from datetime import datetime
+
+from synapse_protocol.payments.store import PaymentRecord
+from synapse_protocol.payments.types import PaymentRequest, PaymentResponse, PaymentStatus
+
+class LegacyPaymentRequest:
+    """The previous request layout: instance dict, datetime and an empty metadata dict."""
+    
+    def __init__(self, payment_id, sender_account, receiver_account, amount, currency,
+                 description=None, metadata=None, status=PaymentStatus.PENDING, created_at=None):
+        self.payment_id = payment_id
+        self.sender_account = sender_account
+        self.receiver_account = receiver_account
+        self.amount = amount
+        self.currency = currency
+        self.description = description
+        self.metadata = metadata or {}
+        self.status = status
+        self.created_at = created_at or datetime.utcnow()
+
+class LegacyPaymentResponse:
+    """The previous response layout."""
+    
+    def __init__(self, payment_id, status, message, error_code=None, error_message=None,
+                 completed_at=None, transaction_hash=None):
+        self.payment_id = payment_id
+        self.status = status
+        self.message = message
+        self.error_code = error_code
+        self.error_message = error_message
+        self.completed_at = completed_at
+        self.transaction_hash = transaction_hash
+
+def account(i: int) -> str:
+    # Build identifiers at runtime, as they arrive from parsed JSON
+    return "".join(["r", "Agent", str(i)])
+
+def build(request_cls, response_cls, count: int, accounts: int) -> list:
+    payments = []
+    for i in range(count):
+        request = request_cls(
+            payment_id=f"payment-{i:012d}",
+            sender_account=account(i % accounts),
+            receiver_account=account((i + 1) % accounts),
+            amount=0.25,
+            currency="".join(["X", "RP"])
+        )
+        response = response_cls(
+            payment_id=request.payment_id,
+            status=PaymentStatus.PROCESSING,
+            message="Submitted"
+        )
+        payments.append((request, response))
+    return payments
+
+def build_with_records(count: int, accounts: int) -> list:
+    return [
+        (request, PaymentRecord.from_request(request), response)
+        for request, response in build(PaymentRequest, PaymentResponse, count, accounts)
+    ]
+
+def measure(fn, *args) -> int:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    payments = fn(*args)
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del payments
+    return after - before
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--payments", type=int, default=100000)
+    parser.add_argument("--accounts", type=int, default=1000)
+    args = parser.parse_args()
+    
+    rows = [
+        ("dict-backed request + response", measure(build, LegacyPaymentRequest, LegacyPaymentResponse, args.payments, args.accounts)),
+        ("slotted request + response", measure(build, PaymentRequest, PaymentResponse, args.payments, args.accounts)),
+        ("slotted request + record + response", measure(build_with_records, args.payments, args.accounts))
+    ]
+    print(f"{args.payments} in-flight payments across {args.accounts} accounts")
+    baseline = rows[0][1]
+    for name, total in rows:
+        print(f"  {name:<38} {total / args.payments:8.1f} bytes/payment  ({total / baseline:.0%} of baseline)")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
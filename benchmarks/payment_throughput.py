@@ -0,0 +1,191 @@
+"""
+End-to-end payment throughput against a simulated XRP client
+
+Drives ``PaymentProtocol.initiate_payment``, ``get_balance`` and
+``verify_transaction`` through ``XrpPaymentBridge`` against an in-process
+XRP client with configurable latency and failure rate, at each concurrency
+level, and prints throughput and p50/p95/p99 latency per operation as JSON
+so results can be compared between releases.
+
+Usage:
+    python benchmarks/payment_throughput.py [--concurrency 1,8,64,256]
+        [--requests N] [--accounts N] [--latency MS] [--latency-dist fixed|uniform|lognormal]
+        [--failure-rate P] [--seed N] [--output FILE]
+
+Balances and verifications go through the bridge's caches; ``--accounts``
+controls how often a lookup finds a cached balance.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import platform
+import random
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+import synapse_protocol
+from synapse_protocol.payments.core import PaymentProtocol
+from synapse_protocol.payments.types import PaymentStatus
+from synapse_protocol.payments.xrp_bridge import XrpPaymentBridge
+
+OPERATIONS = ("initiate_payment", "get_balance", "verify_transaction")
+
+class SimulatedXrpClient:
+    """XRP client answering after a random delay, failing a fraction of calls, without a ledger."""
+    
+    def __init__(self, latency: float, distribution: str = "fixed", failure_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.distribution = distribution
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.counter = itertools.count()
+        self.calls = 0
+    
+    def delay(self) -> float:
+        if self.distribution == "uniform":
+            return self.rng.uniform(0.0, 2 * self.latency)
+        if self.distribution == "lognormal":
+            return self.latency * math.exp(self.rng.gauss(0.0, 0.5))
+        return self.latency
+    
+    async def call(self) -> bool:
+        """Wait for the simulated round trip; False if the call fails."""
+        self.calls += 1
+        await asyncio.sleep(self.delay())
+        return self.rng.random() >= self.failure_rate
+    
+    async def sendPayment(self, request):
+        if not await self.call():
+            return {"success": False, "error": "tecPATH_DRY"}
+        return {"success": True, "transaction_hash": f"{next(self.counter):064X}"}
+    
+    async def getBalance(self, account_id):
+        if not await self.call():
+            raise ConnectionError("simulated rippled timeout")
+        return 1000.0
+    
+    async def verifyTransaction(self, tx_hash):
+        if not await self.call():
+            raise ConnectionError("simulated rippled timeout")
+        return True
+
+def percentile(ordered: List[float], p: float) -> float:
+    """Nearest-rank percentile of sorted values, in milliseconds."""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(p * len(ordered)) - 1))] * 1e3
+
+async def run(operation: Callable[[int], Any], requests: int, concurrency: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors = 0
+    indices = iter(range(requests))
+    
+    async def worker() -> None:
+        nonlocal errors
+        for i in indices:
+            start = time.perf_counter()
+            try:
+                ok = await operation(i)
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            errors += not ok
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "throughput": requests / elapsed,
+        "mean_ms": sum(latencies) / len(latencies) * 1e3 if latencies else 0.0,
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        "max_ms": latencies[-1] * 1e3 if latencies else 0.0
+    }
+
+async def benchmark(args: argparse.Namespace, concurrency: int) -> List[Dict[str, Any]]:
+    client = SimulatedXrpClient(args.latency / 1e3, args.latency_dist, args.failure_rate, args.seed)
+    protocol = PaymentProtocol(
+        api_key="benchmark",
+        xrp_client=XrpPaymentBridge(client),
+        max_in_flight=concurrency
+    )
+    hashes: List[str] = []
+    
+    async def initiate_payment(i: int) -> bool:
+        response = await protocol.initiate_payment({
+            "sender_account": f"rSender{i % args.accounts}",
+            "receiver_account": f"rReceiver{(i * 7) % args.accounts}",
+            "amount": 1.5,
+            "currency": "XRP",
+            "description": "Benchmark payment"
+        })
+        if response.transaction_hash:
+            hashes.append(response.transaction_hash)
+        return response.status == PaymentStatus.COMPLETED
+    
+    async def get_balance(i: int) -> bool:
+        await protocol.get_balance(f"rSender{i % args.accounts}")
+        return True
+    
+    async def verify_transaction(i: int) -> bool:
+        return await protocol.verify_transaction(hashes[i % len(hashes)] if hashes else f"{i:064X}")
+    
+    results = []
+    try:
+        for name, operation in zip(OPERATIONS, (initiate_payment, get_balance, verify_transaction)):
+            calls = client.calls
+            result = await run(operation, args.requests, concurrency)
+            result.update(operation=name, concurrency=concurrency, xrp_calls=client.calls - calls)
+            results.append(result)
+    finally:
+        await protocol.close()
+    return results
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", default="1,8,64,256", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per operation and level")
+    parser.add_argument("--accounts", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=5.0, help="Simulated XRP latency in milliseconds")
+    parser.add_argument("--latency-dist", choices=["fixed", "uniform", "lognormal"], default="fixed")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+    
+    results = []
+    for concurrency in (int(level) for level in args.concurrency.split(",")):
+        results.extend(asyncio.run(benchmark(args, concurrency)))
+    report = {
+        "benchmark": "payment_throughput",
+        "version": synapse_protocol.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.time(),
+        "config": {
+            "requests": args.requests,
+            "accounts": args.accounts,
+            "latency_ms": args.latency,
+            "latency_dist": args.latency_dist,
+            "failure_rate": args.failure_rate,
+            "seed": args.seed
+        },
+        "results": results
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        sys.stdout.write(text + "\n")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
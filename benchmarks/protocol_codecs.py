@@ -0,0 +1,131 @@
+"""
+Bytes on the wire and encode/decode cost of SynapseProtocol codecs
+
+Encodes representative protocol messages with the previous JSON path
+(``json.dumps`` / ``json.loads`` with default settings) and with every codec
+available here, reporting encoded size and per-message encode and decode
+time. With ``--roundtrip`` it also measures pipelined request throughput over
+a local connection for each negotiated codec.
+
+Usage:
+    python benchmarks/protocol_codecs.py [--iterations N] [--roundtrip]
+        [--requests N] [--concurrency N]
+
+MessagePack needs ``pip install synapse-protocol[msgpack]``.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Callable, Dict, List
+
+from synapse_protocol.codec import available_codecs, get_codec
+from synapse_protocol.protocol import SynapseProtocol, serve
+
+def sample_messages() -> Dict[str, Dict[str, Any]]:
+    payment = {
+        "payment_id": "3f0c8e0a-5b1e-4c3b-9a55-0d6f1f0b2d11",
+        "sender_account": "rPT1Sjq2YGrBMTttX4GZHjKu9dyfzbpAYe",
+        "receiver_account": "rGWrZyQqhTp9Xu7G5Pkayo7bXjH4k4QYpf",
+        "amount": 125.75,
+        "currency": "XRP",
+        "status": "completed",
+        "transaction_hash": "E08D6E9754025BA2534A78707605E0601F03ACE063687A0CA1BDDACFCD1698C7",
+        "created_at": 1760697600.125,
+        "metadata": {"invoice": "INV-20931", "agent": "risk_assessor"}
+    }
+    ledger_event = {
+        "type": "transaction",
+        "validated": True,
+        "ledger_index": 91234567,
+        "engine_result": "tesSUCCESS",
+        "transaction": {
+            "Account": payment["sender_account"],
+            "Destination": payment["receiver_account"],
+            "Amount": "125750000",
+            "Fee": "12",
+            "Flags": 2147483648,
+            "Sequence": 4415,
+            "LastLedgerSequence": 91234587,
+            "TransactionType": "Payment",
+            "hash": payment["transaction_hash"]
+        },
+        "meta": {"TransactionIndex": 17, "TransactionResult": "tesSUCCESS", "delivered_amount": "125750000"}
+    }
+    return {
+        "request": {"id": "1842", "command": "payment_status", "payment_id": payment["payment_id"]},
+        "payment": {"id": "1842", "result": payment},
+        "ledger_event": ledger_event,
+        "history_page": {"id": "1843", "result": [dict(payment, amount=i + 0.5) for i in range(50)]}
+    }
+
+def per_call(fn: Callable[[], Any], iterations: int) -> float:
+    """Best of three runs, in microseconds per call."""
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        best = min(best, (time.perf_counter() - start) / iterations)
+    return best * 1e6
+
+def size(data: Any) -> int:
+    return len(data.encode("utf-8")) if isinstance(data, str) else len(data)
+
+def measure_codecs(iterations: int) -> None:
+    codecs: List[Any] = [("json (previous)", json.dumps, json.loads)]
+    for name in available_codecs():
+        codec = get_codec(name)
+        codecs.append((name, codec.encode, codec.decode))
+    
+    print(f"{'message':<14} {'codec':<16} {'bytes':>7} {'encode us':>10} {'decode us':>10}")
+    for label, message in sample_messages().items():
+        for name, encode, decode in codecs:
+            data = encode(message)
+            assert decode(data) == message
+            print(f"{label:<14} {name:<16} {size(data):>7} "
+                  f"{per_call(lambda: encode(message), iterations):>10.2f} "
+                  f"{per_call(lambda: decode(data), iterations):>10.2f}")
+
+async def roundtrip(codec: str, requests: int, concurrency: int) -> float:
+    message = sample_messages()["payment"]["result"]
+    
+    async def echo(connection):
+        async for request in connection:
+            await connection.send_message({"id": request["id"], "result": message})
+    
+    async with serve(echo, "127.0.0.1", 0, codecs=[codec]) as server:
+        port = next(iter(server.sockets)).getsockname()[1]
+        client = SynapseProtocol(f"ws://127.0.0.1:{port}", max_in_flight=concurrency, codecs=[codec])
+        await client.connect()
+        remaining = iter(range(requests))
+        
+        async def worker():
+            for _ in remaining:
+                await client.request({"command": "payment_status", "payment_id": message["payment_id"]})
+        
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        await client.disconnect()
+    return requests / elapsed
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--roundtrip", action="store_true", help="Also measure request throughput")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    args = parser.parse_args()
+    
+    measure_codecs(args.iterations)
+    if args.roundtrip:
+        print()
+        print(f"{args.requests} requests, {args.concurrency} in flight")
+        for codec in available_codecs():
+            rate = asyncio.run(roundtrip(codec, args.requests, args.concurrency))
+            print(f"{codec:<8} {rate:>10.0f} req/s")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
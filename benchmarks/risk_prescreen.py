@@ -0,0 +1,79 @@
+"""
+Throughput and escalation rate of the risk pre-screen
+
+Screens synthetic pending payments in batches of each size, reporting
+per-payment screening time, the fraction of payments escalated to the risk
+crew and the crew time saved, assuming every payment decided without the
+crew would have cost ``--crew-seconds`` of LLM time.
+
+Usage:
+    python benchmarks/risk_prescreen.py [--payments N] [--batch-sizes 1,100,10000]
+        [--accounts N] [--crew-seconds S]
+"""
+
+import argparse
+import random
+import time
+from typing import Any, Dict, List
+
+from synapse_protocol.agents.prescreen import RiskPrescreen
+
+def synthetic_payments(count: int, accounts: int, seed: int = 7) -> List[Dict[str, Any]]:
+    """Mostly small payments, some large ones and a few invalid or foreign-currency ones."""
+    rng = random.Random(seed)
+    names = [f"r{i:033d}" for i in range(accounts)]
+    payments = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.7:
+            amount = round(rng.uniform(1, 100), 2)
+        elif roll < 0.95:
+            amount = round(rng.uniform(100, 20000), 2)
+        elif roll < 0.98:
+            amount = round(rng.uniform(100000, 500000), 2)
+        else:
+            amount = -1
+        payments.append({
+            "sender_account": rng.choice(names),
+            "receiver_account": rng.choice(names),
+            "amount": amount,
+            "currency": "XRP" if rng.random() < 0.99 else "USD"
+        })
+    return payments
+
+def run(payments: List[Dict[str, Any]], batch_size: int, accounts: int) -> Dict[str, Any]:
+    names = [f"r{i:033d}" for i in range(accounts)]
+    prescreen = RiskPrescreen(
+        allowlist=names[:accounts // 10],
+        denylist=names[-max(1, accounts // 100):],
+        max_payments_per_window=len(payments),
+        max_amount_per_window=float("inf")
+    )
+    start = time.perf_counter()
+    for i in range(0, len(payments), batch_size):
+        prescreen.screen(payments[i:i + batch_size])
+    stats = prescreen.stats()
+    stats["elapsed"] = time.perf_counter() - start
+    return stats
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--payments", type=int, default=100000)
+    parser.add_argument("--batch-sizes", default="1,100,10000")
+    parser.add_argument("--accounts", type=int, default=5000)
+    parser.add_argument("--crew-seconds", type=float, default=8.0,
+                        help="Assumed LLM time of one risk crew execution")
+    args = parser.parse_args()
+    
+    payments = synthetic_payments(args.payments, args.accounts)
+    print(f"{args.payments} payments, {args.accounts} accounts")
+    print(f"{'batch':>7} {'us/payment':>11} {'escalated':>10} {'crew s saved':>13}")
+    for batch_size in (int(size) for size in args.batch_sizes.split(",")):
+        stats = run(payments, batch_size, args.accounts)
+        decided = stats["approved"] + stats["rejected"]
+        saved = decided * args.crew_seconds - stats["screen_seconds"]
+        print(f"{batch_size:>7} {stats['elapsed'] / args.payments * 1e6:>11.2f} "
+              f"{stats['escalation_rate']:>10.1%} {saved:>13.0f}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
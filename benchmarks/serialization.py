@@ -0,0 +1,66 @@
+"""
+Serialization throughput of API and WebSocket payloads
+
+Compares the schema-compiled serializer with the stdlib path it replaces,
+``json.dumps(obj.to_dict()).encode()``, for single payments and for a page
+of payment history.
+
+Usage:
+    python benchmarks/serialization.py [--number N] [--page-size N]
+"""
+
+import argparse
+import json
+import timeit
+from datetime import datetime
+
+from synapse_protocol.payments.store import PaymentRecord
+from synapse_protocol.payments.types import PaymentRequest, PaymentResponse, PaymentStatus
+from synapse_protocol.serialization import Serializer
+
+def stdlib_dumps(obj) -> bytes:
+    if isinstance(obj, list):
+        return json.dumps([item.to_dict() for item in obj]).encode()
+    return json.dumps(obj.to_dict()).encode()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--number", type=int, default=20000)
+    parser.add_argument("--page-size", type=int, default=100)
+    args = parser.parse_args()
+    
+    request = PaymentRequest(
+        payment_id="0b6f7a4e-6f1c-4d36-9a38-3f1f2c1d9e10",
+        sender_account="rPEPPER7kfTD9w2To4CQk6UCfuHM9c6GDY",
+        receiver_account="rHb9CJAWyB4rj91VRWn96DkukG4bwdtyTh",
+        amount=12.5,
+        currency="XRP",
+        description="Agent task settlement",
+        metadata={"task_id": "t-42", "agent": "research"}
+    )
+    response = PaymentResponse(
+        payment_id=request.payment_id,
+        status=PaymentStatus.COMPLETED,
+        message="XRP payment processed successfully",
+        completed_at=datetime.utcnow(),
+        transaction_hash="E3FE6EA3D48F0C2B639448020EA4F03D4F4F8FFDB243A852A0F59177921B4879"
+    )
+    record = PaymentRecord.from_request(request)
+    record.apply_response(response)
+    page = [record] * args.page_size
+    
+    serializer = Serializer()
+    assert json.loads(serializer.dumps(page)) == json.loads(stdlib_dumps(page))
+    
+    print(f"{'payload':<22} {'stdlib json':>14} {'compiled':>14} {'speedup':>8}")
+    for name, obj, number in (
+        ("PaymentResponse", response, args.number),
+        ("PaymentRecord", record, args.number),
+        (f"history page ({args.page_size})", page, max(1, args.number // args.page_size))
+    ):
+        baseline = min(timeit.repeat(lambda: stdlib_dumps(obj), number=number, repeat=5)) / number
+        compiled = min(timeit.repeat(lambda: serializer.dumps(obj), number=number, repeat=5)) / number
+        print(f"{name:<22} {baseline * 1e6:11.2f} us {compiled * 1e6:11.2f} us {baseline / compiled:7.2f}x")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -41,15 +41,17 @@ async def main():
             "description": "Large payment for services"
         }
         
-        # Create and execute risk assessment crew
+        # Create and execute risk assessment crew without blocking the event loop
         risk_crew = agent_manager.create_risk_assessment_crew()
-        risk_assessment = agent_manager.execute_crew("risk_crew")
+        risk_assessment = await agent_manager.execute_crew_async(
+            "risk_crew", inputs=payment_data, timeout=120
+        )
         print("Risk Assessment:", risk_assessment)
         
         # If risk assessment passes, create and execute payment crew
         if risk_assessment.get("risk_level", "high") != "high":
             payment_crew = agent_manager.create_payment_crew()
-            payment_result = agent_manager.execute_crew("payment_crew")
+            payment_result = await agent_manager.execute_crew_async("payment_crew", timeout=120)
             print("Payment Processing:", payment_result)
             
             # Create the payment
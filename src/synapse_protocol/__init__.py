@@ -2,14 +2,43 @@
 Synapse Protocol - A2A Payment Protocol with XRP Integration
 """
 
-from .payments.core import PaymentProtocol
-from .websocket import WebSocketManager
-from .agents.agent_manager import AgentManager
+import importlib
+from typing import TYPE_CHECKING, Any, List
 
 __version__ = "0.1.0"
 
+# Public names and the modules defining them. A module is imported the first
+# time one of its names is accessed, so ``import synapse_protocol`` does not
+# load crewai, langchain or Flask for processes that never use them.
+_LAZY_ATTRIBUTES = {
+    'PaymentProtocol': '.payments.core',
+    'WebSocketManager': '.websocket',
+    'AgentManager': '.agents.agent_manager',
+    'create_app': '.app',
+    'create_asgi_app': '.app'
+}
+
+if TYPE_CHECKING:
+    from .payments.core import PaymentProtocol
+    from .websocket import WebSocketManager
+    from .agents.agent_manager import AgentManager
+    from .app import create_app, create_asgi_app
+
 __all__ = [
     'PaymentProtocol',
     'WebSocketManager',
-    'AgentManager'
-] 
\ No newline at end of file
+    'AgentManager',
+    'create_app',
+    'create_asgi_app'
+]
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
\ No newline at end of file
@@ -2,32 +2,90 @@
 Agent management module for Synapse Protocol
 """
 
-from typing import Dict, Any, List, Optional
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, Any, Iterable, List, Mapping, Optional, Union
 from crewai import Agent, Task, Crew, Process
 from langchain_openai import ChatOpenAI
 from langchain.callbacks.base import BaseCallbackHandler
 from langchain_core.outputs import LLMResult
+from .crew_registry import CrewRegistry, CrewTemplate
+from .prescreen import RiskPrescreen
+from .risk_batch import RiskBatcher
+from .risk_cache import RiskDecisionCache
+
+# Agents of the risk assessment crews
+RISK_AGENTS = {
+    "risk_analyzer": {
+        "role": "Risk Analyzer",
+        "goal": "Analyze payment risks and provide risk assessment",
+        "backstory": "Expert in financial risk analysis and fraud detection"
+    },
+    "compliance_checker": {
+        "role": "Compliance Checker",
+        "goal": "Verify compliance with regulations and policies",
+        "backstory": "Specialist in financial regulations and compliance requirements"
+    }
+}
 
 class AgentManager:
     """Manages AI agents and their interactions."""
     
-    def __init__(self, api_key: str, environment: str = "sandbox"):
+    def __init__(
+        self,
+        api_key: str,
+        environment: str = "sandbox",
+        risk_policy_version: str = "1",
+        risk_cache: Optional[RiskDecisionCache] = None,
+        max_concurrent_crews: int = 4,
+        crew_timeout: Optional[float] = None,
+        prescreen: Optional[RiskPrescreen] = None,
+        risk_batcher: Optional[RiskBatcher] = None,
+        llm: Optional[Any] = None
+    ):
         """
         Initialize the agent manager.
         
         Args:
             api_key: OpenAI API key
             environment: 'sandbox' or 'production'
+            risk_policy_version: Version of the risk policy; changing it
+                stops cached risk decisions from being reused
+            risk_cache: Cache of risk decisions, defaults to one with a one
+                hour TTL
+            max_concurrent_crews: Size of the executor running crews for
+                async callers
+            crew_timeout: Default seconds an async crew execution may take,
+                None for no limit; per-crew values go in ``crew_timeouts``
+            prescreen: Rules deciding clear-cut payments before the risk
+                crew is consulted, None to send every payment to the crew
+            risk_batcher: Packs the payments of ``assess_payment_risks_async``
+                into batched crew executions, None to assess them one by one
+            llm: Language model the agents use, e.g. a ``FakeLLM`` for offline
+                runs; defaults to OpenAI's gpt-3.5-turbo with ``api_key``
         """
         self.api_key = api_key
         self.environment = environment
-        self.llm = ChatOpenAI(
+        self.llm = llm if llm is not None else ChatOpenAI(
             api_key=api_key,
             model="gpt-3.5-turbo",
             temperature=0.7
         )
         self.agents: Dict[str, Agent] = {}
         self.crews: Dict[str, Crew] = {}
+        self.crew_registry = CrewRegistry(self.llm)
+        self.risk_policy_version = risk_policy_version
+        self.risk_cache = risk_cache if risk_cache is not None else RiskDecisionCache()
+        self.max_concurrent_crews = max_concurrent_crews
+        self.crew_timeout = crew_timeout
+        self.crew_timeouts: Dict[str, float] = {}
+        self.prescreen = prescreen
+        self.risk_batcher = risk_batcher
+        self.risk_crew_runs = 0
+        self.risk_crew_seconds = 0.0
+        self._executor: Optional[ThreadPoolExecutor] = None
         
     def create_agent(self, 
                     name: str,
@@ -62,7 +120,8 @@ class AgentManager:
     def create_task(self, 
                    description: str,
                    agent_name: str,
-                   expected_output: Optional[str] = None) -> Task:
+                   expected_output: Optional[str] = None,
+                   async_execution: bool = False) -> Task:
         """
         Create a new task for an agent.
         
@@ -70,6 +129,8 @@ class AgentManager:
             description: Task description
             agent_name: Name of the agent to perform the task
             expected_output: Expected output format
+            async_execution: Run the task concurrently with the tasks that
+                follow it in the crew; only for tasks nothing later depends on
             
         Returns:
             Created task
@@ -77,10 +138,12 @@ class AgentManager:
         if agent_name not in self.agents:
             raise ValueError(f"Agent {agent_name} not found")
             
+        options = {'async_execution': True} if async_execution else {}
         return Task(
             description=description,
             agent=self.agents[agent_name],
-            expected_output=expected_output
+            expected_output=expected_output,
+            **options
         )
         
     def create_crew(self,
@@ -113,114 +176,456 @@ class AgentManager:
         self.crews[name] = crew
         return crew
         
-    def execute_crew(self, crew_name: str) -> Dict[str, Any]:
+    def execute_crew(self, crew_name: str, inputs: Optional[Dict[str, Any]] = None,
+                     execution_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Execute a crew's tasks.
         
+        A registered crew template runs as a crew instance of its own, kept
+        under ``execution_id`` in ``crew_registry.executions`` until it
+        finishes, so executions of the same crew can run side by side.
+        
         Args:
             crew_name: Name of the crew to execute
+            inputs: Values interpolated into the crew's task descriptions
+            execution_id: Key of the crew instance, a new unique ID if None
             
         Returns:
             Execution results
         """
+        if crew_name in self.crew_registry:
+            with self.crew_registry.execution(crew_name, execution_id) as crew:
+                return crew.kickoff() if inputs is None else crew.kickoff(inputs=inputs)
         if crew_name not in self.crews:
             raise ValueError(f"Crew {crew_name} not found")
             
-        return self.crews[crew_name].kickoff()
+        if inputs is None:
+            return self.crews[crew_name].kickoff()
+        return self.crews[crew_name].kickoff(inputs=inputs)
         
-    def create_payment_crew(self) -> Crew:
+    async def execute_crew_async(
+        self,
+        crew_name: str,
+        inputs: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        execution_id: Optional[str] = None
+    ) -> Any:
         """
-        Create a crew for handling payments.
+        Execute a crew's tasks without blocking the event loop.
+        
+        The kickoff runs on the manager's crew executor, so at most
+        ``max_concurrent_crews`` crews run at once and further executions
+        queue. On timeout or cancellation a kickoff that has not started is
+        dropped; one already running cannot be interrupted and finishes in
+        the background, its result discarded.
         
+        Args:
+            crew_name: Name of the crew to execute
+            inputs: Values interpolated into the crew's task descriptions
+            timeout: Seconds to wait for the results, including time queued;
+                defaults to ``crew_timeouts[crew_name]``, then ``crew_timeout``
+            execution_id: Key of the crew instance, see ``execute_crew``
+            
         Returns:
-            Payment handling crew
-        """
-        # Create payment processing agents
-        validator = self.create_agent(
-            name="validator",
-            role="Payment Validator",
-            goal="Validate payment requests and ensure they meet all requirements",
-            backstory="Expert in payment validation and risk assessment"
+            Execution results
+            
+        Raises:
+            asyncio.TimeoutError: If the crew did not finish in time
+        """
+        if crew_name not in self.crews and crew_name not in self.crew_registry:
+            raise ValueError(f"Crew {crew_name} not found")
+            
+        if timeout is None:
+            timeout = self.crew_timeouts.get(crew_name, self.crew_timeout)
+        loop = asyncio.get_running_loop()
+        execution = loop.run_in_executor(
+            self._get_executor(),
+            partial(self.execute_crew, crew_name, inputs, execution_id)
         )
+        return await asyncio.wait_for(execution, timeout)
         
-        processor = self.create_agent(
-            name="processor",
-            role="Payment Processor",
-            goal="Process valid payments and ensure successful completion",
-            backstory="Experienced in handling various payment methods and currencies"
-        )
+    async def execute_crews_async(
+        self,
+        crews: Union[Iterable[str], Mapping[str, Optional[Dict[str, Any]]]],
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Execute independent crews concurrently.
         
-        auditor = self.create_agent(
-            name="auditor",
-            role="Payment Auditor",
-            goal="Audit completed payments and ensure compliance",
-            backstory="Specialist in payment auditing and compliance verification"
-        )
+        If one crew fails or times out, the others are cancelled and the
+        error is raised.
         
-        # Create payment processing tasks
-        validation_task = self.create_task(
-            description="Validate payment request details and check for potential issues",
-            agent_name="validator",
-            expected_output="Validation report with any issues found"
-        )
+        Args:
+            crews: Crew names, or a mapping of crew names to their inputs
+            timeout: Seconds each crew may take, see ``execute_crew_async``
+            
+        Returns:
+            Execution results by crew name
+        """
+        inputs = crews if isinstance(crews, Mapping) else dict.fromkeys(crews)
+        executions = {
+            name: asyncio.ensure_future(self.execute_crew_async(name, crew_inputs, timeout))
+            for name, crew_inputs in inputs.items()
+        }
+        try:
+            await asyncio.gather(*executions.values())
+        except BaseException:
+            for execution in executions.values():
+                execution.cancel()
+            await asyncio.gather(*executions.values(), return_exceptions=True)
+            raise
+        return {name: execution.result() for name, execution in executions.items()}
         
-        processing_task = self.create_task(
-            description="Process the payment and ensure successful completion",
-            agent_name="processor",
-            expected_output="Payment processing result with transaction details"
-        )
+    def close(self) -> None:
+        """Shut down the crew executor without waiting for running crews."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+            
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Get the crew executor, creating it on first use."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrent_crews,
+                thread_name_prefix="crew"
+            )
+        return self._executor
+        
+    def assess_payment_risk(self, payment: Dict[str, Any], crew_name: str = "risk_crew") -> Any:
+        """
+        Assess the risk of a payment, reusing the decision for repeat payments.
+        
+        Payments the pre-screen decides never reach the crew. Payments with
+        the same sender, receiver, currency and amount band under the current
+        risk policy version share one crew execution until the cached
+        decision expires or is invalidated.
+        
+        Args:
+            payment: Payment data with sender_account, receiver_account,
+                amount and currency
+            crew_name: Name of the risk assessment crew
+            
+        Returns:
+            Risk assessment results
+        """
+        if self.prescreen is not None:
+            decision = self.prescreen.screen([payment])[0]
+            if decision is not None:
+                return decision
+        key = self.risk_cache.features(payment, self.risk_policy_version)
+        decision = self.risk_cache.get(key)
+        if decision is not None:
+            return decision
+        start = time.perf_counter()
+        decision = self.execute_crew(crew_name, inputs=dict(payment))
+        self._record_risk_crew(time.perf_counter() - start)
+        self.risk_cache.set(key, decision)
+        return decision
+        
+    def invalidate_risk_decisions(self, account: Optional[str] = None) -> int:
+        """
+        Drop cached risk decisions, e.g. after an account is flagged.
+        
+        Args:
+            account: Only drop decisions involving this account; all if None
+            
+        Returns:
+            Number of decisions dropped
+        """
+        return self.risk_cache.invalidate(account)
+        
+    async def assess_payment_risk_async(self, payment: Dict[str, Any], crew_name: str = "risk_crew",
+                                        timeout: Optional[float] = None) -> Any:
+        """
+        Async variant of ``assess_payment_risk`` running the crew on the crew executor.
+        
+        Args:
+            payment: Payment data with sender_account, receiver_account,
+                amount and currency
+            crew_name: Name of the risk assessment crew
+            timeout: Seconds the crew may take, see ``execute_crew_async``
+            
+        Returns:
+            Risk assessment results
+        """
+        if self.prescreen is not None:
+            decision = self.prescreen.screen([payment])[0]
+            if decision is not None:
+                return decision
+        return await self._assess_with_crew_async(payment, crew_name, timeout)
         
-        audit_task = self.create_task(
-            description="Audit the completed payment and verify compliance",
-            agent_name="auditor",
-            expected_output="Audit report with compliance status"
+    async def assess_payment_risks_async(self, payments: List[Dict[str, Any]], crew_name: str = "risk_crew",
+                                         timeout: Optional[float] = None) -> List[Any]:
+        """
+        Assess a batch of payments, screening them together first.
+        
+        The pre-screen decides the whole batch in one pass; only the payments
+        it escalates go to the risk crew, concurrently. With a
+        ``risk_batcher`` they are packed into batches assessed by one
+        ``risk_batch_crew`` execution each, and payments a batch response
+        leaves unresolved fall back to the crew named ``crew_name``.
+        
+        Args:
+            payments: Payment data with sender_account, receiver_account,
+                amount and currency
+            crew_name: Name of the risk assessment crew
+            timeout: Seconds each crew execution may take, see ``execute_crew_async``
+            
+        Returns:
+            Risk assessment results in the order of ``payments``
+        """
+        if self.prescreen is not None:
+            decisions = self.prescreen.screen(payments)
+        else:
+            decisions = [None] * len(payments)
+        escalated = [i for i, decision in enumerate(decisions) if decision is None]
+        if self.risk_batcher is not None and escalated:
+            results = await self._assess_batched_async([payments[i] for i in escalated], crew_name, timeout)
+        else:
+            results = await asyncio.gather(
+                *(self._assess_with_crew_async(payments[i], crew_name, timeout) for i in escalated)
+            )
+        for i, decision in zip(escalated, results):
+            decisions[i] = decision
+        return decisions
+        
+    def prescreen_stats(self) -> Dict[str, Any]:
+        """
+        Get pre-screen statistics and the crew time it saved.
+        
+        ``latency_saved_seconds`` estimates the crew time the pre-screen
+        avoided: payments it decided, times the average risk crew execution,
+        minus the time spent screening.
+        
+        Returns:
+            Pre-screen statistics, empty if there is no pre-screen
+        """
+        if self.prescreen is None:
+            return {}
+        stats = self.prescreen.stats()
+        average = self.risk_crew_seconds / self.risk_crew_runs if self.risk_crew_runs else 0.0
+        stats["avg_risk_crew_seconds"] = average
+        stats["latency_saved_seconds"] = (
+            (stats["approved"] + stats["rejected"]) * average - stats["screen_seconds"]
+            if self.risk_crew_runs else 0.0
         )
+        return stats
+        
+    async def _assess_with_crew_async(self, payment: Dict[str, Any], crew_name: str,
+                                      timeout: Optional[float]) -> Any:
+        """Assess a payment with the risk crew, reusing cached decisions."""
+        key = self.risk_cache.features(payment, self.risk_policy_version)
+        decision = self.risk_cache.get(key)
+        if decision is not None:
+            return decision
+        start = time.perf_counter()
+        decision = await self.execute_crew_async(crew_name, inputs=dict(payment), timeout=timeout)
+        self._record_risk_crew(time.perf_counter() - start)
+        self.risk_cache.set(key, decision)
+        return decision
+        
+    async def _assess_batched_async(self, payments: List[Dict[str, Any]], crew_name: str,
+                                    timeout: Optional[float]) -> List[Any]:
+        """Assess payments in batches, reusing cached decisions and deduplicating repeats."""
+        batcher = self.risk_batcher
+        start = time.perf_counter()
+        results: List[Any] = [None] * len(payments)
+        pending: Dict[Any, List[int]] = {}
+        for i, payment in enumerate(payments):
+            key = self.risk_cache.features(payment, self.risk_policy_version)
+            decision = self.risk_cache.get(key)
+            if decision is not None:
+                results[i] = decision
+            else:
+                pending.setdefault(key, []).append(i)
+        keys = list(pending)
+        unique = [payments[pending[key][0]] for key in keys]
+        if "risk_batch_crew" not in self.crew_registry:
+            self.create_batch_risk_assessment_crew()
+        batch_steps = len(self.crew_registry.templates["risk_batch_crew"].tasks)
+        single_steps = self._crew_steps(crew_name)
+        
+        async def assess_batch(batch: List[int]) -> None:
+            refs = [f"p{j}" for j in batch]
+            try:
+                output = await self.execute_crew_async(
+                    "risk_batch_crew",
+                    inputs={"payments": batcher.render([unique[j] for j in batch], refs), "count": len(batch)},
+                    timeout=timeout
+                )
+                verdicts = batcher.parse(output, refs)
+                failed = False
+            except Exception:
+                verdicts, failed = {}, True
+            batcher.record_batch(len(batch), len(verdicts), failed, batch_steps)
+            
+            async def resolve(j: int, ref: str) -> None:
+                verdict = verdicts.get(ref)
+                if verdict is None:
+                    batcher.record_fallback(single_steps)
+                    verdict = await self._assess_with_crew_async(unique[j], crew_name, timeout)
+                else:
+                    self.risk_cache.set(keys[j], verdict)
+                for i in pending[keys[j]]:
+                    results[i] = verdict
+            
+            await asyncio.gather(*(resolve(j, ref) for j, ref in zip(batch, refs)))
+            
+        try:
+            await asyncio.gather(*(assess_batch(batch) for batch in batcher.pack(unique)))
+        finally:
+            batcher.record_assessment(time.perf_counter() - start)
+        return results
+        
+    def _crew_steps(self, crew_name: str) -> int:
+        """Number of tasks, and so at least of LLM calls, in one execution of a crew."""
+        if crew_name in self.crew_registry:
+            return len(self.crew_registry.templates[crew_name].tasks)
+        crew = self.crews.get(crew_name)
+        return len(crew.tasks) if crew is not None else 0
+        
+    def _record_risk_crew(self, seconds: float) -> None:
+        self.risk_crew_runs += 1
+        self.risk_crew_seconds += seconds
         
-        # Create and return the payment crew
-        return self.create_crew(
+    def register_crew_template(self, template: CrewTemplate) -> CrewTemplate:
+        """
+        Register a crew template; its agents are built on first execution.
+        
+        Args:
+            template: Crew template
+            
+        Returns:
+            The registered template, the existing one if the name is taken
+        """
+        return self.crew_registry.register(template)
+        
+    def create_payment_crew(self) -> CrewTemplate:
+        """
+        Register the crew for handling payments.
+        
+        Calling this again reuses the registered template and its agents.
+        
+        Returns:
+            Payment handling crew template
+        """
+        return self.register_crew_template(CrewTemplate(
             name="payment_crew",
-            agent_names=["validator", "processor", "auditor"],
-            tasks=[validation_task, processing_task, audit_task]
-        )
+            agents={
+                "validator": {
+                    "role": "Payment Validator",
+                    "goal": "Validate payment requests and ensure they meet all requirements",
+                    "backstory": "Expert in payment validation and risk assessment"
+                },
+                "processor": {
+                    "role": "Payment Processor",
+                    "goal": "Process valid payments and ensure successful completion",
+                    "backstory": "Experienced in handling various payment methods and currencies"
+                },
+                "auditor": {
+                    "role": "Payment Auditor",
+                    "goal": "Audit completed payments and ensure compliance",
+                    "backstory": "Specialist in payment auditing and compliance verification"
+                }
+            },
+            tasks=[
+                {
+                    "description": "Validate payment request details and check for potential issues",
+                    "agent": "validator",
+                    "expected_output": "Validation report with any issues found"
+                },
+                {
+                    "description": "Process the payment and ensure successful completion",
+                    "agent": "processor",
+                    "expected_output": "Payment processing result with transaction details"
+                },
+                {
+                    "description": "Audit the completed payment and verify compliance",
+                    "agent": "auditor",
+                    "expected_output": "Audit report with compliance status"
+                }
+            ]
+        ))
         
-    def create_risk_assessment_crew(self) -> Crew:
+    def create_batch_risk_assessment_crew(self) -> CrewTemplate:
         """
-        Create a crew for risk assessment.
+        Register the crew assessing a batch of payments in one execution.
+        
+        It has the agents of the risk assessment crew; its tasks take the
+        payment lines rendered by a ``RiskBatcher`` and answer with a JSON
+        array of verdicts, one per payment. The compliance check combines
+        its verdicts with the risk analysis, so the tasks run in order.
         
         Returns:
-            Risk assessment crew
-        """
-        # Create risk assessment agents
-        risk_analyzer = self.create_agent(
-            name="risk_analyzer",
-            role="Risk Analyzer",
-            goal="Analyze payment risks and provide risk assessment",
-            backstory="Expert in financial risk analysis and fraud detection"
+            Batch risk assessment crew template
+        """
+        verdict_format = (
+            "A JSON array with one object per payment, with the keys ref (the "
+            "payment's reference), risk_level (low, medium or high), decision "
+            "(approve, review or reject) and reason"
         )
+        return self.register_crew_template(CrewTemplate(
+            name="risk_batch_crew",
+            agents=RISK_AGENTS,
+            tasks=[
+                {
+                    "description": (
+                        "Analyze the risks of each of the following {count} payments, "
+                        "given one per line as reference: payment details\n{payments}"
+                    ),
+                    "agent": "risk_analyzer",
+                    "expected_output": verdict_format
+                },
+                {
+                    "description": (
+                        "Verify compliance with relevant regulations of each of the following "
+                        "{count} payments and combine it with the risk analysis into one "
+                        "verdict per payment\n{payments}"
+                    ),
+                    "agent": "compliance_checker",
+                    "expected_output": verdict_format
+                }
+            ]
+        ))
         
-        compliance_checker = self.create_agent(
-            name="compliance_checker",
-            role="Compliance Checker",
-            goal="Verify compliance with regulations and policies",
-            backstory="Specialist in financial regulations and compliance requirements"
-        )
+    def create_risk_assessment_crew(self) -> CrewTemplate:
+        """
+        Register the crew for risk assessment.
         
-        # Create risk assessment tasks
-        analysis_task = self.create_task(
-            description="Analyze payment risks and provide detailed assessment",
-            agent_name="risk_analyzer",
-            expected_output="Risk assessment report with risk levels and recommendations"
-        )
+        The crew assesses the payment passed as ``inputs`` to
+        ``execute_crew``, which must provide ``sender_account``,
+        ``receiver_account``, ``amount`` and ``currency``. Calling this
+        again reuses the registered template and its agents.
         
-        compliance_task = self.create_task(
-            description="Verify compliance with relevant regulations",
-            agent_name="compliance_checker",
-            expected_output="Compliance verification report"
+        Returns:
+            Risk assessment crew template
+        """
+        # The analysis and the compliance check are independent, so the
+        # analysis runs alongside the compliance check
+        payment_details = (
+            "sender: {sender_account}, receiver: {receiver_account}, "
+            "amount: {amount}, currency: {currency}"
         )
-        
-        # Create and return the risk assessment crew
-        return self.create_crew(
+        return self.register_crew_template(CrewTemplate(
             name="risk_crew",
-            agent_names=["risk_analyzer", "compliance_checker"],
-            tasks=[analysis_task, compliance_task]
-        ) 
\ No newline at end of file
+            agents=RISK_AGENTS,
+            tasks=[
+                {
+                    "description": (
+                        "Analyze the risks of the following payment and provide a detailed "
+                        "assessment\n" + payment_details
+                    ),
+                    "agent": "risk_analyzer",
+                    "expected_output": "Risk assessment report with risk levels and recommendations",
+                    "async_execution": True
+                },
+                {
+                    "description": (
+                        "Verify compliance with relevant regulations of the following "
+                        "payment\n" + payment_details
+                    ),
+                    "agent": "compliance_checker",
+                    "expected_output": "Compliance verification report"
+                }
+            ]
+        ))
\ No newline at end of file
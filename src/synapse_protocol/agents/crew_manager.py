@@ -12,17 +12,19 @@ from langchain_core.outputs import LLMResult
 class CrewManager:
     """Manages CrewAI agents and their interactions."""
     
-    def __init__(self, api_key: str, environment: str = "sandbox"):
+    def __init__(self, api_key: str, environment: str = "sandbox", llm: Optional[Any] = None):
         """
         Initialize the CrewAI manager.
         
         Args:
             api_key: OpenAI API key
             environment: 'sandbox' or 'production'
+            llm: Language model the agents use; defaults to OpenAI's
+                gpt-3.5-turbo with ``api_key``
         """
         self.api_key = api_key
         self.environment = environment
-        self.llm = ChatOpenAI(
+        self.llm = llm if llm is not None else ChatOpenAI(
             api_key=api_key,
             model="gpt-3.5-turbo",
             temperature=0.7
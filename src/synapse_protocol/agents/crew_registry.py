@@ -0,0 +1,221 @@
+"""
+Crew templates and per-execution crew instances
+"""
+
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence
+from crewai import Agent, Task, Crew, Process
+
+class CrewTemplate:
+    """
+    Definition of a crew: its agents, its tasks and their order.
+    
+    Agents are given as ``{name: {"role", "goal", "backstory", "tools"}}``
+    and tasks as ``{"description", "agent", "expected_output",
+    "async_execution"}`` where ``agent`` names one of the agents. Once
+    registered, a template can be kicked off like a ``Crew``.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        agents: Mapping[str, Mapping[str, Any]],
+        tasks: Sequence[Mapping[str, Any]],
+        process: Process = Process.sequential
+    ):
+        """
+        Initialize the template.
+        
+        Args:
+            name: Unique identifier for the crew
+            agents: Agent definitions by agent name
+            tasks: Task definitions, in execution order
+            process: Process type (sequential or hierarchical)
+        """
+        for task in tasks:
+            if task["agent"] not in agents:
+                raise ValueError(f"Agent {task['agent']} not found")
+        self.name = name
+        self.agents = {agent_name: dict(spec) for agent_name, spec in agents.items()}
+        self.tasks = [dict(task) for task in tasks]
+        self.process = process
+        self.registry: Optional["CrewRegistry"] = None
+    
+    def kickoff(self, inputs: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        Execute the crew on a crew instance of its own.
+        
+        Args:
+            inputs: Values interpolated into the task descriptions
+        
+        Returns:
+            Execution results
+        """
+        if self.registry is None:
+            raise ValueError(f"Crew {self.name} is not registered")
+        with self.registry.execution(self.name) as crew:
+            return crew.kickoff() if inputs is None else crew.kickoff(inputs=inputs)
+
+class CrewRegistry:
+    """
+    Builds crews from templates, reusing agents between executions.
+    
+    All agents share the registry's LLM. An agent is created the first time
+    a crew needs it and goes back to an idle pool when that crew's execution
+    is released, so sequential executions reuse the same agents and only
+    executions running side by side create additional copies. A crew
+    instance is created per execution, with its own tasks, and is kept
+    under its execution ID only until it is released.
+    """
+    
+    def __init__(self, llm: Any):
+        """
+        Initialize the registry.
+        
+        Args:
+            llm: Language model the agents use
+        """
+        self.llm = llm
+        self.templates: Dict[str, CrewTemplate] = {}
+        self.executions: Dict[str, Crew] = {}
+        self.instantiated = 0
+        self.agents_built = 0
+        self.peak_executions = 0
+        self._idle_agents: Dict[str, List[Agent]] = {}
+        self._execution_agents: Dict[str, Dict[str, Agent]] = {}
+        self._agent_specs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+    
+    def __contains__(self, name: str) -> bool:
+        return name in self.templates
+    
+    def register(self, template: CrewTemplate) -> CrewTemplate:
+        """
+        Register a template, keeping an already registered one of the same name.
+        
+        Args:
+            template: Crew template
+        
+        Returns:
+            The registered template
+        """
+        with self._lock:
+            if template.name in self.templates:
+                return self.templates[template.name]
+            for agent_name, spec in template.agents.items():
+                if self._agent_specs.setdefault(agent_name, spec) != spec:
+                    raise ValueError(f"Agent {agent_name} is already defined differently")
+            template.registry = self
+            self.templates[template.name] = template
+            return template
+    
+    def instantiate(self, name: str, execution_id: str) -> Crew:
+        """
+        Create a crew instance for one execution.
+        
+        Args:
+            name: Name of the template
+            execution_id: Key of the instance
+        
+        Returns:
+            Crew instance, to be released with ``release(execution_id)``
+        """
+        with self._lock:
+            template = self.templates.get(name)
+            if template is None:
+                raise ValueError(f"Crew {name} not found")
+            if execution_id in self.executions:
+                raise ValueError(f"Execution {execution_id} is already running")
+            agents = {agent_name: self._acquire_agent(agent_name) for agent_name in template.agents}
+        try:
+            crew = Crew(
+                agents=list(agents.values()),
+                tasks=[self._task(spec, agents[spec["agent"]]) for spec in template.tasks],
+                process=template.process,
+                verbose=True
+            )
+        except BaseException:
+            self._release_agents(agents)
+            raise
+        with self._lock:
+            if execution_id in self.executions:
+                self._release_agents(agents, locked=True)
+                raise ValueError(f"Execution {execution_id} is already running")
+            self.executions[execution_id] = crew
+            self._execution_agents[execution_id] = agents
+            self.instantiated += 1
+            self.peak_executions = max(self.peak_executions, len(self.executions))
+            return crew
+    
+    def release(self, execution_id: str) -> None:
+        """Drop the crew instance of a finished execution and return its agents to the pool."""
+        with self._lock:
+            self.executions.pop(execution_id, None)
+            agents = self._execution_agents.pop(execution_id, None)
+            if agents:
+                self._release_agents(agents, locked=True)
+    
+    @contextmanager
+    def execution(self, name: str, execution_id: Optional[str] = None) -> Iterator[Crew]:
+        """
+        Create a crew instance and release it when the block exits.
+        
+        Args:
+            name: Name of the template
+            execution_id: Key of the instance, a new unique ID if None
+        
+        Yields:
+            Crew instance
+        """
+        execution_id = execution_id or uuid.uuid4().hex
+        crew = self.instantiate(name, execution_id)
+        try:
+            yield crew
+        finally:
+            self.release(execution_id)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get the number of templates, built agents and crew instances."""
+        with self._lock:
+            return {
+                "templates": len(self.templates),
+                "agents_built": self.agents_built,
+                "idle_agents": sum(len(idle) for idle in self._idle_agents.values()),
+                "active_executions": len(self.executions),
+                "peak_executions": self.peak_executions,
+                "instantiated": self.instantiated
+            }
+    
+    def _acquire_agent(self, name: str) -> Agent:
+        """Take an idle agent, building one if all are in use; call with the lock held."""
+        idle = self._idle_agents.get(name)
+        if idle:
+            return idle.pop()
+        spec = self._agent_specs[name]
+        self.agents_built += 1
+        return Agent(
+            role=spec["role"],
+            goal=spec["goal"],
+            backstory=spec["backstory"],
+            llm=self.llm,
+            tools=list(spec.get("tools") or []),
+            verbose=True
+        )
+    
+    def _release_agents(self, agents: Mapping[str, Agent], locked: bool = False) -> None:
+        if not locked:
+            with self._lock:
+                return self._release_agents(agents, locked=True)
+        for name, agent in agents.items():
+            self._idle_agents.setdefault(name, []).append(agent)
+    
+    def _task(self, spec: Mapping[str, Any], agent: Agent) -> Task:
+        options = {'async_execution': True} if spec.get("async_execution") else {}
+        return Task(
+            description=spec["description"],
+            agent=agent,
+            expected_output=spec.get("expected_output"),
+            **options
+        )
\ No newline at end of file
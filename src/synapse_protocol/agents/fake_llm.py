@@ -0,0 +1,150 @@
+"""
+Deterministic stand-in for the LLM, for offline profiling and load tests
+"""
+
+import asyncio
+import json
+import math
+import random
+import re
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, List, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+# Draws a response latency in seconds
+LatencyDistribution = Callable[[random.Random], float]
+
+_BATCH_LINE = re.compile(r"^(p\d+): (\{.*\})$", re.MULTILINE)
+_AMOUNT = re.compile(r"""["']?amount["']?\s*[:=]\s*["']?(-?\d+(?:\.\d+)?)""")
+
+def fixed_latency(seconds: float) -> LatencyDistribution:
+    """Every response takes ``seconds``."""
+    return lambda rng: seconds
+
+def uniform_latency(low: float, high: float) -> LatencyDistribution:
+    """Responses take between ``low`` and ``high`` seconds."""
+    return lambda rng: rng.uniform(low, high)
+
+def lognormal_latency(median: float, sigma: float = 0.5) -> LatencyDistribution:
+    """Long-tailed latencies around ``median`` seconds, like a hosted LLM's."""
+    return lambda rng: median * math.exp(rng.gauss(0.0, sigma))
+
+def exponential_latency(mean: float) -> LatencyDistribution:
+    """Exponentially distributed latencies with the given mean."""
+    return lambda rng: rng.expovariate(1.0 / mean)
+
+class FakeLLM(BaseChatModel):
+    """
+    Chat model answering with canned risk verdicts after a simulated delay.
+    
+    The verdict depends only on the prompt: a prompt with batched payment
+    lines (``p0: {...}``, see ``RiskBatcher``) gets a JSON array of verdicts,
+    any other prompt a single verdict for the first amount it mentions.
+    Amounts above ``high_risk_above`` are high risk, above
+    ``medium_risk_above`` medium, anything else low. Answers use the
+    ``Final Answer:`` form agent executors parse. The delay is drawn from
+    ``latency`` with a generator seeded by ``seed`` and the prompt, so runs
+    are reproducible regardless of the order concurrent calls arrive in.
+    """
+    
+    latency: Any = 0.0
+    seed: int = 0
+    medium_risk_above: float = 1000.0
+    high_risk_above: float = 10000.0
+    
+    def __init__(self, **kwargs: Any):
+        """
+        Initialize the model.
+        
+        Args:
+            latency: Seconds per response, or a distribution such as
+                ``lognormal_latency(1.5)``
+            seed: Seed of the latency draws
+            medium_risk_above: Amounts above this get a medium risk verdict
+            high_risk_above: Amounts above this get a high risk verdict
+        """
+        super().__init__(**kwargs)
+        # Call counters live outside the model's declared fields
+        object.__setattr__(self, "_counters", {"calls": 0, "prompt_chars": 0, "busy_seconds": 0.0})
+        object.__setattr__(self, "_counter_lock", threading.Lock())
+    
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+    
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"seed": self.seed, "medium_risk_above": self.medium_risk_above,
+                "high_risk_above": self.high_risk_above}
+    
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        prompt = _prompt_text(messages)
+        delay = self._delay(prompt)
+        time.sleep(delay)
+        return self._result(prompt, delay)
+    
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        prompt = _prompt_text(messages)
+        delay = self._delay(prompt)
+        await asyncio.sleep(delay)
+        return self._result(prompt, delay)
+    
+    def answer(self, prompt: str) -> str:
+        """The response text for a prompt, without the delay."""
+        lines = _BATCH_LINE.findall(prompt)
+        if lines:
+            verdicts = []
+            for ref, payment in lines:
+                try:
+                    amount = float(json.loads(payment).get("amount", 0))
+                except (TypeError, ValueError, AttributeError):
+                    amount = 0.0
+                verdicts.append(dict(self.verdict(amount), ref=ref))
+            answer = json.dumps(verdicts)
+        else:
+            match = _AMOUNT.search(prompt)
+            answer = json.dumps(self.verdict(float(match.group(1)) if match else 0.0))
+        return f"Thought: I now know the final answer\nFinal Answer: {answer}"
+    
+    def verdict(self, amount: float) -> Dict[str, Any]:
+        """The canned verdict for a payment amount."""
+        if amount > self.high_risk_above:
+            level, decision = "high", "reject"
+        elif amount > self.medium_risk_above:
+            level, decision = "medium", "review"
+        else:
+            level, decision = "low", "approve"
+        return {"risk_level": level, "decision": decision, "reason": f"amount {amount:g}"}
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get the number of calls, prompt characters and simulated busy time."""
+        with self._counter_lock:
+            return dict(self._counters)
+    
+    def reset_stats(self) -> None:
+        """Zero the call counters."""
+        with self._counter_lock:
+            self._counters.update(calls=0, prompt_chars=0, busy_seconds=0.0)
+    
+    def _delay(self, prompt: str) -> float:
+        latency = self.latency
+        if callable(latency):
+            latency = latency(random.Random(self.seed ^ zlib.crc32(prompt.encode("utf-8"))))
+        return max(0.0, float(latency))
+    
+    def _result(self, prompt: str, delay: float) -> ChatResult:
+        with self._counter_lock:
+            self._counters["calls"] += 1
+            self._counters["prompt_chars"] += len(prompt)
+            self._counters["busy_seconds"] += delay
+        message = AIMessage(content=self.answer(prompt))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+def _prompt_text(messages: List[BaseMessage]) -> str:
+    return "\n".join(str(message.content) for message in messages)
\ No newline at end of file
@@ -0,0 +1,253 @@
+"""
+Deterministic rules pre-screen run ahead of the risk-assessment crew
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+APPROVE = "approve"
+REJECT = "reject"
+ESCALATE = "escalate"
+
+# Outcome and reason of every rule, in the order the rules are checked
+_RULES: Tuple[Tuple[str, str], ...] = (
+    (ESCALATE, "ambiguous"),
+    (REJECT, "invalid_amount"),
+    (REJECT, "currency_not_allowed"),
+    (REJECT, "denylisted_counterparty"),
+    (REJECT, "amount_above_limit"),
+    (ESCALATE, "velocity_exceeded"),
+    (APPROVE, "amount_below_threshold"),
+    (APPROVE, "allowlisted_counterparties")
+)
+_RISK_LEVELS = {APPROVE: "low", REJECT: "high"}
+
+class RiskPrescreen:
+    """
+    Rules and thresholds that decide clear-cut payments without the LLM crew.
+    
+    A batch of payments is checked at once: invalid amounts, currencies
+    outside ``allowed_currencies``, denylisted counterparties and amounts
+    above ``reject_above`` are rejected; amounts up to ``approve_below``, or
+    up to ``allowlist_limit`` between two allowlisted accounts, are approved
+    unless the sender exceeds its velocity limits; everything else is
+    escalated to the risk crew. A batch is decided in one pass over the
+    payments, at a few microseconds per payment.
+    """
+    
+    def __init__(
+        self,
+        approve_below: float = 100.0,
+        reject_above: float = 100000.0,
+        allowlist: Optional[Iterable[str]] = None,
+        denylist: Optional[Iterable[str]] = None,
+        allowed_currencies: Optional[Iterable[str]] = ("XRP",),
+        allowlist_limit: float = 10000.0,
+        velocity_window: float = 3600.0,
+        max_payments_per_window: int = 20,
+        max_amount_per_window: float = 50000.0,
+        clock: Callable[[], float] = time.time
+    ):
+        """
+        Initialize the pre-screen.
+        
+        Args:
+            approve_below: Amounts up to this are approved
+            reject_above: Amounts above this are rejected
+            allowlist: Trusted accounts
+            denylist: Accounts whose payments are rejected, as sender or receiver
+            allowed_currencies: Accepted currency codes, None to accept any
+            allowlist_limit: Amounts up to this are approved between two
+                allowlisted accounts
+            velocity_window: Seconds over which a sender's payments are counted
+            max_payments_per_window: Payments a sender may make in the window
+                before its payments are escalated
+            max_amount_per_window: Amount a sender may send in the window
+                before its payments are escalated
+            clock: Time source for the velocity window
+        """
+        self.approve_below = approve_below
+        self.reject_above = reject_above
+        self.allowlist = frozenset(allowlist or ())
+        self.denylist = frozenset(denylist or ())
+        self.allowed_currencies = (
+            frozenset(c.upper() for c in allowed_currencies) if allowed_currencies is not None else None
+        )
+        self.allowlist_limit = allowlist_limit
+        self.velocity_window = velocity_window
+        self.max_payments_per_window = max_payments_per_window
+        self.max_amount_per_window = max_amount_per_window
+        self.clock = clock
+        self.screened = 0
+        self.approved = 0
+        self.rejected = 0
+        self.escalated = 0
+        self.screen_seconds = 0.0
+        self._history: Dict[str, Deque[Tuple[float, float]]] = {}
+        self._totals: Dict[str, float] = {}
+        self._last_sweep = 0.0
+        self._lock = threading.Lock()
+    
+    def screen(self, payments: Sequence[Mapping[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Decide a batch of payments.
+        
+        Every payment with a valid amount counts towards its sender's
+        velocity, in batch order; payments rejected for an invalid amount do
+        not, since they can never be sent.
+        
+        Args:
+            payments: Payment data with sender_account, receiver_account,
+                amount and currency
+        
+        Returns:
+            One entry per payment: a decision with ``decision``,
+            ``risk_level``, ``reason`` and ``source``, or None if the payment
+            needs the risk crew
+        """
+        if not payments:
+            return []
+        start = time.perf_counter()
+        senders = [str(p.get("sender_account", "")).strip() for p in payments]
+        receivers = [str(p.get("receiver_account", "")).strip() for p in payments]
+        amounts = [_amount(p.get("amount")) for p in payments]
+        flags = [self._flags(p, sender, receiver) for p, sender, receiver in zip(payments, senders, receivers)]
+        with self._lock:
+            now = self.clock()
+            prior_counts, prior_totals = self._prior_velocity(senders, now)
+            codes = self._rules(senders, amounts, flags, prior_counts, prior_totals)
+            self._record(senders, amounts, now)
+            
+            results: List[Optional[Dict[str, Any]]] = []
+            for code in codes:
+                outcome, reason = _RULES[code]
+                if outcome == ESCALATE:
+                    self.escalated += 1
+                    results.append(None)
+                    continue
+                if outcome == APPROVE:
+                    self.approved += 1
+                else:
+                    self.rejected += 1
+                results.append({
+                    "decision": outcome,
+                    "risk_level": _RISK_LEVELS[outcome],
+                    "reason": reason,
+                    "source": "prescreen"
+                })
+            self.screened += len(codes)
+            self.screen_seconds += time.perf_counter() - start
+        return results
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get decision counts, the escalated fraction and time spent screening."""
+        with self._lock:
+            screened = self.screened
+            return {
+                "screened": screened,
+                "approved": self.approved,
+                "rejected": self.rejected,
+                "escalated": self.escalated,
+                "escalation_rate": self.escalated / screened if screened else 0.0,
+                "screen_seconds": self.screen_seconds,
+                "per_payment_us": self.screen_seconds / screened * 1e6 if screened else 0.0
+            }
+    
+    def reset_velocity(self, account: Optional[str] = None) -> None:
+        """Forget the payment history of one sender, or of all senders."""
+        with self._lock:
+            if account is None:
+                self._history.clear()
+                self._totals.clear()
+            else:
+                self._history.pop(account, None)
+                self._totals.pop(account, None)
+    
+    def _flags(self, payment: Mapping[str, Any], sender: str, receiver: str) -> int:
+        """Set-membership checks: 1 currency not allowed, 2 denylisted, 4 both allowlisted."""
+        flags = 0
+        if self.allowed_currencies is not None:
+            if str(payment.get("currency", "XRP")).strip().upper() not in self.allowed_currencies:
+                flags |= 1
+        if sender in self.denylist or receiver in self.denylist:
+            flags |= 2
+        if sender in self.allowlist and receiver in self.allowlist:
+            flags |= 4
+        return flags
+    
+    def _prior_velocity(self, senders: List[str], now: float) -> Tuple[Dict[str, int], Dict[str, float]]:
+        """Payments and amount of each sender within the window before this batch."""
+        cutoff = now - self.velocity_window
+        if now - self._last_sweep > self.velocity_window:
+            # Drop senders that have not paid within the window
+            for sender in [s for s, history in self._history.items() if history[-1][0] <= cutoff]:
+                del self._history[sender]
+                del self._totals[sender]
+            self._last_sweep = now
+        counts: Dict[str, int] = {}
+        totals: Dict[str, float] = {}
+        for sender in set(senders):
+            history = self._history.get(sender)
+            if history:
+                while history and history[0][0] <= cutoff:
+                    self._totals[sender] -= history.popleft()[1]
+                counts[sender] = len(history)
+                totals[sender] = self._totals[sender] if history else 0.0
+        return counts, totals
+    
+    def _record(self, senders: List[str], amounts: List[float], now: float) -> None:
+        for sender, amount in zip(senders, amounts):
+            if not amount > 0:
+                continue
+            history = self._history.get(sender)
+            if history is None:
+                history = self._history[sender] = deque()
+                self._totals[sender] = 0.0
+            history.append((now, amount))
+            self._totals[sender] += amount
+    
+    def _rules(
+        self,
+        senders: List[str],
+        amounts: List[float],
+        flags: List[int],
+        prior_counts: Dict[str, int],
+        prior_totals: Dict[str, float]
+    ) -> List[int]:
+        """Index into ``_RULES`` of the first rule that applies to each payment."""
+        counts = dict(prior_counts)
+        totals = dict(prior_totals)
+        codes = []
+        for sender, amount, flag in zip(senders, amounts, flags):
+            if not amount > 0:
+                codes.append(1)
+                continue
+            counts[sender] = counts.get(sender, 0) + 1
+            totals[sender] = totals.get(sender, 0.0) + amount
+            if flag & 1:
+                code = 2
+            elif flag & 2:
+                code = 3
+            elif amount > self.reject_above:
+                code = 4
+            elif counts[sender] > self.max_payments_per_window or totals[sender] > self.max_amount_per_window:
+                code = 5
+            elif amount <= self.approve_below:
+                code = 6
+            elif flag & 4 and amount <= self.allowlist_limit:
+                code = 7
+            else:
+                code = 0
+            codes.append(code)
+        return codes
+
+def _amount(value: Any) -> float:
+    """Payment amount as a float, NaN if it is missing or not a finite number."""
+    try:
+        amount = float(value)
+    except (TypeError, ValueError):
+        return math.nan
+    return amount if math.isfinite(amount) else math.nan
\ No newline at end of file
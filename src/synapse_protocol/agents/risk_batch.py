@@ -0,0 +1,233 @@
+"""
+Packing payments into batched risk-assessment prompts
+"""
+
+import json
+import math
+import re
+import threading
+from typing import Any, Dict, List, Mapping, Sequence
+
+RISK_LEVELS = ("low", "medium", "high")
+DECISIONS = ("approve", "review", "reject")
+# Decision implied by a risk level when a verdict leaves it out
+_DEFAULT_DECISIONS = {"low": "approve", "medium": "review", "high": "reject"}
+# Payment fields shown to the agents
+DEFAULT_FIELDS = ("sender_account", "receiver_account", "amount", "currency", "description")
+
+_FENCE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL)
+
+class RiskBatcher:
+    """
+    Splits payments into batches that fit one risk crew prompt.
+    
+    Each payment becomes one line, ``<ref>: <compact JSON>``, and the crew is
+    asked for a JSON array of verdicts keyed by ``ref``. A batch holds at
+    most ``batch_size`` payments and ``max_prompt_tokens`` estimated tokens of
+    payment lines. ``batch_size`` adapts to what the model handles: it is
+    halved whenever a batch fails or comes back with fewer than half of its
+    payments resolved, e.g. because the response was cut off at the token
+    limit, and grows by one after every fully resolved batch, up to
+    ``max_batch_size``.
+    """
+    
+    def __init__(
+        self,
+        max_batch_size: int = 25,
+        min_batch_size: int = 1,
+        max_prompt_tokens: int = 3000,
+        chars_per_token: float = 4.0,
+        max_field_chars: int = 200,
+        fields: Sequence[str] = DEFAULT_FIELDS
+    ):
+        """
+        Initialize the batcher.
+        
+        Args:
+            max_batch_size: Most payments per batch
+            min_batch_size: Smallest batch size the adaptation shrinks to
+            max_prompt_tokens: Token budget for the payment lines of a batch
+            chars_per_token: Characters per token used to estimate prompt size
+            max_field_chars: Longer field values are truncated
+            fields: Payment fields included in the prompt
+        """
+        if not 1 <= min_batch_size <= max_batch_size:
+            raise ValueError("Batch sizes must satisfy 1 <= min_batch_size <= max_batch_size")
+        self.max_batch_size = max_batch_size
+        self.min_batch_size = min_batch_size
+        self.max_prompt_tokens = max_prompt_tokens
+        self.chars_per_token = chars_per_token
+        self.max_field_chars = max_field_chars
+        self.fields = tuple(fields)
+        self.batch_size = max_batch_size
+        self.batches = 0
+        self.failed_batches = 0
+        self.payments = 0
+        self.resolved = 0
+        self.fallbacks = 0
+        self.crew_executions = 0
+        self.llm_calls = 0
+        self.assessments = 0
+        self.assessment_seconds = 0.0
+        self._lock = threading.Lock()
+    
+    def line(self, ref: str, payment: Mapping[str, Any]) -> str:
+        """Render one payment as a prompt line."""
+        shown = {}
+        for field in self.fields:
+            value = payment.get(field)
+            if value is None:
+                continue
+            if isinstance(value, str) and len(value) > self.max_field_chars:
+                value = value[:self.max_field_chars] + "..."
+            shown[field] = value
+        return f"{ref}: {json.dumps(shown, separators=(',', ':'), default=str)}"
+    
+    def estimate_tokens(self, text: str) -> int:
+        """Estimate the number of tokens of a text."""
+        return math.ceil(len(text) / self.chars_per_token)
+    
+    def pack(self, payments: Sequence[Mapping[str, Any]]) -> List[List[int]]:
+        """
+        Split payments into batches.
+        
+        Args:
+            payments: Payments to assess
+        
+        Returns:
+            Batches of indices into ``payments``; a payment whose line alone
+            exceeds the token budget gets a batch of its own
+        """
+        batches: List[List[int]] = []
+        batch: List[int] = []
+        tokens = 0
+        size = self.batch_size
+        for i, payment in enumerate(payments):
+            cost = self.estimate_tokens(self.line(f"p{i}", payment)) + 1
+            if batch and (len(batch) >= size or tokens + cost > self.max_prompt_tokens):
+                batches.append(batch)
+                batch, tokens = [], 0
+            batch.append(i)
+            tokens += cost
+        if batch:
+            batches.append(batch)
+        return batches
+    
+    def render(self, payments: Sequence[Mapping[str, Any]], refs: Sequence[str]) -> str:
+        """Render a batch as the payment lines of the prompt."""
+        return "\n".join(self.line(ref, payment) for ref, payment in zip(refs, payments))
+    
+    def parse(self, output: Any, refs: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Extract per-payment verdicts from a crew's output.
+        
+        Args:
+            output: Crew result: text, an object with a ``raw`` attribute,
+                or already decoded JSON
+            refs: References of the payments in the batch
+        
+        Returns:
+            Verdicts by reference, with ``risk_level``, ``decision`` and
+            ``reason``; references without a usable verdict are left out
+        """
+        items = _verdict_items(output)
+        wanted = set(refs)
+        verdicts: Dict[str, Dict[str, Any]] = {}
+        for item in items:
+            if not isinstance(item, Mapping):
+                continue
+            ref = str(item.get("ref", "")).strip()
+            level = str(item.get("risk_level", "")).strip().lower()
+            if ref not in wanted or ref in verdicts or level not in RISK_LEVELS:
+                continue
+            decision = str(item.get("decision", "")).strip().lower()
+            verdicts[ref] = {
+                "risk_level": level,
+                "decision": decision if decision in DECISIONS else _DEFAULT_DECISIONS[level],
+                "reason": str(item.get("reason", "")),
+                "source": "batch"
+            }
+        return verdicts
+    
+    def record_batch(self, size: int, resolved: int, failed: bool = False, llm_calls: int = 0) -> None:
+        """
+        Record a batch execution and adapt the batch size.
+        
+        Args:
+            size: Payments in the batch
+            resolved: Payments the batch response resolved
+            failed: Whether the crew execution failed
+            llm_calls: LLM calls the execution made
+        """
+        with self._lock:
+            self.batches += 1
+            self.failed_batches += failed
+            self.payments += size
+            self.resolved += resolved
+            self.crew_executions += 1
+            self.llm_calls += llm_calls
+            if failed or resolved * 2 < size:
+                self.batch_size = max(self.min_batch_size, self.batch_size // 2)
+            elif self.batch_size < self.max_batch_size:
+                self.batch_size += 1
+    
+    def record_fallback(self, llm_calls: int = 0) -> None:
+        """Record a payment assessed individually after its batch left it unresolved."""
+        with self._lock:
+            self.fallbacks += 1
+            self.crew_executions += 1
+            self.llm_calls += llm_calls
+    
+    def record_assessment(self, seconds: float) -> None:
+        """Record the end-to-end time of one batched assessment call."""
+        with self._lock:
+            self.assessments += 1
+            self.assessment_seconds += seconds
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get batch, fallback and LLM call counts and latency."""
+        with self._lock:
+            payments = self.payments
+            return {
+                "batch_size": self.batch_size,
+                "batches": self.batches,
+                "failed_batches": self.failed_batches,
+                "payments": payments,
+                "resolved_in_batch": self.resolved,
+                "fallbacks": self.fallbacks,
+                "avg_batch_size": payments / self.batches if self.batches else 0.0,
+                "crew_executions": self.crew_executions,
+                "llm_calls": self.llm_calls,
+                "llm_calls_per_payment": self.llm_calls / payments if payments else 0.0,
+                "assessments": self.assessments,
+                "avg_assessment_seconds": (
+                    self.assessment_seconds / self.assessments if self.assessments else 0.0
+                )
+            }
+
+def _verdict_items(output: Any) -> List[Any]:
+    """Find the list of verdicts in a crew's output."""
+    if isinstance(output, Mapping):
+        for key in ("verdicts", "payments", "results"):
+            if isinstance(output.get(key), list):
+                return output[key]
+        return []
+    if isinstance(output, list):
+        return output
+    text = getattr(output, "raw", None)
+    if not isinstance(text, str):
+        text = str(output)
+    fenced = _FENCE.search(text)
+    candidates = [fenced.group(1)] if fenced else []
+    start, end = text.find("["), text.rfind("]")
+    if 0 <= start < end:
+        candidates.append(text[start:end + 1])
+    candidates.append(text)
+    for candidate in candidates:
+        try:
+            decoded = json.loads(candidate)
+        except ValueError:
+            continue
+        if isinstance(decoded, (list, Mapping)):
+            return _verdict_items(decoded)
+    return []
\ No newline at end of file
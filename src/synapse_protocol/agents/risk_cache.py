@@ -0,0 +1,112 @@
+"""
+Memoization of risk-assessment decisions
+"""
+
+import threading
+from bisect import bisect_right
+from typing import Any, Dict, Hashable, Mapping, Optional, Sequence, Tuple
+from ..payments.cache import TTLCache
+
+# Upper bounds of the amount bands payments are grouped into
+DEFAULT_AMOUNT_BUCKETS = (10, 50, 100, 500, 1000, 5000, 10000, 50000, 100000)
+
+class RiskDecisionCache:
+    """
+    Caches risk decisions by a normalized feature tuple of the payment.
+    
+    Repeat payments between the same counterparties, in the same currency
+    and amount band and under the same policy version, share one decision,
+    so only the first of them runs the risk-assessment crew. Entries expire
+    after ``ttl`` seconds, the least recently used entry is evicted once the
+    cache is full, and decisions can be invalidated per account. Every hit is
+    an LLM crew execution saved.
+    """
+    
+    def __init__(
+        self,
+        maxsize: int = 10000,
+        ttl: Optional[float] = 3600.0,
+        amount_buckets: Sequence[float] = DEFAULT_AMOUNT_BUCKETS
+    ):
+        """
+        Initialize the cache.
+        
+        Args:
+            maxsize: Maximum number of cached decisions
+            ttl: Seconds a decision stays valid, or None for no expiry
+            amount_buckets: Ascending upper bounds of the amount bands
+        """
+        self.amount_buckets = tuple(sorted(amount_buckets))
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._cache)
+    
+    def features(self, payment: Mapping[str, Any], policy_version: Hashable) -> Tuple:
+        """
+        Build the cache key of a payment.
+        
+        Args:
+            payment: Payment data with sender_account, receiver_account,
+                amount and currency
+            policy_version: Version of the risk policy the decision is made under
+        
+        Returns:
+            (sender, receiver, currency, amount bucket, policy version)
+        """
+        amount = payment.get("amount")
+        try:
+            bucket = bisect_right(self.amount_buckets, float(amount)) if amount is not None else None
+        except (TypeError, ValueError):
+            bucket = None
+        return (
+            str(payment.get("sender_account", "")).strip(),
+            str(payment.get("receiver_account", "")).strip(),
+            str(payment.get("currency", "XRP")).strip().upper(),
+            bucket,
+            policy_version
+        )
+    
+    def get(self, key: Tuple) -> Optional[Any]:
+        """Get the cached decision for a key, None if there is none."""
+        with self._lock:
+            return self._cache.get(key)
+    
+    def set(self, key: Tuple, decision: Any) -> None:
+        """Cache a decision."""
+        with self._lock:
+            self._cache.set(key, decision)
+    
+    def invalidate(self, account: Optional[str] = None, policy_version: Optional[Hashable] = None) -> int:
+        """
+        Remove cached decisions.
+        
+        Args:
+            account: Only remove decisions where this account is the sender
+                or the receiver
+            policy_version: Only remove decisions made under this policy version
+        
+        Returns:
+            Number of decisions removed
+        """
+        with self._lock:
+            if account is None and policy_version is None:
+                removed = len(self._cache)
+                self._cache.clear()
+                return removed
+            keys = [
+                key for key, _ in self._cache.items()
+                if (account is None or account in (key[0], key[1]))
+                and (policy_version is None or key[4] == policy_version)
+            ]
+            for key in keys:
+                self._cache.invalidate(key)
+        return len(keys)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get cache statistics; ``llm_calls_saved`` counts hits."""
+        with self._lock:
+            stats = self._cache.stats()
+        stats["llm_calls_saved"] = stats["hits"]
+        return stats
\ No newline at end of file
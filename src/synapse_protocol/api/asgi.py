@@ -0,0 +1,263 @@
+"""
+ASGI application serving the payment API on a native asyncio event loop
+"""
+
+import inspect
+import json
+import re
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Pattern, Tuple
+from urllib.parse import parse_qs
+from ..payments.core import PaymentProtocol
+from ..payments.exceptions import PaymentError, ValidationError, PaymentNotFoundError
+from ..payments.types import AccountBalance
+from ..serialization import Serializer
+
+Handler = Callable[["Request"], Awaitable[Tuple[int, Any]]]
+
+CORS_HEADERS = [
+    (b"access-control-allow-origin", b"*"),
+    (b"access-control-allow-methods", b"GET, POST, OPTIONS"),
+    (b"access-control-allow-headers", b"Content-Type, Authorization, X-Socket-Id")
+]
+
+class Request:
+    """An HTTP request as seen by the payment API handlers."""
+    
+    __slots__ = ("method", "path", "path_params", "query", "headers", "body")
+    
+    def __init__(self, method: str, path: str, path_params: Dict[str, str], query: Dict[str, List[str]],
+                 headers: Dict[str, str], body: bytes):
+        self.method = method
+        self.path = path
+        self.path_params = path_params
+        self.query = query
+        self.headers = headers
+        self.body = body
+    
+    def json(self) -> Any:
+        """Decode the request body as JSON."""
+        try:
+            return json.loads(self.body) if self.body else None
+        except ValueError as e:
+            raise ValidationError(f"Invalid JSON body: {e}")
+    
+    def arg(self, name: str, default: Any = None, type: Callable[[str], Any] = str) -> Any:
+        """Get a query string argument, falling back to the default if missing or invalid."""
+        values = self.query.get(name)
+        if not values:
+            return default
+        try:
+            return type(values[0])
+        except ValueError:
+            return default
+
+class PaymentApi:
+    """
+    Minimal ASGI router serving the endpoints of ``api.routes``.
+    
+    The payment protocol, its connection pools and caches are created once
+    and shared by every request on the server's event loop, instead of being
+    driven through a fresh loop per request as under Flask.
+    """
+    
+    def __init__(
+        self,
+        payment_protocol: PaymentProtocol,
+        websocket_manager: Any,
+        serializer: Serializer,
+        url_prefix: str = "/api/v1/payments",
+        on_startup: Optional[Callable[[], Any]] = None,
+        on_shutdown: Optional[Callable[[], Any]] = None
+    ):
+        """
+        Initialize the API.
+        
+        Args:
+            payment_protocol: Payment protocol serving the requests
+            websocket_manager: AsyncWebSocketManager used for real-time updates
+            serializer: Serializer for response bodies
+            url_prefix: Path prefix of the payment endpoints
+            on_startup: Function or coroutine function run at lifespan startup
+            on_shutdown: Function or coroutine function run at lifespan shutdown
+        """
+        self.payment_protocol = payment_protocol
+        self.websocket_manager = websocket_manager
+        self.serializer = serializer
+        self.on_startup = on_startup
+        self.on_shutdown = on_shutdown
+        self.routes: List[Tuple[str, Pattern, Handler]] = []
+        for method, path, handler in (
+            ("POST", "/create", self.create_payment),
+            ("POST", "/batch", self.create_payments),
+            ("GET", "/<payment_id>/status", self.get_payment_status),
+            ("POST", "/<payment_id>/cancel", self.cancel_payment),
+            ("GET", "/balance/<account_id>", self.get_balance),
+            ("GET", "/verify/<transaction_hash>", self.verify_transaction),
+            ("GET", "/account/<account_id>/history", self.get_payment_history)
+        ):
+            self.add_route(method, url_prefix + path, handler)
+    
+    def add_route(self, method: str, path: str, handler: Handler) -> None:
+        """
+        Register a handler; ``<name>`` path segments become path parameters.
+        
+        Args:
+            method: HTTP method
+            path: Path pattern
+            handler: Coroutine function returning ``(status, body object)``
+        """
+        pattern = re.compile("^" + re.sub(r"<(\w+)>", r"(?P<\1>[^/]+)", path) + "$")
+        self.routes.append((method, pattern, handler))
+    
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        
+        method = scope["method"]
+        if method == "OPTIONS":
+            await self._respond(send, 204, b"")
+            return
+        
+        path = scope["path"]
+        handler = None
+        path_allowed = False
+        for route_method, pattern, route_handler in self.routes:
+            match = pattern.match(path)
+            if match:
+                path_allowed = True
+                if route_method == method:
+                    handler = route_handler
+                    break
+        if handler is None:
+            status = 405 if path_allowed else 404
+            await self._respond(send, status, self.serializer.dumps({"error": "Method not allowed" if path_allowed else "Not found"}))
+            return
+        
+        body = b""
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+        
+        request = Request(
+            method,
+            path,
+            match.groupdict(),
+            parse_qs(scope.get("query_string", b"").decode("latin-1")),
+            {name.decode("latin-1"): value.decode("latin-1") for name, value in scope.get("headers", [])},
+            body
+        )
+        status, payload = await self._dispatch(handler, request)
+        await self._respond(send, status, self.serializer.dumps(payload))
+    
+    async def _dispatch(self, handler: Handler, request: Request) -> Tuple[int, Any]:
+        """
+        Run a handler and map payment errors to HTTP responses.
+        
+        Errors are emitted only to the requesting client's socket, identified
+        by the ``X-Socket-Id`` header.
+        """
+        room = request.headers.get("x-socket-id")
+        try:
+            return await handler(request)
+        except ValidationError as e:
+            await self.websocket_manager.emit_error('validation_error', str(e), room=room)
+            return 400, {'error': str(e)}
+        except PaymentNotFoundError as e:
+            return 404, {'error': str(e)}
+        except PaymentError as e:
+            await self.websocket_manager.emit_error('payment_error', str(e), room=room)
+            return 400, {'error': str(e)}
+        except Exception as e:
+            await self.websocket_manager.emit_error('server_error', str(e), room=room)
+            return 500, {'error': 'Internal server error'}
+    
+    async def _respond(self, send: Callable, status: int, body: bytes) -> None:
+        headers = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("ascii"))
+        ]
+        await send({"type": "http.response.start", "status": status, "headers": headers + CORS_HEADERS})
+        await send({"type": "http.response.body", "body": body})
+    
+    async def _lifespan(self, receive: Callable, send: Callable) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                hook, done = self.on_startup, "lifespan.startup"
+            elif message["type"] == "lifespan.shutdown":
+                hook, done = self.on_shutdown, "lifespan.shutdown"
+            else:
+                continue
+            try:
+                if hook is not None:
+                    result = hook()
+                    if inspect.isawaitable(result):
+                        await result
+            except Exception as e:
+                await send({"type": f"{done}.failed", "message": str(e)})
+                return
+            await send({"type": f"{done}.complete"})
+            if done == "lifespan.shutdown":
+                return
+    
+    async def create_payment(self, request: Request) -> Tuple[int, Any]:
+        """Create a new payment."""
+        payment = await self.payment_protocol.initiate_payment(request.json())
+        await self.websocket_manager.emit_payment_update(payment.payment_id, payment.status, payment)
+        return 201, payment
+    
+    async def create_payments(self, request: Request) -> Tuple[int, Any]:
+        """Create a batch of payments."""
+        data = request.json()
+        if isinstance(data, list):
+            batch, max_in_flight = data, None
+        elif isinstance(data, dict) and 'payments' in data:
+            batch, max_in_flight = data['payments'], data.get('max_in_flight')
+        else:
+            raise ValidationError("Request body must be a list of payments or an object with a payments list")
+        payments = await self.payment_protocol.initiate_payments(batch, max_in_flight=max_in_flight)
+        for payment in payments:
+            await self.websocket_manager.emit_payment_update(payment.payment_id, payment.status, payment)
+        return 201, payments
+    
+    async def get_payment_status(self, request: Request) -> Tuple[int, Any]:
+        """Get payment status."""
+        payment_id = request.path_params['payment_id']
+        payment = await self.payment_protocol.get_payment(payment_id)
+        await self.websocket_manager.emit_payment_update(payment_id, payment.status, payment)
+        return 200, payment
+    
+    async def cancel_payment(self, request: Request) -> Tuple[int, Any]:
+        """Cancel a payment."""
+        payment_id = request.path_params['payment_id']
+        result = await self.payment_protocol.cancel_payment(payment_id)
+        await self.websocket_manager.emit_payment_update(payment_id, result.status, result)
+        return 200, result
+    
+    async def get_balance(self, request: Request) -> Tuple[int, Any]:
+        """Get account balance."""
+        account_id = request.path_params['account_id']
+        balance = await self.payment_protocol.get_balance(account_id)
+        await self.websocket_manager.emit_balance_update(account_id, balance, 'XRP')
+        return 200, AccountBalance(account_id, 'XRP', balance)
+    
+    async def verify_transaction(self, request: Request) -> Tuple[int, Any]:
+        """Verify a transaction."""
+        transaction_hash = request.path_params['transaction_hash']
+        result = await self.payment_protocol.verify_transaction(transaction_hash)
+        return 200, {'transaction_hash': transaction_hash, 'verified': result}
+    
+    async def get_payment_history(self, request: Request) -> Tuple[int, Any]:
+        """Get the payment history of an account."""
+        payments = await self.payment_protocol.get_payment_history(
+            request.path_params['account_id'],
+            direction=request.arg('direction', 'sent'),
+            limit=request.arg('limit', 100, type=int),
+            offset=request.arg('offset', 0, type=int)
+        )
+        return 200, payments
\ No newline at end of file
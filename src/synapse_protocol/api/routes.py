@@ -4,10 +4,30 @@ API routes for payment operations
 
 from flask import Blueprint, request, jsonify, current_app
 from ..payments.core import PaymentProtocol
-from ..payments.exceptions import PaymentError, ValidationError
+from ..payments.types import AccountBalance
+from ..payments.exceptions import PaymentError, ValidationError, PaymentNotFoundError
 
 payment_bp = Blueprint('payments', __name__, url_prefix='/api/v1/payments')
 
+# Header carrying the Socket.IO session id of the client making the request
+SOCKET_ID_HEADER = 'X-Socket-Id'
+
+def _emit_error(error_type, message):
+    """Emit an error to the requesting client's socket, if it sent its session id."""
+    current_app.websocket_manager.emit_error(
+        error_type,
+        message,
+        room=request.headers.get(SOCKET_ID_HEADER)
+    )
+
+def _json_response(obj, status=200):
+    """Build a JSON response with the application's compiled serializer."""
+    return current_app.response_class(
+        current_app.serializer.dumps(obj),
+        status=status,
+        mimetype='application/json'
+    )
+
 @payment_bp.route('/create', methods=['POST'])
 async def create_payment():
     """Create a new payment."""
@@ -17,41 +37,78 @@ async def create_payment():
         
         # Emit payment update
         current_app.websocket_manager.emit_payment_update(
-            payment.id,
+            payment.payment_id,
             payment.status,
-            payment.to_dict()
+            payment
+        )
+        
+        return _json_response(payment, 201)
+    except ValidationError as e:
+        _emit_error('validation_error', str(e))
+        return jsonify({'error': str(e)}), 400
+    except PaymentError as e:
+        _emit_error('payment_error', str(e))
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        _emit_error('server_error', str(e))
+        return jsonify({'error': 'Internal server error'}), 500
+
+@payment_bp.route('/batch', methods=['POST'])
+async def create_payments():
+    """Create a batch of payments."""
+    try:
+        data = request.get_json(silent=True)
+        if isinstance(data, list):
+            batch, max_in_flight = data, None
+        elif isinstance(data, dict) and 'payments' in data:
+            batch, max_in_flight = data['payments'], data.get('max_in_flight')
+        else:
+            raise ValidationError("Request body must be a list of payments or an object with a payments list")
+        payments = await current_app.payment_protocol.initiate_payments(
+            batch,
+            max_in_flight=max_in_flight
         )
         
-        return jsonify(payment.to_dict()), 201
+        # Emit payment updates
+        for payment in payments:
+            current_app.websocket_manager.emit_payment_update(
+                payment.payment_id,
+                payment.status,
+                payment
+            )
+            
+        return _json_response(payments, 201)
     except ValidationError as e:
-        current_app.websocket_manager.emit_error('validation_error', str(e))
+        _emit_error('validation_error', str(e))
         return jsonify({'error': str(e)}), 400
     except PaymentError as e:
-        current_app.websocket_manager.emit_error('payment_error', str(e))
+        _emit_error('payment_error', str(e))
         return jsonify({'error': str(e)}), 400
     except Exception as e:
-        current_app.websocket_manager.emit_error('server_error', str(e))
+        _emit_error('server_error', str(e))
         return jsonify({'error': 'Internal server error'}), 500
 
 @payment_bp.route('/<payment_id>/status', methods=['GET'])
 async def get_payment_status(payment_id):
     """Get payment status."""
     try:
-        status = await current_app.payment_protocol.get_payment_status(payment_id)
+        payment = await current_app.payment_protocol.get_payment(payment_id)
         
         # Emit payment update
         current_app.websocket_manager.emit_payment_update(
             payment_id,
-            status.status,
-            status.to_dict()
+            payment.status,
+            payment
         )
         
-        return jsonify(status.to_dict())
+        return _json_response(payment)
+    except PaymentNotFoundError as e:
+        return jsonify({'error': str(e)}), 404
     except PaymentError as e:
-        current_app.websocket_manager.emit_error('payment_error', str(e))
+        _emit_error('payment_error', str(e))
         return jsonify({'error': str(e)}), 400
     except Exception as e:
-        current_app.websocket_manager.emit_error('server_error', str(e))
+        _emit_error('server_error', str(e))
         return jsonify({'error': 'Internal server error'}), 500
 
 @payment_bp.route('/<payment_id>/cancel', methods=['POST'])
@@ -63,16 +120,18 @@ async def cancel_payment(payment_id):
         # Emit payment update
         current_app.websocket_manager.emit_payment_update(
             payment_id,
-            'CANCELLED',
-            result.to_dict()
+            result.status,
+            result
         )
         
-        return jsonify(result.to_dict())
+        return _json_response(result)
+    except PaymentNotFoundError as e:
+        return jsonify({'error': str(e)}), 404
     except PaymentError as e:
-        current_app.websocket_manager.emit_error('payment_error', str(e))
+        _emit_error('payment_error', str(e))
         return jsonify({'error': str(e)}), 400
     except Exception as e:
-        current_app.websocket_manager.emit_error('server_error', str(e))
+        _emit_error('server_error', str(e))
         return jsonify({'error': 'Internal server error'}), 500
 
 @payment_bp.route('/balance/<account_id>', methods=['GET'])
@@ -84,16 +143,16 @@ async def get_balance(account_id):
         # Emit balance update
         current_app.websocket_manager.emit_balance_update(
             account_id,
-            balance.amount,
-            balance.currency
+            balance,
+            'XRP'
         )
         
-        return jsonify(balance.to_dict())
+        return _json_response(AccountBalance(account_id, 'XRP', balance))
     except PaymentError as e:
-        current_app.websocket_manager.emit_error('payment_error', str(e))
+        _emit_error('payment_error', str(e))
         return jsonify({'error': str(e)}), 400
     except Exception as e:
-        current_app.websocket_manager.emit_error('server_error', str(e))
+        _emit_error('server_error', str(e))
         return jsonify({'error': 'Internal server error'}), 500
 
 @payment_bp.route('/verify/<transaction_hash>', methods=['GET'])
@@ -101,10 +160,27 @@ async def verify_transaction(transaction_hash):
     """Verify a transaction."""
     try:
         result = await current_app.payment_protocol.verify_transaction(transaction_hash)
-        return jsonify(result.to_dict())
+        return _json_response({'transaction_hash': transaction_hash, 'verified': result})
+    except PaymentError as e:
+        _emit_error('payment_error', str(e))
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        _emit_error('server_error', str(e))
+        return jsonify({'error': 'Internal server error'}), 500
+
+@payment_bp.route('/account/<account_id>/history', methods=['GET'])
+async def get_payment_history(account_id):
+    """Get the payment history of an account."""
+    try:
+        payments = await current_app.payment_protocol.get_payment_history(
+            account_id,
+            direction=request.args.get('direction', 'sent'),
+            limit=request.args.get('limit', 100, type=int),
+            offset=request.args.get('offset', 0, type=int)
+        )
+        return _json_response(payments)
     except PaymentError as e:
-        current_app.websocket_manager.emit_error('payment_error', str(e))
         return jsonify({'error': str(e)}), 400
     except Exception as e:
-        current_app.websocket_manager.emit_error('server_error', str(e))
-        return jsonify({'error': 'Internal server error'}), 500 
\ No newline at end of file
+        _emit_error('server_error', str(e))
+        return jsonify({'error': 'Internal server error'}), 500
\ No newline at end of file
@@ -2,13 +2,80 @@
 Main application module for Synapse Protocol
 """
 
+import logging
 import os
+from typing import Any, Dict
 from flask import Flask
 from flask_cors import CORS
 from .api.routes import payment_bp
 from .websocket import WebSocketManager
 from .payments.core import PaymentProtocol
+from .payments.xrp_pool import PooledXrpClient, wallet_signer
 from .payments.xrp_bridge import XrpPaymentBridge
+from .payments.confirmation import ConfirmationTracker
+from .payments.store import PaymentStore, SqlitePaymentStore
+from .serialization import Serializer
+
+def default_config() -> Dict[str, Any]:
+    """
+    Build the application configuration from environment variables.
+    
+    Returns:
+        Configuration dictionary
+    """
+    return dict(
+        SECRET_KEY=os.environ.get('SECRET_KEY', 'dev'),
+        API_KEY=os.environ.get('API_KEY'),
+        ENVIRONMENT=os.environ.get('ENVIRONMENT', 'sandbox'),
+        PAYMENT_STORE_PATH=os.environ.get('PAYMENT_STORE_PATH'),
+        XRPL_RPC_URLS=os.environ.get('XRPL_RPC_URLS', 'https://s.altnet.rippletest.net:51234').split(','),
+        XRPL_WS_URL=os.environ.get('XRPL_WS_URL'),
+        XRPL_WALLET_SEEDS=[seed for seed in os.environ.get('XRPL_WALLET_SEEDS', '').split(',') if seed],
+        JSON_DATETIME_FORMAT=os.environ.get('JSON_DATETIME_FORMAT', 'iso'),
+        SOCKETIO_EMIT_TICK=float(os.environ.get('SOCKETIO_EMIT_TICK', 0.005)),
+        SOCKETIO_MESSAGE_QUEUE=os.environ.get('SOCKETIO_MESSAGE_QUEUE'),
+        SOCKETIO_EMIT_QUEUE_SIZE=int(os.environ.get('SOCKETIO_EMIT_QUEUE_SIZE', 10000)),
+        SOCKETIO_EMIT_OVERFLOW=os.environ.get('SOCKETIO_EMIT_OVERFLOW', 'drop_oldest')
+    )
+
+def _create_payment_protocol(config: Dict[str, Any]) -> PaymentProtocol:
+    """
+    Create the payment protocol described by a configuration.
+    
+    Args:
+        config: Application configuration; XRP_CLIENT may hold a preconfigured
+            XRP client instead of XRPL_RPC_URLS, and XRPL_SIGNER a callable
+            signing transactions instead of the wallets in XRPL_WALLET_SEEDS
+    
+    Returns:
+        PaymentProtocol instance
+    """
+    ws_url = config.get('XRPL_WS_URL')
+    xrp_client = config.get('XRP_CLIENT')
+    if xrp_client is None:
+        signer = config.get('XRPL_SIGNER')
+        if signer is None and config.get('XRPL_WALLET_SEEDS'):
+            signer = wallet_signer(config['XRPL_WALLET_SEEDS'])
+        if signer is None:
+            logging.getLogger(__name__).warning(
+                "No XRPL signer configured: set XRPL_WALLET_SEEDS or XRPL_SIGNER to send payments"
+            )
+        # Without a confirmation tracker, the client itself waits for validation
+        xrp_client = PooledXrpClient(
+            config['XRPL_RPC_URLS'],
+            signer=signer,
+            wait_for_validation=not ws_url
+        )
+    if ws_url:
+        # Confirm payments from one ledger subscription instead of waiting per payment
+        xrp_client = XrpPaymentBridge(xrp_client, confirmation_tracker=ConfirmationTracker(ws_url))
+    store_path = config.get('PAYMENT_STORE_PATH')
+    return PaymentProtocol(
+        api_key=config.get('API_KEY'),
+        environment=config.get('ENVIRONMENT', 'sandbox'),
+        xrp_client=xrp_client,
+        payment_store=SqlitePaymentStore(store_path) if store_path else PaymentStore()
+    )
 
 def create_app(test_config=None):
     """
@@ -16,7 +83,7 @@ def create_app(test_config=None):
     
     Args:
         test_config: Test configuration dictionary
-        
+    
     Returns:
         Flask application instance
     """
@@ -24,27 +91,35 @@ def create_app(test_config=None):
     
     # Load configuration
     if test_config is None:
-        app.config.from_mapping(
-            SECRET_KEY=os.environ.get('SECRET_KEY', 'dev'),
-            API_KEY=os.environ.get('API_KEY'),
-            ENVIRONMENT=os.environ.get('ENVIRONMENT', 'sandbox')
-        )
+        app.config.from_mapping(default_config())
     else:
         app.config.update(test_config)
-        
+    
     # Initialize CORS
     CORS(app)
     
     # Initialize payment protocol
-    xrp_client = XrpPaymentBridge()  # Initialize with your XRP client configuration
-    payment_protocol = PaymentProtocol(
-        api_key=app.config['API_KEY'],
-        environment=app.config['ENVIRONMENT'],
-        xrp_client=xrp_client
-    )
+    payment_protocol = _create_payment_protocol(app.config)
+    
+    # Encode API responses and socket emits with compiled per-type encoders
+    serializer = Serializer(datetime_format=app.config.get('JSON_DATETIME_FORMAT', 'iso'))
     
     # Initialize WebSocket manager
-    websocket_manager = WebSocketManager(app)
+    websocket_manager = WebSocketManager(
+        app,
+        serializer=serializer,
+        emit_tick=app.config.get('SOCKETIO_EMIT_TICK', 0.005),
+        message_queue=app.config.get('SOCKETIO_MESSAGE_QUEUE'),
+        emit_queue_size=app.config.get('SOCKETIO_EMIT_QUEUE_SIZE', 10000),
+        emit_overflow=app.config.get('SOCKETIO_EMIT_OVERFLOW', 'drop_oldest')
+    )
+    payment_protocol.add_payment_listener(
+        lambda response: websocket_manager.emit_payment_update(
+            response.payment_id,
+            response.status,
+            response
+        )
+    )
     
     # Register blueprints
     app.register_blueprint(payment_bp)
@@ -52,9 +127,67 @@ def create_app(test_config=None):
     # Store instances in app context
     app.payment_protocol = payment_protocol
     app.websocket_manager = websocket_manager
+    app.serializer = serializer
     
     return app
 
+def create_asgi_app(test_config=None):
+    """
+    Create the application for native asyncio (ASGI) servers.
+    
+    Serves the same payment endpoints and Socket.IO events as ``create_app``
+    from a single event loop, so the payment protocol, its connection pools
+    and caches live for the life of the process. Run it with any ASGI server,
+    e.g. ``uvicorn --factory synapse_protocol.app:create_asgi_app``.
+    
+    Args:
+        test_config: Test configuration dictionary
+    
+    Returns:
+        ASGI application; the payment protocol, WebSocket manager and
+        serializer are available as attributes
+    """
+    import socketio
+    from .api.asgi import PaymentApi
+    from .websocket.async_manager import AsyncWebSocketManager
+    
+    config = default_config() if test_config is None else dict(test_config)
+    payment_protocol = _create_payment_protocol(config)
+    serializer = Serializer(datetime_format=config.get('JSON_DATETIME_FORMAT', 'iso'))
+    websocket_manager = AsyncWebSocketManager(
+        serializer=serializer,
+        emit_tick=config.get('SOCKETIO_EMIT_TICK', 0.005),
+        message_queue=config.get('SOCKETIO_MESSAGE_QUEUE'),
+        emit_queue_size=config.get('SOCKETIO_EMIT_QUEUE_SIZE', 10000),
+        emit_overflow=config.get('SOCKETIO_EMIT_OVERFLOW', 'drop_oldest')
+    )
+    payment_protocol.add_payment_listener(
+        lambda response: websocket_manager.schedule(
+            websocket_manager.emit_payment_update(
+                response.payment_id,
+                response.status,
+                response
+            )
+        )
+    )
+    
+    async def shutdown():
+        await websocket_manager.close()
+        await payment_protocol.close()
+    
+    api = PaymentApi(
+        payment_protocol,
+        websocket_manager,
+        serializer,
+        on_startup=websocket_manager.start,
+        on_shutdown=shutdown
+    )
+    app = socketio.ASGIApp(websocket_manager.sio, other_asgi_app=api)
+    app.payment_protocol = payment_protocol
+    app.websocket_manager = websocket_manager
+    app.serializer = serializer
+    return app
+
 def main():
     """Run the application."""
     app = create_app()
@@ -64,5 +197,15 @@ def main():
         debug=os.environ.get('FLASK_ENV') == 'development'
     )
 
+def main_asgi():
+    """Run the application on uvicorn (requires the ``asgi`` extra)."""
+    import uvicorn
+    uvicorn.run(
+        create_asgi_app(),
+        host=os.environ.get('HOST', '0.0.0.0'),
+        port=int(os.environ.get('PORT', 5000)),
+        lifespan='on'
+    )
+
 if __name__ == '__main__':
-    main() 
\ No newline at end of file
+    main()
\ No newline at end of file
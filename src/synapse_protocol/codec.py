@@ -0,0 +1,102 @@
+"""
+Message codecs negotiated by SynapseProtocol connections
+"""
+
+import json
+from typing import Any, List, Optional, Sequence, Union
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional, pip install synapse-protocol[msgpack]
+    msgpack = None
+
+class JsonCodec:
+    """JSON in text frames; what every peer understands."""
+    
+    name = "json"
+    subprotocol = "synapse.json"
+    # Building the encoder once keeps compact separators as cheap as json.dumps' cached default
+    _encoder = json.JSONEncoder(separators=(",", ":"))
+    
+    def encode(self, message: Any) -> str:
+        """Encode a message."""
+        return self._encoder.encode(message)
+    
+    def decode(self, data: Union[str, bytes]) -> Any:
+        """Decode a message."""
+        return json.loads(data)
+
+class MsgpackCodec:
+    """MessagePack in binary frames; smaller and cheaper to encode than JSON."""
+    
+    name = "msgpack"
+    subprotocol = "synapse.msgpack"
+    
+    def __init__(self):
+        if msgpack is None:
+            raise ImportError("MessagePack support requires the msgpack package")
+        self._packer = msgpack.Packer(use_bin_type=True)
+    
+    def encode(self, message: Any) -> bytes:
+        """Encode a message."""
+        return self._packer.pack(message)
+    
+    def decode(self, data: Union[str, bytes]) -> Any:
+        """Decode a message."""
+        if isinstance(data, str):
+            # Text frames from a peer that fell back to JSON
+            return json.loads(data)
+        return msgpack.unpackb(data, raw=False)
+
+_CODECS = {"json": JsonCodec, "msgpack": MsgpackCodec}
+
+def available_codecs() -> List[str]:
+    """Names of the codecs usable in this environment, most compact first."""
+    return (["msgpack"] if msgpack is not None else []) + ["json"]
+
+def get_codec(name: str) -> Any:
+    """
+    Create a codec.
+    
+    Args:
+        name: Codec name, ``json`` or ``msgpack``
+    
+    Returns:
+        Codec instance
+    """
+    try:
+        return _CODECS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown codec: {name}")
+
+def subprotocols(codecs: Optional[Sequence[str]] = None) -> List[str]:
+    """
+    WebSocket subprotocols offering codecs, in order of preference.
+    
+    Args:
+        codecs: Codec names, defaults to ``available_codecs()``
+    
+    Returns:
+        Subprotocol names for the WebSocket handshake; codecs whose
+        package is not installed are left out
+    """
+    for name in codecs or ():
+        if name not in _CODECS:
+            raise ValueError(f"Unknown codec: {name}")
+    usable = available_codecs()
+    return [_CODECS[name].subprotocol for name in (codecs or usable) if name in usable]
+
+def negotiated_codec(subprotocol: Optional[str]) -> Any:
+    """
+    Get the codec selected in a WebSocket handshake.
+    
+    Args:
+        subprotocol: Subprotocol the server accepted, None if it accepted none
+    
+    Returns:
+        Codec instance; JSON when the peer does not negotiate codecs
+    """
+    for codec in _CODECS.values():
+        if codec.subprotocol == subprotocol:
+            return codec()
+    return JsonCodec()
\ No newline at end of file
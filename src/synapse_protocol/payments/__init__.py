@@ -3,14 +3,19 @@ Payment protocol implementation
 """
 
 from .core import PaymentProtocol
-from .types import PaymentRequest, PaymentResponse, PaymentStatus
+from .types import PaymentRequest, PaymentResponse, PaymentStatus, AccountBalance
 from .exceptions import PaymentError, ValidationError
+from .store import PaymentRecord, PaymentStore, SqlitePaymentStore
 
 __all__ = [
     'PaymentProtocol',
     'PaymentRequest',
     'PaymentResponse',
     'PaymentStatus',
+    'AccountBalance',
     'PaymentError',
-    'ValidationError'
+    'ValidationError',
+    'PaymentRecord',
+    'PaymentStore',
+    'SqlitePaymentStore'
 ] 
\ No newline at end of file
@@ -0,0 +1,209 @@
+"""
+Caching primitives for the payment protocol
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+class TTLCache:
+    """
+    Bounded LRU cache with a per-entry time to live.
+    
+    Entries expire ``ttl`` seconds after they are set (or never, if the TTL
+    is None) and the least recently used entry is evicted once the cache is
+    full. Hit, miss and eviction counts are kept for monitoring. The cache
+    is thread-safe, since confirmations invalidate entries from the
+    confirmation tracker's thread.
+    """
+    
+    def __init__(self, maxsize: int = 10000, ttl: Optional[float] = None):
+        """
+        Initialize the cache.
+        
+        Args:
+            maxsize: Maximum number of entries
+            ttl: Default time to live in seconds, or None for no expiry
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return self._lookup(key) is not None
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Get a cached value.
+        
+        Args:
+            key: Cache key
+            default: Value returned when the key is missing or expired
+        
+        Returns:
+            The cached value or the default
+        """
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[0]
+    
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Set a cached value.
+        
+        Args:
+            key: Cache key
+            value: Value to cache
+            ttl: Time to live in seconds, overriding the cache default
+        """
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def invalidate(self, key: Hashable) -> None:
+        """Remove a key from the cache."""
+        with self._lock:
+            self._entries.pop(key, None)
+    
+    def clear(self) -> None:
+        """Remove all entries from the cache."""
+        with self._lock:
+            self._entries.clear()
+    
+    def items(self) -> List[tuple]:
+        """Iterate over unexpired (key, value) pairs, least recently used first."""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                (key, value) for key, (value, expires_at) in self._entries.items()
+                if expires_at is None or expires_at > now
+            ]
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+    
+    def _lookup(self, key: Hashable) -> Optional[tuple]:
+        """Return the live entry for a key, dropping it if it has expired; call with the lock held."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at = entry[1]
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        return entry
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one in-flight call.
+    
+    The first caller for a key starts the call; callers arriving while it
+    is running await the same result, from any thread and event loop, since
+    Flask async views each run on a loop of their own. ``forget`` detaches
+    the in-flight call so that later callers start a fresh one, and the
+    detached call's ``on_result`` callback is skipped so it cannot publish a
+    stale value.
+    """
+    
+    def __init__(self):
+        """Initialize with no calls in flight."""
+        self.calls = 0
+        self.coalesced = 0
+        self._flights: Dict[Hashable, concurrent.futures.Future] = {}
+        self._lock = threading.Lock()
+    
+    async def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], Awaitable[Any]],
+        on_result: Optional[Callable[[Any], None]] = None
+    ) -> Any:
+        """
+        Run ``fn`` for a key, or join the call already in flight for it.
+        
+        The call runs on the event loop of the caller that started it.
+        
+        Args:
+            key: Key identifying the call
+            fn: Coroutine function performing the call
+            on_result: Callback run with the result if the call is still current
+        
+        Returns:
+            Result of the call
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                self.calls += 1
+                flight = self._flights[key] = concurrent.futures.Future()
+            else:
+                self.coalesced += 1
+        if leader:
+            asyncio.ensure_future(self._run(key, flight, fn, on_result))
+        # Shield the shared call so one cancelled caller doesn't cancel the rest
+        return await asyncio.shield(asyncio.wrap_future(flight))
+    
+    def forget(self, key: Hashable) -> None:
+        """Detach the in-flight call for a key, if any."""
+        with self._lock:
+            self._flights.pop(key, None)
+    
+    async def _run(
+        self,
+        key: Hashable,
+        flight: concurrent.futures.Future,
+        fn: Callable[[], Awaitable[Any]],
+        on_result: Optional[Callable[[Any], None]]
+    ) -> None:
+        """Run a call, publish its result if it hasn't been forgotten and complete the flight."""
+        try:
+            result = await fn()
+            if on_result is not None and self._is_current(key, flight):
+                on_result(result)
+        except asyncio.CancelledError:
+            # The starting caller's loop is shutting down
+            flight.cancel()
+            raise
+        except BaseException as e:
+            flight.set_exception(e)
+        else:
+            flight.set_result(result)
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+    
+    def _is_current(self, key: Hashable, flight: concurrent.futures.Future) -> bool:
+        with self._lock:
+            return self._flights.get(key) is flight
\ No newline at end of file
@@ -0,0 +1,272 @@
+"""
+Ledger-stream driven transaction confirmation
+"""
+
+import asyncio
+import json
+import threading
+from concurrent.futures import Future
+from typing import Dict, Any, List, Optional, Set, Tuple
+import websockets
+from .cache import TTLCache
+
+class ConfirmationTracker:
+    """
+    Resolves pending transactions from a single rippled subscription.
+    
+    Instead of every payment waiting on its own ``submit_and_wait``, the
+    tracker holds one WebSocket subscription to the ``ledger`` and
+    ``transactions`` streams and resolves the future of each tracked
+    transaction when it appears in a validated ledger. Transactions whose
+    ``LastLedgerSequence`` has passed without validation are resolved as
+    expired. After a reconnect, every pending transaction is looked up
+    with ``tx``, and its expiry is held until that lookup has answered, so
+    a transaction validated during the outage is not reported as expired
+    because the first ledger seen after reconnecting is past its
+    ``LastLedgerSequence``.
+    
+    Futures are ``concurrent.futures.Future`` objects, so payments can be
+    tracked from any thread or event loop. The tracker runs its own event
+    loop in a daemon thread, and done callbacks run on that thread.
+    """
+    
+    def __init__(
+        self,
+        websocket_url: str,
+        reconnect_delay: float = 1.0,
+        max_reconnect_delay: float = 30.0,
+        recent_size: int = 10000
+    ):
+        """
+        Initialize the tracker.
+        
+        Args:
+            websocket_url: WebSocket URL of the rippled server
+            reconnect_delay: Initial delay in seconds before reconnecting
+            max_reconnect_delay: Maximum delay in seconds between reconnects
+            recent_size: Number of recently validated transactions remembered
+                for transactions tracked after their ledger closed
+        """
+        self.websocket_url = websocket_url
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.ledger_index: Optional[int] = None
+        self.reconnects = 0
+        self.last_error: Optional[str] = None
+        self._pending: Dict[str, Tuple[Future, Optional[int]]] = {}
+        # Pending transactions whose catch-up lookup has not answered yet
+        self._catching_up: Set[str] = set()
+        self._recent = TTLCache(maxsize=recent_size, ttl=300)
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._websocket = None
+        self._stopping = False
+    
+    @property
+    def pending(self) -> int:
+        """Number of transactions awaiting validation."""
+        return len(self._pending)
+    
+    def start(self) -> None:
+        """
+        Start the subscription, or restart it if its thread has died.
+        
+        The tracker always runs on its own event loop in a daemon thread, not
+        on the caller's loop: callers such as Flask's async views run on
+        per-request loops that are closed once the request returns.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._loop = asyncio.new_event_loop()
+            self._task = self._loop.create_task(self._run())
+            self._thread = threading.Thread(
+                target=self._serve,
+                name="xrpl-confirmations",
+                daemon=True
+            )
+            self._thread.start()
+    
+    def stop(self) -> None:
+        """Stop the subscription and cancel pending futures."""
+        with self._start_lock:
+            self._stopping = True
+            if self._thread is not None and self._thread.is_alive():
+                self._loop.call_soon_threadsafe(self._task.cancel)
+                if threading.current_thread() is not self._thread:
+                    self._thread.join(timeout=5)
+            self._task = None
+            self._thread = None
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for future, _ in pending.values():
+            future.cancel()
+    
+    def track(self, tx_hash: str, last_ledger_sequence: Optional[int] = None) -> Future:
+        """
+        Track a submitted transaction until it is validated or expires.
+        
+        Args:
+            tx_hash: Hash of the submitted transaction
+            last_ledger_sequence: LastLedgerSequence of the transaction, if set
+        
+        Returns:
+            Future resolving to a dictionary with ``transaction_hash``,
+            ``validated``, ``engine_result`` and ``ledger_index``
+        """
+        self.start()
+        with self._lock:
+            if tx_hash in self._pending:
+                return self._pending[tx_hash][0]
+            future: Future = Future()
+            recent = self._recent.get(tx_hash)
+            if recent is not None:
+                future.set_result(recent)
+                return future
+            self._pending[tx_hash] = (future, last_ledger_sequence)
+        return future
+    
+    def _serve(self) -> None:
+        """Run the subscription task to completion on the tracker's thread."""
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            self.last_error = str(e)
+        finally:
+            # Let connection tasks left behind by the cancelled subscription finish
+            leftover = asyncio.all_tasks(self._loop)
+            for task in leftover:
+                task.cancel()
+            self._loop.run_until_complete(asyncio.gather(*leftover, return_exceptions=True))
+            self._loop.run_until_complete(self._loop.shutdown_asyncgens())
+            self._loop.close()
+    
+    async def _run(self) -> None:
+        """Maintain the subscription, reconnecting with backoff."""
+        delay = self.reconnect_delay
+        while not self._stopping:
+            try:
+                async with websockets.connect(self.websocket_url) as websocket:
+                    self._websocket = websocket
+                    # Catch up on anything validated while we were disconnected
+                    with self._lock:
+                        self._catching_up = set(self._pending)
+                        catch_up = list(self._catching_up)
+                    await websocket.send(json.dumps({
+                        "id": "subscribe",
+                        "command": "subscribe",
+                        "streams": ["ledger", "transactions"]
+                    }))
+                    for tx_hash in catch_up:
+                        await websocket.send(json.dumps({
+                            "id": f"tx:{tx_hash}",
+                            "command": "tx",
+                            "transaction": tx_hash
+                        }))
+                    delay = self.reconnect_delay
+                    async for raw in websocket:
+                        self._handle_message(json.loads(raw))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = str(e)
+            finally:
+                self._websocket = None
+            if self._stopping:
+                break
+            self.reconnects += 1
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+    
+    def _handle_message(self, message: Dict[str, Any]) -> None:
+        """Dispatch one message from the subscription."""
+        message_type = message.get("type")
+        if message_type == "transaction":
+            if message.get("validated"):
+                tx = message.get("transaction") or message.get("tx_json") or {}
+                tx_hash = tx.get("hash") or message.get("hash")
+                self._resolve(
+                    tx_hash,
+                    message.get("meta", {}).get("TransactionResult"),
+                    message.get("ledger_index")
+                )
+        elif message_type == "ledgerClosed":
+            self._advance_ledger(message.get("ledger_index"))
+        elif message_type == "response":
+            result = message.get("result", {})
+            request_id = str(message.get("id", ""))
+            if request_id == "subscribe":
+                self._advance_ledger(result.get("ledger_index"))
+            elif request_id.startswith("tx:"):
+                if result.get("validated"):
+                    self._resolve(
+                        request_id[3:],
+                        result.get("meta", {}).get("TransactionResult"),
+                        result.get("ledger_index")
+                    )
+                self._end_catch_up(request_id[3:])
+    
+    def _resolve(self, tx_hash: Optional[str], engine_result: Optional[str], ledger_index: Optional[int]) -> None:
+        """Resolve a validated transaction."""
+        if not tx_hash:
+            return
+        outcome = {
+            "transaction_hash": tx_hash,
+            "validated": True,
+            "engine_result": engine_result,
+            "ledger_index": ledger_index
+        }
+        with self._lock:
+            entry = self._pending.pop(tx_hash, None)
+            if entry is None:
+                self._recent.set(tx_hash, outcome)
+                return
+        if not entry[0].done():
+            entry[0].set_result(outcome)
+    
+    def _advance_ledger(self, ledger_index: Optional[int]) -> None:
+        """Record a closed ledger and expire transactions that can no longer be included."""
+        if ledger_index is None:
+            return
+        self.ledger_index = ledger_index
+        with self._lock:
+            expired = [
+                (tx_hash, future) for tx_hash, (future, last_ledger) in self._pending.items()
+                if last_ledger is not None and ledger_index > last_ledger
+                and tx_hash not in self._catching_up
+            ]
+            for tx_hash, _ in expired:
+                del self._pending[tx_hash]
+        self._expire(expired, ledger_index)
+    
+    def _end_catch_up(self, tx_hash: str) -> None:
+        """Apply the expiry held back while a catch-up lookup was outstanding."""
+        ledger_index = self.ledger_index
+        with self._lock:
+            self._catching_up.discard(tx_hash)
+            entry = self._pending.get(tx_hash)
+            if entry is None or entry[1] is None or ledger_index is None or ledger_index <= entry[1]:
+                return
+            del self._pending[tx_hash]
+        self._expire([(tx_hash, entry[0])], ledger_index)
+    
+    @staticmethod
+    def _expire(expired: List[Tuple[str, Future]], ledger_index: int) -> None:
+        """Resolve transactions whose LastLedgerSequence has passed."""
+        for tx_hash, future in expired:
+            if not future.done():
+                future.set_result({
+                    "transaction_hash": tx_hash,
+                    "validated": False,
+                    "engine_result": "tefMAX_LEDGER",
+                    "ledger_index": ledger_index
+                })
\ No newline at end of file
@@ -2,35 +2,98 @@
 Core implementation of the A2A Payment Protocol
 """
 
+import asyncio
+import logging
+import threading
 import uuid
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Callable
 from .types import PaymentRequest, PaymentResponse, PaymentStatus
-from .exceptions import PaymentError, ValidationError
+from .exceptions import PaymentError, ValidationError, PaymentNotFoundError, PaymentCancellationError
+from .store import PaymentRecord, PaymentStore
+from .netting import NettingEngine
+
+logger = logging.getLogger(__name__)
 
 class PaymentProtocol:
     """Main class for handling A2A payment operations."""
     
-    def __init__(self, api_key: str, environment: str = "sandbox", xrp_client: Optional[Any] = None):
+    REQUIRED_FIELDS = ("sender_account", "receiver_account", "amount", "currency")
+    
+    def __init__(
+        self,
+        api_key: str,
+        environment: str = "sandbox",
+        xrp_client: Optional[Any] = None,
+        max_in_flight: int = 32,
+        payment_store: Optional[Any] = None,
+        netting: Optional[NettingEngine] = None,
+        max_batch_size: int = 1000,
+        max_history_limit: int = 1000
+    ):
         """
         Initialize the payment protocol.
         
         Args:
             api_key: API key for authentication
             environment: 'sandbox' or 'production'
-            xrp_client: Optional XRP client instance for XRP payments
+            xrp_client: Optional XRP client instance (or configured XrpPaymentBridge)
+                for XRP payments
+            max_in_flight: Default and maximum concurrency limit for batch submissions
+            payment_store: Optional payment store (defaults to an in-memory PaymentStore)
+            netting: Optional NettingEngine; when set, XRP payments are accumulated
+                and settled as net transfers instead of one transaction each
+            max_batch_size: Maximum number of payments in one batch
+            max_history_limit: Maximum number of records in one history page
         """
         self.api_key = api_key
         self.environment = environment
+        self.max_in_flight = max_in_flight
+        self.max_batch_size = max_batch_size
+        self.max_history_limit = max_history_limit
+        self.payment_store = payment_store if payment_store is not None else PaymentStore()
+        self._submitting = set()
+        # Serializes submit responses against confirmations arriving from the tracker's thread
+        self._update_lock = threading.Lock()
+        self.netting = netting
+        # Guards the netting window, which requests and the window timer share
+        self._netting_lock = threading.Lock()
+        self._netting_timer: Optional[threading.Timer] = None
+        self._settlement_groups: Dict[str, Dict[str, Any]] = {}
         self._validate_environment()
         
         # Initialize XRP bridge if client is provided
         if xrp_client:
             from .xrp_bridge import XrpPaymentBridge
-            self.xrp_bridge = XrpPaymentBridge(xrp_client)
+            if isinstance(xrp_client, XrpPaymentBridge):
+                self.xrp_bridge = xrp_client
+            else:
+                self.xrp_bridge = XrpPaymentBridge(xrp_client)
+            self.xrp_bridge.confirmation_listeners.append(self._on_payment_update)
         else:
             self.xrp_bridge = None
+            
+        self.payment_listeners: List[Callable[[PaymentResponse], None]] = []
+        
+    def add_payment_listener(self, listener: Callable[[PaymentResponse], None]) -> None:
+        """
+        Register a callback for payment status changes that happen after
+        initiate_payment has returned, such as ledger validation.
+        
+        Args:
+            listener: Callable receiving the updated PaymentResponse
+        """
+        self.payment_listeners.append(listener)
         
+    def _on_payment_update(self, response: PaymentResponse) -> None:
+        """Record an asynchronous payment update and notify listeners."""
+        with self._update_lock:
+            self.payment_store.update(response.payment_id, response)
+            if response.payment_id in self._settlement_groups:
+                self._update_settlement(response)
+        for listener in self.payment_listeners:
+            listener(response)
+    
     def _validate_environment(self) -> None:
         """Validate the environment setting."""
         if self.environment not in ["sandbox", "production"]:
@@ -55,12 +118,92 @@ class PaymentProtocol:
         Returns:
             PaymentResponse object containing payment details
         """
+        payment_request = self._build_payment_request(payment_data)
+        self.payment_store.add(PaymentRecord.from_request(payment_request))
+        return await self._submit_payment(payment_request)
+        
+    async def initiate_payments(
+        self,
+        batch: List[Dict[str, Any]],
+        max_in_flight: Optional[int] = None
+    ) -> List[PaymentResponse]:
+        """
+        Initiate a batch of A2A payments.
+        
+        The whole batch is validated before anything is submitted, so an
+        invalid item rejects the batch without moving any funds. Submissions
+        then run concurrently, with at most ``max_in_flight`` outstanding at
+        any time. A submission that raises fails only its own payment.
+        
+        Args:
+            batch: List of at most max_batch_size payment dictionaries, as
+                accepted by initiate_payment
+            max_in_flight: Maximum number of concurrent submissions, capped
+                at the protocol's max_in_flight (the default)
+            
+        Returns:
+            List of PaymentResponse objects in the same order as the batch
+        """
+        if not isinstance(batch, list):
+            raise ValidationError("Payments must be a list")
+        if len(batch) > self.max_batch_size:
+            raise ValidationError(f"A batch holds at most {self.max_batch_size} payments")
+        if max_in_flight is None:
+            limit = self.max_in_flight
+        elif isinstance(max_in_flight, int) and not isinstance(max_in_flight, bool) and max_in_flight >= 1:
+            limit = min(max_in_flight, self.max_in_flight)
+        else:
+            raise ValidationError("max_in_flight must be an integer of at least 1")
+            
+        payment_requests = []
+        for index, payment_data in enumerate(batch):
+            try:
+                payment_requests.append(self._build_payment_request(payment_data))
+            except ValidationError as e:
+                raise ValidationError(f"Invalid payment at index {index}: {str(e)}")
+            except PaymentError as e:
+                raise PaymentError(f"Invalid payment at index {index}: {str(e)}")
+        for payment_request in payment_requests:
+            self.payment_store.add(PaymentRecord.from_request(payment_request))
+            
+        semaphore = asyncio.Semaphore(limit)
+        
+        async def submit(payment_request: PaymentRequest) -> PaymentResponse:
+            async with semaphore:
+                try:
+                    return await self._submit_payment(payment_request)
+                except Exception as e:
+                    return self._fail_payment(payment_request.payment_id, e)
+                
+        return list(await asyncio.gather(*(submit(r) for r in payment_requests)))
+        
+    def _build_payment_request(self, payment_data: Dict[str, Any]) -> PaymentRequest:
+        """
+        Validate payment data and build a payment request from it.
+        
+        Args:
+            payment_data: Dictionary containing payment details
+            
+        Returns:
+            PaymentRequest ready for submission
+        """
         # Validate input parameters
-        if payment_data["amount"] <= 0:
+        if not isinstance(payment_data, dict):
+            raise ValidationError("Payment must be an object")
+        missing = [field for field in self.REQUIRED_FIELDS if field not in payment_data]
+        if missing:
+            raise ValidationError(f"Missing required fields: {', '.join(missing)}")
+        amount = payment_data["amount"]
+        if not isinstance(amount, (int, float)) or isinstance(amount, bool):
+            raise ValidationError("Amount must be a number")
+        if amount <= 0:
             raise ValidationError("Amount must be greater than zero")
+        if payment_data["currency"] != "XRP" or not self.xrp_bridge:
+            # TODO: Implement other payment methods
+            raise PaymentError(f"Unsupported currency: {payment_data['currency']}")
             
         # Create payment request
-        payment_request = PaymentRequest(
+        return PaymentRequest(
             payment_id=str(uuid.uuid4()),
             sender_account=payment_data["sender_account"],
             receiver_account=payment_data["receiver_account"],
@@ -68,16 +211,264 @@ class PaymentProtocol:
             currency=payment_data["currency"],
             description=payment_data.get("description"),
             metadata=payment_data.get("metadata"),
+            status=PaymentStatus.PENDING
+        )
+        
+    async def _submit_payment(self, payment_request: PaymentRequest) -> PaymentResponse:
+        """
+        Submit a stored payment request to its payment rail and record the outcome.
+        
+        Payments cancelled while waiting for submission are not submitted.
+        
+        Args:
+            payment_request: Payment request to submit
+            
+        Returns:
+            PaymentResponse with the result
+        """
+        payment_id = payment_request.payment_id
+        record = self.payment_store.get(payment_id)
+        if record is not None and record.status != PaymentStatus.PENDING:
+            return PaymentResponse(
+                payment_id=payment_id,
+                status=record.status,
+                message=f"Payment not submitted: payment is {record.status.value}"
+            )
+            
+        if self.netting is not None:
+            return await self._net_payment(payment_request)
+        return await self._process_payment(payment_request)
+        
+    async def _process_payment(self, payment_request: PaymentRequest) -> PaymentResponse:
+        """
+        Send a payment through the XRP bridge and record the outcome.
+        
+        The submission's response is only applied while the payment is still
+        pending or processing: its confirmation may already have been
+        delivered, e.g. for a transaction validated before it was tracked.
+        
+        Args:
+            payment_request: Payment request to process
+            
+        Returns:
+            PaymentResponse with the result
+        """
+        payment_id = payment_request.payment_id
+        self._submitting.add(payment_id)
+        try:
+            response = await self.xrp_bridge.process_payment(payment_request)
+        finally:
+            self._submitting.discard(payment_id)
+        with self._update_lock:
+            record = self.payment_store.get(payment_id)
+            if record is not None and record.status not in (PaymentStatus.PENDING, PaymentStatus.PROCESSING):
+                return self._record_response(record, (
+                    "XRP payment validated" if record.status == PaymentStatus.COMPLETED else "XRP payment failed"
+                ))
+            self.payment_store.update(payment_id, response)
+            if payment_id in self._settlement_groups:
+                self._update_settlement(response)
+        return response
+        
+    async def _net_payment(self, payment_request: PaymentRequest) -> PaymentResponse:
+        """
+        Add a payment to the netting window, settling the window if it is due.
+        
+        A window that is not settled by a later payment is settled by a timer
+        thread once it expires, since the event loop of the request that
+        opened it may be closed by then, as under Flask.
+        
+        Args:
+            payment_request: Payment request to net
+            
+        Returns:
+            PaymentResponse with the payment's current status
+        """
+        with self._netting_lock:
+            due = self.netting.add(payment_request)
+            if not due and self._netting_timer is None:
+                # First payment of a new window: settle it when the window expires
+                self._netting_timer = threading.Timer(self.netting.window_seconds, self._settle_expired_window)
+                self._netting_timer.daemon = True
+                self._netting_timer.start()
+        if due:
+            await self.flush_netting()
+            record = self.payment_store.get(payment_request.payment_id)
+            return self._record_response(record, "Payment settled by netting")
+            
+        return PaymentResponse(
+            payment_id=payment_request.payment_id,
             status=PaymentStatus.PENDING,
-            created_at=datetime.utcnow()
+            message="Payment queued for netting"
         )
         
-        # Process payment based on currency
-        if payment_data["currency"] == "XRP" and self.xrp_bridge:
-            return await self.xrp_bridge.process_payment(payment_request)
-        else:
-            # TODO: Implement other payment methods
-            raise PaymentError(f"Unsupported currency: {payment_data['currency']}")
+    def _settle_expired_window(self) -> None:
+        """Settle the netting window from the window timer's thread."""
+        try:
+            asyncio.run(self.flush_netting())
+        except Exception:
+            logger.exception("Cannot settle the netting window")
+        
+    def _fail_payment(self, payment_id: str, error: Exception) -> PaymentResponse:
+        """Record a payment whose submission raised as failed."""
+        response = PaymentResponse(
+            payment_id=payment_id,
+            status=PaymentStatus.FAILED,
+            message="Error submitting payment",
+            error_code="SUBMISSION_ERROR",
+            error_message=str(error)
+        )
+        with self._update_lock:
+            self.payment_store.update(payment_id, response)
+        return response
+        
+    @staticmethod
+    def _record_response(record: PaymentRecord, message: str) -> PaymentResponse:
+        """Build a response reporting a payment's stored outcome."""
+        return PaymentResponse(
+            payment_id=record.payment_id,
+            status=record.status,
+            message=message,
+            error_code=record.error_code,
+            error_message=record.error_message,
+            completed_at=record.completed_at,
+            transaction_hash=record.transaction_hash
+        )
+        
+    async def flush_netting(self) -> int:
+        """
+        Settle the current netting window.
+        
+        Every payment in the window moves to PROCESSING, the window's net
+        transfers are submitted through the XRP bridge, and each original
+        payment takes the status and transaction hash of the settlement
+        transfers it depends on.
+        
+        Returns:
+            Number of payments settled
+        """
+        if self.netting is None:
+            return 0
+        with self._netting_lock:
+            if self._netting_timer is not None:
+                self._netting_timer.cancel()
+                self._netting_timer = None
+            payments = self.netting.take()
+        if not payments:
+            return 0
+            
+        for payment in payments:
+            self.payment_store.update(payment.payment_id, PaymentResponse(
+                payment_id=payment.payment_id,
+                status=PaymentStatus.PROCESSING,
+                message="Settling netted payment"
+            ))
+            
+        transfers = self.netting.compute_transfers(payments)
+        accounts = {payment.payment_id: (payment.sender_account, payment.receiver_account) for payment in payments}
+        groups = [transfers] if self.netting.multilateral else [[transfer] for transfer in transfers]
+        settlements = []
+        for group in groups:
+            state = {
+                "payment_ids": group[0].payment_ids,
+                "accounts": {payment_id: accounts[payment_id] for payment_id in group[0].payment_ids},
+                "transfers": {}
+            }
+            for transfer in group:
+                if transfer.amount <= 0:
+                    continue
+                settlement = PaymentRequest(
+                    payment_id=f"settlement-{uuid.uuid4()}",
+                    sender_account=transfer.sender_account,
+                    receiver_account=transfer.receiver_account,
+                    amount=float(transfer.amount),
+                    currency="XRP",
+                    description=f"Net settlement of {len(transfer.payment_ids)} payments",
+                    metadata={"netted_payment_ids": transfer.payment_ids},
+                    status=PaymentStatus.PENDING
+                )
+                self.payment_store.add(PaymentRecord.from_request(settlement))
+                state["transfers"][settlement.payment_id] = settlement
+                self._settlement_groups[settlement.payment_id] = state
+                settlements.append(settlement)
+            if not state["transfers"]:
+                # The payments cancel out: nothing to send
+                self._finish_settlement(state, PaymentStatus.COMPLETED, None)
+                
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        
+        async def settle(settlement: PaymentRequest) -> PaymentResponse:
+            async with semaphore:
+                return await self._process_payment(settlement)
+                
+        await asyncio.gather(*(settle(s) for s in settlements))
+        return len(payments)
+        
+    def _update_settlement(self, response: PaymentResponse) -> None:
+        """Fold a settlement transfer's response into its group, finishing the group once final."""
+        state = self._settlement_groups[response.payment_id]
+        state["transfers"][response.payment_id] = response
+        responses = [r for r in state["transfers"].values() if isinstance(r, PaymentResponse)]
+        failed = next((r for r in responses if r.status == PaymentStatus.FAILED), None)
+        if failed is not None:
+            self._finish_settlement(state, PaymentStatus.FAILED, failed)
+        elif len(responses) == len(state["transfers"]) and all(
+            r.status == PaymentStatus.COMPLETED for r in responses
+        ):
+            self._finish_settlement(state, PaymentStatus.COMPLETED, None)
+            
+    def _finish_settlement(
+        self,
+        state: Dict[str, Any],
+        status: PaymentStatus,
+        failed: Optional[PaymentResponse]
+    ) -> None:
+        """Apply the final outcome of a settlement group to its original payments."""
+        for settlement_id in state["transfers"]:
+            self._settlement_groups.pop(settlement_id, None)
+        transfers = list(state["transfers"].values())
+        
+        for payment_id in state["payment_ids"]:
+            sender, receiver = state["accounts"][payment_id]
+            # Point each payment at the transfer paid by its sender, else the one paid to its receiver
+            transfer = next((t for t in transfers if self._transfer_accounts(t)[0] == sender), None) or \
+                next((t for t in transfers if self._transfer_accounts(t)[1] == receiver), None) or \
+                (transfers[0] if transfers else None)
+            response = PaymentResponse(
+                payment_id=payment_id,
+                status=status,
+                message=(
+                    "Payment settled by netting" if status == PaymentStatus.COMPLETED
+                    else "Net settlement failed"
+                ),
+                error_code=failed.error_code if failed else None,
+                error_message=failed.error_message if failed else None,
+                completed_at=datetime.utcnow() if status == PaymentStatus.COMPLETED else None,
+                transaction_hash=getattr(transfer, "transaction_hash", None)
+            )
+            self.payment_store.update(payment_id, response)
+            for listener in self.payment_listeners:
+                listener(response)
+                
+    def _transfer_accounts(self, transfer: Any) -> tuple:
+        """Get the (sender, receiver) of a settlement transfer from its stored record."""
+        record = self.payment_store.get(transfer.payment_id)
+        return (record.sender_account, record.receiver_account) if record else (None, None)
+        
+    async def get_payment(self, payment_id: str) -> PaymentRecord:
+        """
+        Get the stored record of a payment.
+        
+        Args:
+            payment_id: Unique identifier of the payment
+            
+        Returns:
+            PaymentRecord with the payment details and latest status
+        """
+        record = self.payment_store.get(payment_id)
+        if record is None:
+            raise PaymentNotFoundError(f"Payment {payment_id} not found")
+        return record
         
     async def get_payment_status(self, payment_id: str) -> PaymentStatus:
         """
@@ -89,9 +480,38 @@ class PaymentProtocol:
         Returns:
             Current payment status
         """
-        # TODO: Implement actual status checking logic
-        return PaymentStatus.PENDING
+        return (await self.get_payment(payment_id)).status
+        
+    async def get_payment_history(
+        self,
+        account_id: str,
+        direction: str = "sent",
+        limit: int = 100,
+        offset: int = 0
+    ) -> List[PaymentRecord]:
+        """
+        Get the payment history of an account, newest first.
         
+        Args:
+            account_id: Account identifier
+            direction: 'sent' or 'received'
+            limit: Maximum number of records to return, at most max_history_limit
+            offset: Number of records to skip
+            
+        Returns:
+            List of PaymentRecord objects
+        """
+        if not 1 <= limit <= self.max_history_limit:
+            raise ValidationError(f"Limit must be between 1 and {self.max_history_limit}")
+        if offset < 0:
+            raise ValidationError("Offset must not be negative")
+        if direction == "sent":
+            return self.payment_store.list_by_sender(account_id, limit, offset)
+        elif direction == "received":
+            return self.payment_store.list_by_receiver(account_id, limit, offset)
+        else:
+            raise ValidationError("Direction must be either 'sent' or 'received'")
+            
     async def cancel_payment(self, payment_id: str) -> PaymentResponse:
         """
         Cancel a pending payment.
@@ -102,12 +522,23 @@ class PaymentProtocol:
         Returns:
             PaymentResponse object with cancellation status
         """
-        # TODO: Implement actual cancellation logic
-        return PaymentResponse(
+        record = await self.get_payment(payment_id)
+        if self.netting is not None:
+            with self._netting_lock:
+                self.netting.remove(payment_id)
+        if record.status != PaymentStatus.PENDING or payment_id in self._submitting:
+            raise PaymentCancellationError(
+                f"Payment {payment_id} cannot be cancelled: payment is already "
+                f"{'submitted' if record.status == PaymentStatus.PENDING else record.status.value}"
+            )
+            
+        response = PaymentResponse(
             payment_id=payment_id,
             status=PaymentStatus.CANCELLED,
             message="Payment cancelled successfully"
         )
+        self.payment_store.update(payment_id, response)
+        return response
         
     async def get_balance(self, account_id: str, currency: str = "XRP") -> float:
         """
@@ -138,4 +569,20 @@ class PaymentProtocol:
         if self.xrp_bridge:
             return await self.xrp_bridge.verify_transaction(tx_hash)
         else:
-            raise PaymentError("XRP bridge not initialized") 
\ No newline at end of file
+            raise PaymentError("XRP bridge not initialized") 
+            
+    async def close(self) -> None:
+        """
+        Settle payments still waiting for netting and release the payment
+        store, confirmation tracker and XRP client.
+        """
+        # Settles the open window, if any, and stops its timer
+        await self.flush_netting()
+        if self.xrp_bridge:
+            self.xrp_bridge.close()
+            if self.xrp_bridge.confirmation_tracker is not None:
+                self.xrp_bridge.confirmation_tracker.stop()
+            close_client = getattr(self.xrp_bridge.xrp_client, "close", None)
+            if close_client is not None:
+                close_client()
+        self.payment_store.close()
\ No newline at end of file
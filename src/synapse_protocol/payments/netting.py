@@ -0,0 +1,228 @@
+"""
+Netting of micro-payments between agents
+"""
+
+import time
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+from .types import PaymentRequest
+
+# XRP amounts are settled in whole drops
+DROP = Decimal("0.000001")
+
+class NetTransfer:
+    """A single settlement transfer covering a group of netted payments."""
+    
+    def __init__(self, sender_account: str, receiver_account: str, amount: Decimal, payment_ids: List[str]):
+        """
+        Initialize the transfer.
+        
+        Args:
+            sender_account: Account paying the net amount
+            receiver_account: Account receiving the net amount
+            amount: Net amount, zero if the payments cancel out
+            payment_ids: Original payments settled by this transfer
+        """
+        self.sender_account = sender_account
+        self.receiver_account = receiver_account
+        self.amount = amount
+        self.payment_ids = payment_ids
+    
+    def __repr__(self) -> str:
+        return (f"NetTransfer({self.sender_account!r} -> {self.receiver_account!r}, "
+                f"{self.amount}, {len(self.payment_ids)} payments)")
+
+class NettingEngine:
+    """
+    Accumulates payments in a window and computes the net transfers that
+    settle them.
+    
+    A window closes once it is ``window_seconds`` old or the gross amount it
+    holds reaches ``max_window_amount``. In bilateral mode every
+    sender/receiver pair settles with at most one transfer in the direction
+    of its net balance. In multilateral mode net positions are computed per
+    account across the whole window and settled with at most one transfer
+    per debtor/creditor match, and each payment depends on every transfer
+    of its window.
+    """
+    
+    def __init__(
+        self,
+        window_seconds: float = 1.0,
+        max_window_amount: Optional[float] = None,
+        multilateral: bool = False
+    ):
+        """
+        Initialize the netting engine.
+        
+        Args:
+            window_seconds: Maximum age of a netting window
+            max_window_amount: Gross amount that closes a window early
+            multilateral: Net across all accounts instead of per pair
+        """
+        self.window_seconds = window_seconds
+        self.max_window_amount = Decimal(str(max_window_amount)) if max_window_amount else None
+        self.multilateral = multilateral
+        self.netted_payments = 0
+        self.settlement_transfers = 0
+        self._window: Dict[str, PaymentRequest] = {}
+        self._window_amount = Decimal(0)
+        self._window_opened: Optional[float] = None
+    
+    def __len__(self) -> int:
+        return len(self._window)
+    
+    def __contains__(self, payment_id: str) -> bool:
+        return payment_id in self._window
+    
+    @property
+    def window_age(self) -> float:
+        """Seconds since the current window received its first payment."""
+        return time.monotonic() - self._window_opened if self._window_opened is not None else 0.0
+    
+    def add(self, payment_request: PaymentRequest) -> bool:
+        """
+        Add a payment to the current window.
+        
+        Args:
+            payment_request: Payment to net
+        
+        Returns:
+            True if the window should now be settled
+        """
+        if not self._window:
+            self._window_opened = time.monotonic()
+        self._window[payment_request.payment_id] = payment_request
+        self._window_amount += Decimal(str(payment_request.amount))
+        return self.is_due()
+    
+    def remove(self, payment_id: str) -> bool:
+        """
+        Remove a payment from the current window.
+        
+        Args:
+            payment_id: Unique identifier of the payment
+        
+        Returns:
+            True if the payment was still waiting in the window
+        """
+        payment_request = self._window.pop(payment_id, None)
+        if payment_request is None:
+            return False
+        self._window_amount -= Decimal(str(payment_request.amount))
+        if not self._window:
+            self._window_opened = None
+        return True
+    
+    def is_due(self) -> bool:
+        """Whether the current window should be settled."""
+        if not self._window:
+            return False
+        if self.max_window_amount is not None and self._window_amount >= self.max_window_amount:
+            return True
+        return self.window_age >= self.window_seconds
+    
+    def take(self) -> List[PaymentRequest]:
+        """
+        Close the current window.
+        
+        Returns:
+            Payments that were in the window
+        """
+        payments = list(self._window.values())
+        self._window = {}
+        self._window_amount = Decimal(0)
+        self._window_opened = None
+        return payments
+    
+    def compute_transfers(self, payments: List[PaymentRequest]) -> List[NetTransfer]:
+        """
+        Compute the net transfers settling a set of payments.
+        
+        Args:
+            payments: Payments to settle
+        
+        Returns:
+            Net transfers; transfers with a zero amount settle their payments
+            without moving funds
+        """
+        if self.multilateral:
+            transfers = self._multilateral(payments)
+        else:
+            transfers = self._bilateral(payments)
+        self.netted_payments += len(payments)
+        self.settlement_transfers += sum(1 for transfer in transfers if transfer.amount > 0)
+        return transfers
+    
+    def stats(self) -> Dict[str, float]:
+        """Get netting statistics."""
+        return {
+            "window_size": len(self._window),
+            "window_amount": float(self._window_amount),
+            "netted_payments": self.netted_payments,
+            "settlement_transfers": self.settlement_transfers,
+            "compression": (
+                self.netted_payments / self.settlement_transfers if self.settlement_transfers else 0.0
+            )
+        }
+    
+    def _bilateral(self, payments: List[PaymentRequest]) -> List[NetTransfer]:
+        """Net each unordered account pair separately."""
+        pairs: Dict[Tuple[str, str], Tuple[Decimal, List[str]]] = {}
+        for payment in payments:
+            a, b = sorted((payment.sender_account, payment.receiver_account))
+            # Positive balances flow from a to b
+            amount = Decimal(str(payment.amount))
+            if payment.sender_account != a:
+                amount = -amount
+            balance, payment_ids = pairs.get((a, b), (Decimal(0), []))
+            payment_ids.append(payment.payment_id)
+            pairs[(a, b)] = (balance + amount, payment_ids)
+        
+        transfers = []
+        for (a, b), (balance, payment_ids) in pairs.items():
+            balance = balance.quantize(DROP)
+            if balance >= 0:
+                transfers.append(NetTransfer(a, b, balance, payment_ids))
+            else:
+                transfers.append(NetTransfer(b, a, -balance, payment_ids))
+        return transfers
+    
+    def _multilateral(self, payments: List[PaymentRequest]) -> List[NetTransfer]:
+        """Net positions across all accounts and match debtors with creditors."""
+        positions: Dict[str, Decimal] = {}
+        for payment in payments:
+            amount = Decimal(str(payment.amount))
+            positions[payment.sender_account] = positions.get(payment.sender_account, Decimal(0)) - amount
+            positions[payment.receiver_account] = positions.get(payment.receiver_account, Decimal(0)) + amount
+        
+        payment_ids = [payment.payment_id for payment in payments]
+        debtors = sorted(
+            ((account, -position.quantize(DROP)) for account, position in positions.items() if position < 0),
+            key=lambda item: item[1], reverse=True
+        )
+        creditors = sorted(
+            ((account, position.quantize(DROP)) for account, position in positions.items() if position > 0),
+            key=lambda item: item[1], reverse=True
+        )
+        
+        # Greedily match the largest debtor with the largest creditor
+        transfers = []
+        i = j = 0
+        while i < len(debtors) and j < len(creditors):
+            debtor, owed = debtors[i]
+            creditor, due = creditors[j]
+            amount = min(owed, due)
+            if amount > 0:
+                transfers.append(NetTransfer(debtor, creditor, amount, payment_ids))
+            debtors[i] = (debtor, owed - amount)
+            creditors[j] = (creditor, due - amount)
+            if debtors[i][1] <= 0:
+                i += 1
+            if creditors[j][1] <= 0:
+                j += 1
+        
+        if not transfers:
+            # Everything cancelled out
+            transfers.append(NetTransfer("", "", Decimal(0), payment_ids))
+        return transfers
\ No newline at end of file
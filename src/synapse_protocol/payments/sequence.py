@@ -0,0 +1,216 @@
+"""
+Local account sequence allocation for pipelined XRP submissions
+"""
+
+import heapq
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+from .cache import SingleFlight
+
+# Results after which the transaction's sequence number is consumed on ledger
+CONSUMED_PREFIXES = ("tes", "tec")
+
+class SequenceSlot:
+    """A sequence number handed out for one transaction."""
+    
+    __slots__ = ("account", "sequence", "last_ledger_sequence")
+    
+    def __init__(self, account: str, sequence: int, last_ledger_sequence: Optional[int]):
+        self.account = account
+        self.sequence = sequence
+        self.last_ledger_sequence = last_ledger_sequence
+    
+    def __repr__(self) -> str:
+        return f"SequenceSlot({self.account!r}, {self.sequence}, {self.last_ledger_sequence})"
+
+class _AccountSequences:
+    """Allocation state of one sender account."""
+    
+    def __init__(self, next_sequence: int):
+        self.next_sequence = next_sequence
+        self.free: List[int] = []
+        self.in_flight: Set[int] = set()
+        self.uncertain: Dict[int, Optional[int]] = {}
+        self.needs_resync = False
+
+class SequenceManager:
+    """
+    Hands out account sequence numbers locally so one sender can pipeline
+    many transactions without an ``account_info`` round trip per payment.
+    
+    The first reservation for an account reads its ``Sequence`` from the
+    ledger; later reservations are served from a local counter. Each slot
+    carries a ``LastLedgerSequence`` a few ledgers ahead, which bounds how
+    long a failed or unknown transaction can still be applied:
+    
+    - results that consume the sequence (``tes*``, ``tec*``) retire the slot
+    - definite rejections (``tem*``, ``tef*``, ``tel*``) return the slot to a
+      free list so the next reservation fills the gap
+    - ``tefPAST_SEQ`` means someone else used the account, so the counter is
+      resynchronised from the ledger
+    - unknown and ``ter*`` outcomes, including ``terQUEUED``, are held until
+      their ``LastLedgerSequence`` has passed, then settled against the
+      account's ledger sequence
+    
+    A resynchronisation rebuilds the counter from the ledger: every sequence
+    from the account's ledger ``Sequence`` up that no outstanding or held
+    slot owns is issued again, so a slot retired on a provisional result
+    that never applied does not leave a gap that blocks the account.
+    
+    Outcomes may be reported from another thread, e.g. a confirmation
+    tracker's.
+    """
+    
+    def __init__(
+        self,
+        fetch_sequence: Callable[[str], Awaitable[int]],
+        fetch_ledger_index: Callable[[], Awaitable[int]],
+        ledger_window: int = 20,
+        ledger_index_ttl: float = 1.0
+    ):
+        """
+        Initialize the sequence manager.
+        
+        Args:
+            fetch_sequence: Coroutine function returning an account's next Sequence
+            fetch_ledger_index: Coroutine function returning the current ledger index
+            ledger_window: Ledgers between submission and LastLedgerSequence
+            ledger_index_ttl: Seconds the current ledger index is reused
+        """
+        self.fetch_sequence = fetch_sequence
+        self.fetch_ledger_index = fetch_ledger_index
+        self.ledger_window = ledger_window
+        self.ledger_index_ttl = ledger_index_ttl
+        self.resyncs = 0
+        self.reclaimed = 0
+        self._accounts: Dict[str, _AccountSequences] = {}
+        self._flights = SingleFlight()
+        self._ledger_index: Optional[int] = None
+        self._ledger_index_at = 0.0
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def for_client(cls, xrp_client: Any, **kwargs) -> "SequenceManager":
+        """
+        Create a sequence manager backed by an XRP client's
+        ``getAccountSequence`` and ``getLedgerIndex`` methods.
+        """
+        return cls(xrp_client.getAccountSequence, xrp_client.getLedgerIndex, **kwargs)
+    
+    def observe_ledger(self, ledger_index: int) -> None:
+        """Record a ledger index learned elsewhere, e.g. from a ledger stream."""
+        with self._lock:
+            if self._ledger_index is None or ledger_index >= self._ledger_index:
+                self._ledger_index = ledger_index
+                self._ledger_index_at = time.monotonic()
+    
+    async def reserve(self, account: str) -> SequenceSlot:
+        """
+        Reserve the next sequence number for an account.
+        
+        Args:
+            account: Sender account address
+        
+        Returns:
+            SequenceSlot to submit the transaction with
+        """
+        ledger_index = await self._current_ledger_index()
+        state = self._accounts.get(account)
+        if state is not None:
+            with self._lock:
+                if any(last is not None and last < ledger_index for last in state.uncertain.values()):
+                    state.needs_resync = True
+        if state is None or state.needs_resync:
+            await self._flights.do(account, lambda: self._resync(account))
+            state = self._accounts[account]
+        
+        with self._lock:
+            if state.free:
+                sequence = heapq.heappop(state.free)
+            else:
+                sequence = state.next_sequence
+                state.next_sequence += 1
+            state.in_flight.add(sequence)
+        return SequenceSlot(account, sequence, ledger_index + self.ledger_window)
+    
+    def complete(self, slot: SequenceSlot, engine_result: Optional[str]) -> None:
+        """
+        Report the outcome of a transaction submitted with a slot.
+        
+        Args:
+            slot: Slot the transaction was submitted with
+            engine_result: Engine result code, or None if the outcome is unknown
+        """
+        state = self._accounts.get(slot.account)
+        if state is None:
+            return
+        with self._lock:
+            state.in_flight.discard(slot.sequence)
+            state.uncertain.pop(slot.sequence, None)
+            if engine_result is None or engine_result.startswith("ter"):
+                # The transaction may still make it in until its LastLedgerSequence
+                state.uncertain[slot.sequence] = slot.last_ledger_sequence
+            elif engine_result == "tefPAST_SEQ":
+                state.needs_resync = True
+            elif engine_result.startswith(CONSUMED_PREFIXES):
+                pass
+            else:
+                self._reclaim(state, slot.sequence)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get allocator statistics."""
+        return {
+            "accounts": len(self._accounts),
+            "resyncs": self.resyncs,
+            "reclaimed": self.reclaimed,
+            "uncertain": sum(len(state.uncertain) for state in self._accounts.values()),
+            "ledger_index": self._ledger_index
+        }
+    
+    async def _resync(self, account: str) -> None:
+        """Reload an account's sequence from the ledger and settle its slots."""
+        state = self._accounts.get(account)
+        outstanding = set()
+        if state is not None:
+            with self._lock:
+                outstanding = set(state.in_flight)
+        ledger_sequence = await self.fetch_sequence(account)
+        self.resyncs += 1
+        if state is None:
+            self._accounts[account] = _AccountSequences(ledger_sequence)
+            return
+        
+        with self._lock:
+            ledger_index = self._ledger_index or 0
+            for sequence, last in list(state.uncertain.items()):
+                if last is not None and last < ledger_index:
+                    del state.uncertain[sequence]
+            # A slot consumed while the ledger was read may be missing from its Sequence
+            consumed = {
+                sequence for sequence in outstanding
+                if sequence < state.next_sequence and sequence not in state.free
+            }
+            held = consumed | state.in_flight | set(state.uncertain)
+            top = max(held, default=ledger_sequence - 1) + 1
+            state.next_sequence = max(top, ledger_sequence)
+            free = [sequence for sequence in range(ledger_sequence, state.next_sequence) if sequence not in held]
+            self.reclaimed += len(set(free) - set(state.free))
+            state.free = free
+            heapq.heapify(state.free)
+            state.needs_resync = False
+    
+    def _reclaim(self, state: _AccountSequences, sequence: int) -> None:
+        """Make a sequence number available again."""
+        self.reclaimed += 1
+        if sequence == state.next_sequence - 1:
+            state.next_sequence -= 1
+        elif sequence not in state.free:
+            heapq.heappush(state.free, sequence)
+    
+    async def _current_ledger_index(self) -> int:
+        """Get the current ledger index, refreshing it at most every ledger_index_ttl."""
+        if self._ledger_index is None or time.monotonic() - self._ledger_index_at > self.ledger_index_ttl:
+            ledger_index = await self._flights.do(("ledger",), self.fetch_ledger_index)
+            self.observe_ledger(ledger_index)
+        return self._ledger_index
\ No newline at end of file
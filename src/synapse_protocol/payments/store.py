@@ -0,0 +1,463 @@
+"""
+Payment record storage for the A2A Payment Protocol
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from itertools import islice
+from typing import Optional, Dict, Any, List, Set
+from .types import PaymentRequest, PaymentResponse, PaymentStatus
+from .exceptions import PaymentNotFoundError
+
+logger = logging.getLogger(__name__)
+
+class PaymentRecord:
+    """Stored state of a payment: the original request plus its latest outcome."""
+    
+    __slots__ = (
+        "payment_id", "sender_account", "receiver_account", "amount", "currency",
+        "description", "metadata", "status", "created_at", "updated_at", "completed_at",
+        "transaction_hash", "error_code", "error_message"
+    )
+    
+    def __init__(
+        self,
+        payment_id: str,
+        sender_account: str,
+        receiver_account: str,
+        amount: float,
+        currency: str,
+        description: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        status: PaymentStatus = PaymentStatus.PENDING,
+        created_at: Optional[datetime] = None,
+        updated_at: Optional[datetime] = None,
+        completed_at: Optional[datetime] = None,
+        transaction_hash: Optional[str] = None,
+        error_code: Optional[str] = None,
+        error_message: Optional[str] = None
+    ):
+        self.payment_id = payment_id
+        self.sender_account = sender_account
+        self.receiver_account = receiver_account
+        self.amount = amount
+        self.currency = currency
+        self.description = description
+        self.metadata = metadata or None
+        self.status = status
+        self.created_at = created_at or datetime.utcnow()
+        self.updated_at = updated_at or self.created_at
+        self.completed_at = completed_at
+        self.transaction_hash = transaction_hash
+        self.error_code = error_code
+        self.error_message = error_message
+    
+    @classmethod
+    def from_request(cls, payment_request: PaymentRequest) -> "PaymentRecord":
+        """Create a record for a newly initiated payment request."""
+        return cls(
+            payment_id=payment_request.payment_id,
+            sender_account=payment_request.sender_account,
+            receiver_account=payment_request.receiver_account,
+            amount=payment_request.amount,
+            currency=payment_request.currency,
+            description=payment_request.description,
+            metadata=payment_request.metadata,
+            status=payment_request.status,
+            created_at=payment_request.created_at
+        )
+    
+    def apply_response(self, response: PaymentResponse) -> None:
+        """Update the record with the outcome of a processed payment."""
+        self.status = response.status
+        self.transaction_hash = response.transaction_hash or self.transaction_hash
+        self.error_code = response.error_code
+        self.error_message = response.error_message
+        self.completed_at = response.completed_at
+        self.updated_at = datetime.utcnow()
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the record to a JSON-serializable dictionary."""
+        return {
+            "payment_id": self.payment_id,
+            "sender_account": self.sender_account,
+            "receiver_account": self.receiver_account,
+            "amount": self.amount,
+            "currency": self.currency,
+            "description": self.description,
+            "metadata": self.metadata or {},
+            "status": self.status.value,
+            "transaction_hash": self.transaction_hash,
+            "error_code": self.error_code,
+            "error_message": self.error_message,
+            "created_at": self.created_at.isoformat(),
+            "updated_at": self.updated_at.isoformat(),
+            "completed_at": self.completed_at.isoformat() if self.completed_at else None
+        }
+
+class PaymentStore:
+    """
+    In-memory payment store.
+    
+    Records are keyed by payment_id, with secondary indexes on sender,
+    receiver and status so that status lookups and account history queries
+    never scan the full set of payments.
+    """
+    
+    def __init__(self):
+        """Initialize an empty store."""
+        self._records: Dict[str, PaymentRecord] = {}
+        self._by_sender: Dict[str, List[str]] = {}
+        self._by_receiver: Dict[str, List[str]] = {}
+        self._by_status: Dict[PaymentStatus, Set[str]] = {}
+        self._lock = threading.Lock()
+    
+    def add(self, record: PaymentRecord) -> None:
+        """
+        Add a new payment record.
+        
+        Args:
+            record: Record to store
+        """
+        with self._lock:
+            self._records[record.payment_id] = record
+            self._by_sender.setdefault(record.sender_account, []).append(record.payment_id)
+            self._by_receiver.setdefault(record.receiver_account, []).append(record.payment_id)
+            self._by_status.setdefault(record.status, set()).add(record.payment_id)
+    
+    def get(self, payment_id: str) -> Optional[PaymentRecord]:
+        """
+        Get a payment record.
+        
+        Args:
+            payment_id: Unique identifier of the payment
+        
+        Returns:
+            The stored record, or None if the payment is unknown
+        """
+        return self._records.get(payment_id)
+    
+    def update(self, payment_id: str, response: PaymentResponse) -> PaymentRecord:
+        """
+        Apply a payment response to the stored record.
+        
+        Args:
+            payment_id: Unique identifier of the payment
+            response: Latest response for the payment
+        
+        Returns:
+            The updated record
+        """
+        with self._lock:
+            record = self._records.get(payment_id)
+            if record is None:
+                raise PaymentNotFoundError(f"Payment {payment_id} not found")
+            old_status = record.status
+            record.apply_response(response)
+            if record.status != old_status:
+                self._by_status.get(old_status, set()).discard(payment_id)
+                self._by_status.setdefault(record.status, set()).add(payment_id)
+            return record
+    
+    def list_by_sender(self, account_id: str, limit: int = 100, offset: int = 0) -> List[PaymentRecord]:
+        """List payments sent by an account, newest first."""
+        return self._page(self._by_sender.get(account_id, []), limit, offset)
+    
+    def list_by_receiver(self, account_id: str, limit: int = 100, offset: int = 0) -> List[PaymentRecord]:
+        """List payments received by an account, newest first."""
+        return self._page(self._by_receiver.get(account_id, []), limit, offset)
+    
+    def list_by_status(self, status: PaymentStatus, limit: int = 100) -> List[PaymentRecord]:
+        """List payments currently in the given status."""
+        ids = islice(self._by_status.get(status, ()), limit)
+        return [self._records[payment_id] for payment_id in ids]
+    
+    def flush(self) -> None:
+        """Persist pending writes. The in-memory store has nothing to flush."""
+    
+    def close(self) -> None:
+        """Release store resources."""
+    
+    def _page(self, ids: List[str], limit: int, offset: int) -> List[PaymentRecord]:
+        """Return a newest-first page of records from a chronological id list."""
+        end = len(ids) - offset
+        start = max(end - limit, 0)
+        return [self._records[payment_id] for payment_id in reversed(ids[start:max(end, 0)])]
+
+class SqlitePaymentStore:
+    """
+    SQLite-backed payment store with an in-memory write-behind layer.
+    
+    Writes land in a bounded in-memory cache and a background thread
+    flushes them to an SQLite database in WAL mode in batches, so the
+    payment path never waits on a disk commit. Writes reach the database
+    within ``flush_interval`` seconds, or sooner once ``flush_batch_size``
+    of them are pending; those not yet flushed are lost if the process
+    crashes, while ``close`` flushes everything. Status lookups are served
+    from the cache and fall back to a primary key lookup; account history
+    queries use the sender, receiver and status indexes.
+    """
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS payments (
+            payment_id TEXT PRIMARY KEY,
+            sender_account TEXT NOT NULL,
+            receiver_account TEXT NOT NULL,
+            amount REAL NOT NULL,
+            currency TEXT NOT NULL,
+            description TEXT,
+            metadata TEXT,
+            status TEXT NOT NULL,
+            transaction_hash TEXT,
+            error_code TEXT,
+            error_message TEXT,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            completed_at TEXT
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_payments_sender ON payments (sender_account, created_at);
+        CREATE INDEX IF NOT EXISTS idx_payments_receiver ON payments (receiver_account, created_at);
+        CREATE INDEX IF NOT EXISTS idx_payments_status ON payments (status);
+    """
+    
+    COLUMNS = (
+        "payment_id", "sender_account", "receiver_account", "amount", "currency",
+        "description", "metadata", "status", "transaction_hash", "error_code",
+        "error_message", "created_at", "updated_at", "completed_at"
+    )
+    
+    def __init__(
+        self,
+        path: str,
+        cache_size: int = 100000,
+        flush_batch_size: int = 500,
+        flush_interval: float = 1.0
+    ):
+        """
+        Initialize the store.
+        
+        Args:
+            path: Path to the SQLite database file
+            cache_size: Maximum number of records kept in memory
+            flush_batch_size: Number of pending writes that triggers a flush
+            flush_interval: Maximum age in seconds of unflushed writes
+        """
+        self.path = path
+        self.cache_size = cache_size
+        self.flush_batch_size = flush_batch_size
+        self.flush_interval = flush_interval
+        self._cache: "OrderedDict[str, PaymentRecord]" = OrderedDict()
+        self._dirty: Dict[str, PaymentRecord] = {}
+        # Records being committed by a flush, which must stay in the cache
+        self._flushing: Dict[str, PaymentRecord] = {}
+        # Lock order: _flush_lock, then _lock, then _db_lock
+        self._flush_lock = threading.Lock()
+        self._lock = threading.RLock()
+        self._db_lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        self._wake = threading.Event()
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._run_flusher, name="payment-store-flush", daemon=True)
+        self._flusher.start()
+    
+    def add(self, record: PaymentRecord) -> None:
+        """
+        Add a new payment record.
+        
+        Args:
+            record: Record to store
+        """
+        with self._lock:
+            self._write(record)
+    
+    def get(self, payment_id: str) -> Optional[PaymentRecord]:
+        """
+        Get a payment record.
+        
+        Args:
+            payment_id: Unique identifier of the payment
+        
+        Returns:
+            The stored record, or None if the payment is unknown
+        """
+        with self._lock:
+            record = self._cache.get(payment_id)
+            if record is not None:
+                self._cache.move_to_end(payment_id)
+                return record
+            with self._db_lock:
+                row = self._conn.execute(
+                    f"SELECT {', '.join(self.COLUMNS)} FROM payments WHERE payment_id = ?",
+                    (payment_id,)
+                ).fetchone()
+            if row is None:
+                return None
+            record = self._from_row(row)
+            self._cache_record(record)
+            return record
+    
+    def update(self, payment_id: str, response: PaymentResponse) -> PaymentRecord:
+        """
+        Apply a payment response to the stored record.
+        
+        Args:
+            payment_id: Unique identifier of the payment
+            response: Latest response for the payment
+        
+        Returns:
+            The updated record
+        """
+        with self._lock:
+            record = self.get(payment_id)
+            if record is None:
+                raise PaymentNotFoundError(f"Payment {payment_id} not found")
+            record.apply_response(response)
+            self._write(record)
+            return record
+    
+    def list_by_sender(self, account_id: str, limit: int = 100, offset: int = 0) -> List[PaymentRecord]:
+        """List payments sent by an account, newest first."""
+        return self._query(
+            "WHERE sender_account = ? ORDER BY created_at DESC LIMIT ? OFFSET ?",
+            (account_id, limit, offset)
+        )
+    
+    def list_by_receiver(self, account_id: str, limit: int = 100, offset: int = 0) -> List[PaymentRecord]:
+        """List payments received by an account, newest first."""
+        return self._query(
+            "WHERE receiver_account = ? ORDER BY created_at DESC LIMIT ? OFFSET ?",
+            (account_id, limit, offset)
+        )
+    
+    def list_by_status(self, status: PaymentStatus, limit: int = 100) -> List[PaymentRecord]:
+        """List payments currently in the given status."""
+        return self._query("WHERE status = ? LIMIT ?", (status.value, limit))
+    
+    def flush(self) -> None:
+        """
+        Write all pending records to the database in one transaction.
+        
+        Writes made while the transaction commits are left for the next
+        flush. If the commit fails, the records stay pending.
+        """
+        with self._flush_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                self._flushing, self._dirty = self._dirty, {}
+                rows = [self._to_row(record) for record in self._flushing.values()]
+            placeholders = ", ".join("?" for _ in self.COLUMNS)
+            try:
+                with self._db_lock, self._conn:
+                    self._conn.executemany(
+                        f"INSERT OR REPLACE INTO payments ({', '.join(self.COLUMNS)}) "
+                        f"VALUES ({placeholders})",
+                        rows
+                    )
+            except sqlite3.Error:
+                with self._lock:
+                    for payment_id, record in self._flushing.items():
+                        self._dirty.setdefault(payment_id, record)
+                raise
+            finally:
+                with self._lock:
+                    self._flushing = {}
+                    self._trim_cache()
+    
+    def close(self) -> None:
+        """Stop the background flusher, flush pending writes and close the database."""
+        self._closed.set()
+        self._wake.set()
+        self._flusher.join()
+        self.flush()
+        with self._db_lock:
+            self._conn.close()
+    
+    def _run_flusher(self) -> None:
+        """Flush pending writes every flush_interval, or when a full batch is waiting."""
+        while not self._closed.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except sqlite3.Error:
+                logger.exception("Cannot flush payment records to %s", self.path)
+    
+    def _write(self, record: PaymentRecord) -> None:
+        """Stage a record for the next flush."""
+        self._dirty[record.payment_id] = record
+        self._cache_record(record)
+        if len(self._dirty) >= self.flush_batch_size:
+            self._wake.set()
+    
+    def _cache_record(self, record: PaymentRecord) -> None:
+        """Insert a record into the LRU cache."""
+        self._cache[record.payment_id] = record
+        self._cache.move_to_end(record.payment_id)
+        self._trim_cache()
+    
+    def _trim_cache(self) -> None:
+        """Evict least recently used records that have already been flushed."""
+        while len(self._cache) > self.cache_size:
+            payment_id = next(iter(self._cache))
+            if payment_id in self._dirty or payment_id in self._flushing:
+                break
+            del self._cache[payment_id]
+    
+    def _query(self, clause: str, params: tuple) -> List[PaymentRecord]:
+        """Run an indexed query against the database after flushing pending writes."""
+        self.flush()
+        with self._lock:
+            with self._db_lock:
+                rows = self._conn.execute(
+                    f"SELECT {', '.join(self.COLUMNS)} FROM payments {clause}",
+                    params
+                ).fetchall()
+            return [self._cache.get(row[0]) or self._from_row(row) for row in rows]
+    
+    @staticmethod
+    def _to_row(record: PaymentRecord) -> tuple:
+        """Convert a record to a database row."""
+        return (
+            record.payment_id,
+            record.sender_account,
+            record.receiver_account,
+            record.amount,
+            record.currency,
+            record.description,
+            json.dumps(record.metadata) if record.metadata else None,
+            record.status.value,
+            record.transaction_hash,
+            record.error_code,
+            record.error_message,
+            record.created_at.isoformat(timespec="microseconds"),
+            record.updated_at.isoformat(timespec="microseconds"),
+            record.completed_at.isoformat(timespec="microseconds") if record.completed_at else None
+        )
+    
+    @staticmethod
+    def _from_row(row: tuple) -> PaymentRecord:
+        """Convert a database row to a record."""
+        return PaymentRecord(
+            payment_id=row[0],
+            sender_account=row[1],
+            receiver_account=row[2],
+            amount=row[3],
+            currency=row[4],
+            description=row[5],
+            metadata=json.loads(row[6]) if row[6] else None,
+            status=PaymentStatus(row[7]),
+            transaction_hash=row[8],
+            error_code=row[9],
+            error_message=row[10],
+            created_at=datetime.fromisoformat(row[11]),
+            updated_at=datetime.fromisoformat(row[12]),
+            completed_at=datetime.fromisoformat(row[13]) if row[13] else None
+        )
\ No newline at end of file
@@ -1,18 +1,60 @@
 """
 Shared types for the payment protocol
+
+These are the canonical payment types; ``payments.models`` re-exports them
+for backwards compatibility. Requests and responses use ``__slots__`` and
+store timestamps as UTC epoch seconds and account identifiers as interned
+strings, since millions of them can be in flight at once.
 """
 
-from datetime import datetime
-from typing import Optional, Dict, Any
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, Any, Union
 from enum import Enum
+from .exceptions import ValidationError
+
+_EPOCH = datetime(1970, 1, 1)
+
+Timestamp = Union[datetime, float, None]
+
+def to_timestamp(value: Timestamp) -> Optional[float]:
+    """Convert a naive UTC or timezone-aware datetime (or epoch seconds) to epoch seconds."""
+    if value is None or isinstance(value, float):
+        return value
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return (value - _EPOCH).total_seconds()
+    return float(value)
+
+def from_timestamp(value: Optional[float]) -> Optional[datetime]:
+    """Convert epoch seconds to a naive UTC datetime."""
+    return _EPOCH + timedelta(seconds=value) if value is not None else None
+
+def _intern(value: str, field: str) -> str:
+    """Intern an identifier, rejecting values that are not strings."""
+    if not isinstance(value, str):
+        raise ValidationError(f"{field} must be a string")
+    return sys.intern(value)
 
-class PaymentStatus(Enum):
+class PaymentStatus(str, Enum):
+    """Enumeration of possible payment statuses."""
     PENDING = "pending"
+    PROCESSING = "processing"
     COMPLETED = "completed"
     FAILED = "failed"
     CANCELLED = "cancelled"
+    REFUNDED = "refunded"
 
 class PaymentRequest:
+    """A payment to be made from one account to another."""
+    
+    __slots__ = (
+        "payment_id", "sender_account", "receiver_account", "amount", "currency",
+        "description", "metadata", "status", "_created_at"
+    )
+    
     def __init__(
         self,
         payment_id: str,
@@ -23,19 +65,64 @@ class PaymentRequest:
         description: Optional[str] = None,
         metadata: Optional[Dict[str, Any]] = None,
         status: PaymentStatus = PaymentStatus.PENDING,
-        created_at: Optional[datetime] = None
+        created_at: Timestamp = None
     ):
         self.payment_id = payment_id
-        self.sender_account = sender_account
-        self.receiver_account = receiver_account
+        # Accounts and currencies repeat across many payments: share one copy
+        self.sender_account = _intern(sender_account, "sender_account")
+        self.receiver_account = _intern(receiver_account, "receiver_account")
         self.amount = amount
-        self.currency = currency
+        self.currency = _intern(currency, "currency")
         self.description = description
-        self.metadata = metadata or {}
+        self.metadata = metadata or None
         self.status = status
-        self.created_at = created_at or datetime.utcnow()
+        self._created_at = time.time() if created_at is None else to_timestamp(created_at)
+    
+    @property
+    def created_at(self) -> datetime:
+        """Creation time as a naive UTC datetime."""
+        return from_timestamp(self._created_at)
+    
+    @property
+    def created_at_timestamp(self) -> float:
+        """Creation time as UTC epoch seconds."""
+        return self._created_at
+    
+    def validate(self) -> None:
+        """Validate the payment request data."""
+        if not self.sender_account or not self.receiver_account:
+            raise ValidationError("Both sender and receiver accounts must be specified")
+        if self.amount <= 0:
+            raise ValidationError("Amount must be greater than zero")
+        if not self.currency or len(self.currency) != 3:
+            raise ValidationError("Currency must be a valid 3-letter code")
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the request to a JSON-serializable dictionary."""
+        return {
+            "payment_id": self.payment_id,
+            "sender_account": self.sender_account,
+            "receiver_account": self.receiver_account,
+            "amount": self.amount,
+            "currency": self.currency,
+            "description": self.description,
+            "metadata": self.metadata or {},
+            "status": self.status.value,
+            "created_at": from_timestamp(self._created_at).isoformat()
+        }
+    
+    def __repr__(self) -> str:
+        return (f"PaymentRequest({self.payment_id!r}, {self.sender_account!r} -> "
+                f"{self.receiver_account!r}, {self.amount} {self.currency}, {self.status.value})")
 
 class PaymentResponse:
+    """The outcome of a payment operation."""
+    
+    __slots__ = (
+        "payment_id", "status", "message", "error_code", "error_message",
+        "_completed_at", "transaction_hash"
+    )
+    
     def __init__(
         self,
         payment_id: str,
@@ -43,11 +130,84 @@ class PaymentResponse:
         message: Optional[str] = None,
         error_code: Optional[str] = None,
         error_message: Optional[str] = None,
-        completed_at: Optional[datetime] = None
+        completed_at: Timestamp = None,
+        transaction_hash: Optional[str] = None
     ):
         self.payment_id = payment_id
         self.status = status
         self.message = message
         self.error_code = error_code
         self.error_message = error_message
-        self.completed_at = completed_at 
\ No newline at end of file
+        self._completed_at = to_timestamp(completed_at)
+        self.transaction_hash = transaction_hash
+    
+    @property
+    def completed_at(self) -> Optional[datetime]:
+        """Completion time as a naive UTC datetime, if completed."""
+        return from_timestamp(self._completed_at)
+    
+    @property
+    def is_successful(self) -> bool:
+        """Check if the payment was successful."""
+        return self.status in (PaymentStatus.COMPLETED, PaymentStatus.REFUNDED)
+    
+    @property
+    def is_failed(self) -> bool:
+        """Check if the payment failed."""
+        return self.status in (PaymentStatus.FAILED, PaymentStatus.CANCELLED)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the response to a JSON-serializable dictionary."""
+        completed_at = self._completed_at
+        return {
+            "payment_id": self.payment_id,
+            "status": self.status.value,
+            "message": self.message,
+            "error_code": self.error_code,
+            "error_message": self.error_message,
+            "completed_at": from_timestamp(completed_at).isoformat() if completed_at is not None else None,
+            "transaction_hash": self.transaction_hash
+        }
+    
+    def __repr__(self) -> str:
+        return f"PaymentResponse({self.payment_id!r}, {self.status.value}, {self.message!r})"
+
+class AccountBalance:
+    """Balance information for an account."""
+    
+    __slots__ = ("account_id", "currency", "available_balance", "pending_balance", "_last_updated")
+    
+    def __init__(
+        self,
+        account_id: str,
+        currency: str,
+        available_balance: float,
+        pending_balance: float = 0.0,
+        last_updated: Timestamp = None
+    ):
+        self.account_id = _intern(account_id, "account_id")
+        self.currency = _intern(currency, "currency")
+        self.available_balance = available_balance
+        self.pending_balance = pending_balance
+        self._last_updated = time.time() if last_updated is None else to_timestamp(last_updated)
+    
+    @property
+    def last_updated(self) -> datetime:
+        """Time of the balance snapshot as a naive UTC datetime."""
+        return from_timestamp(self._last_updated)
+    
+    @property
+    def total_balance(self) -> float:
+        """Calculate total balance including pending transactions."""
+        return self.available_balance + self.pending_balance
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the balance to a JSON-serializable dictionary."""
+        return {
+            "account_id": self.account_id,
+            "currency": self.currency,
+            "available_balance": self.available_balance,
+            "pending_balance": self.pending_balance,
+            "total_balance": self.total_balance,
+            "last_updated": from_timestamp(self._last_updated).isoformat()
+        }
\ No newline at end of file
@@ -3,23 +3,64 @@ Bridge module to connect XRP implementation with A2A payment protocol
 """
 
 import json
-from typing import Dict, Any, Optional
+import os
+import threading
+from typing import Dict, Any, Optional, List, Callable, Tuple
 from datetime import datetime
 from .types import PaymentRequest, PaymentResponse, PaymentStatus
 from .exceptions import PaymentError, ValidationError
+from .cache import TTLCache, SingleFlight
 
 class XrpPaymentBridge:
     """Bridge class to handle XRP payments within the A2A protocol."""
     
-    def __init__(self, xrp_client: Any):
+    def __init__(
+        self,
+        xrp_client: Any,
+        balance_ttl: float = 2.0,
+        balance_cache_size: int = 10000,
+        verification_cache_size: int = 100000,
+        unverified_ttl: float = 4.0,
+        verification_cache_path: Optional[str] = None,
+        confirmation_tracker: Optional[Any] = None,
+        sequence_manager: Optional[Any] = None
+    ):
         """
         Initialize the XRP bridge.
         
         Args:
             xrp_client: Instance of the XRP client from the frontend
+            balance_ttl: Seconds a fetched balance is served from cache
+            balance_cache_size: Maximum number of cached account balances
+            verification_cache_size: Maximum number of cached validated transactions
+            unverified_ttl: Seconds a not-yet-validated result is served from cache
+            verification_cache_path: Optional file used to persist validated hashes
+            confirmation_tracker: Optional ConfirmationTracker; when set, payments
+                return once submitted and their final status is delivered to
+                confirmation_listeners as validated ledgers arrive
+            sequence_manager: Optional SequenceManager; when set, sequence numbers
+                and LastLedgerSequence are allocated locally per sender account
         """
         self.xrp_client = xrp_client
+        self.balance_cache = TTLCache(maxsize=balance_cache_size, ttl=balance_ttl)
+        self._balance_flights = SingleFlight()
         
+        # Validated transactions are final, so positive results never expire
+        self.verified_cache = TTLCache(maxsize=verification_cache_size)
+        self.unverified_cache = TTLCache(maxsize=verification_cache_size, ttl=unverified_ttl)
+        self.verification_cache_path = verification_cache_path
+        self._verification_flights = SingleFlight()
+        self._verified_file = None
+        self._verified_file_lines = 0
+        # Verifications finish on the threads of concurrent requests
+        self._persist_lock = threading.Lock()
+        if verification_cache_path:
+            self._load_verified_cache()
+            
+        self.confirmation_tracker = confirmation_tracker
+        self.confirmation_listeners: List[Callable[[PaymentResponse], None]] = []
+        self.sequence_manager = sequence_manager
+    
     async def process_payment(
         self,
         payment_request: PaymentRequest
@@ -44,7 +85,19 @@ class XrpPaymentBridge:
             }
             
             # Execute the XRP transaction
-            xrp_response = await self.xrp_client.sendPayment(xrp_request)
+            slot = None
+            try:
+                if self.sequence_manager:
+                    xrp_response, slot = await self._send_with_sequence(xrp_request)
+                else:
+                    xrp_response = await self.xrp_client.sendPayment(xrp_request)
+            finally:
+                # Both balances may have moved, even if only by the fee
+                self.invalidate_balance(payment_request.sender_account)
+                self.invalidate_balance(payment_request.receiver_account)
+                
+            if self.confirmation_tracker and xrp_response["success"] and xrp_response.get("transaction_hash"):
+                return self._track_confirmation(payment_request, xrp_response, slot)
             
             # Convert XRP response to A2A payment response
             return PaymentResponse(
@@ -53,7 +106,8 @@ class XrpPaymentBridge:
                 message="XRP payment processed successfully" if xrp_response["success"] else "XRP payment failed",
                 error_code=None if xrp_response["success"] else "XRP_ERROR",
                 error_message=None if xrp_response["success"] else xrp_response.get("error", "Unknown error"),
-                completed_at=datetime.utcnow() if xrp_response["success"] else None
+                completed_at=datetime.utcnow() if xrp_response["success"] else None,
+                transaction_hash=xrp_response.get("transaction_hash")
             )
             
         except Exception as e:
@@ -66,32 +120,228 @@ class XrpPaymentBridge:
                 completed_at=None
             )
             
+    async def _send_with_sequence(self, xrp_request: Dict[str, Any]) -> Tuple[Dict[str, Any], Any]:
+        """
+        Submit a payment with a locally allocated sequence number.
+        
+        A submission rejected with tefPAST_SEQ is retried once after the
+        allocator has resynchronised with the ledger.
+        
+        Args:
+            xrp_request: XRP transaction request
+            
+        Returns:
+            Tuple of the XRP client response and the SequenceSlot used
+        """
+        for _ in range(2):
+            slot = await self.sequence_manager.reserve(xrp_request["fromAgentId"])
+            xrp_request["sequence"] = slot.sequence
+            xrp_request["lastLedgerSequence"] = slot.last_ledger_sequence
+            try:
+                xrp_response = await self.xrp_client.sendPayment(xrp_request)
+            except Exception:
+                self.sequence_manager.complete(slot, None)
+                raise
+            engine_result = xrp_response.get("engine_result")
+            if engine_result is None and not xrp_response["success"] and not xrp_response.get("transaction_hash"):
+                # Failed before reaching the ledger, e.g. while signing
+                engine_result = "telLOCAL_ERROR"
+            self.sequence_manager.complete(slot, engine_result)
+            if engine_result != "tefPAST_SEQ":
+                break
+        return xrp_response, slot
+        
+    def _track_confirmation(
+        self,
+        payment_request: PaymentRequest,
+        xrp_response: Dict[str, Any],
+        slot: Optional[Any] = None
+    ) -> PaymentResponse:
+        """
+        Hand a submitted payment to the confirmation tracker.
+        
+        Args:
+            payment_request: Submitted payment request
+            xrp_response: Submission result from the XRP client
+            slot: SequenceSlot the payment was submitted with, if any
+            
+        Returns:
+            PaymentResponse marking the payment as processing
+        """
+        tx_hash = xrp_response["transaction_hash"]
+        last_ledger_sequence = xrp_response.get("last_ledger_sequence")
+        if last_ledger_sequence is None and slot is not None:
+            last_ledger_sequence = slot.last_ledger_sequence
+        future = self.confirmation_tracker.track(tx_hash, last_ledger_sequence)
+        future.add_done_callback(lambda f: self._on_confirmation(payment_request, tx_hash, f, slot))
+        return PaymentResponse(
+            payment_id=payment_request.payment_id,
+            status=PaymentStatus.PROCESSING,
+            message="XRP payment submitted, awaiting validation",
+            transaction_hash=tx_hash
+        )
+        
+    def _on_confirmation(
+        self,
+        payment_request: PaymentRequest,
+        tx_hash: str,
+        future: Any,
+        slot: Optional[Any] = None
+    ) -> None:
+        """Build the final response for a tracked payment and notify listeners."""
+        if future.cancelled():
+            return
+        try:
+            outcome = future.result()
+        except Exception as e:
+            outcome = {"validated": False, "engine_result": None, "error": str(e)}
+            
+        if self.sequence_manager and slot is not None:
+            if outcome.get("ledger_index"):
+                self.sequence_manager.observe_ledger(outcome["ledger_index"])
+            self.sequence_manager.complete(slot, outcome["engine_result"])
+            
+        success = outcome["validated"] and outcome["engine_result"] == "tesSUCCESS"
+        response = PaymentResponse(
+            payment_id=payment_request.payment_id,
+            status=PaymentStatus.COMPLETED if success else PaymentStatus.FAILED,
+            message="XRP payment validated" if success else "XRP payment failed",
+            error_code=None if success else "XRP_ERROR",
+            error_message=None if success else (outcome.get("error") or outcome["engine_result"]),
+            completed_at=datetime.utcnow() if success else None,
+            transaction_hash=tx_hash
+        )
+        self.invalidate_balance(payment_request.sender_account)
+        self.invalidate_balance(payment_request.receiver_account)
+        for listener in self.confirmation_listeners:
+            listener(response)
+            
     async def get_balance(self, account_id: str) -> float:
         """
         Get XRP balance for an account.
         
+        Balances are cached for a short TTL, and concurrent cache misses for
+        the same account share a single request to the XRP client.
+        
         Args:
             account_id: Account identifier
             
         Returns:
             Account balance in XRP
         """
+        balance = self.balance_cache.get(account_id)
+        if balance is not None:
+            return balance
+            
         try:
-            return await self.xrp_client.getBalance(account_id)
+            return await self._balance_flights.do(
+                account_id,
+                lambda: self.xrp_client.getBalance(account_id),
+                lambda result: self.balance_cache.set(account_id, result)
+            )
         except Exception as e:
             raise PaymentError(f"Failed to get XRP balance: {str(e)}")
             
+    def invalidate_balance(self, account_id: str) -> None:
+        """
+        Drop the cached balance of an account.
+        
+        A balance request already in flight is detached as well, so its
+        result, which may predate the change, is not written to the cache.
+        
+        Args:
+            account_id: Account identifier
+        """
+        self.balance_cache.invalidate(account_id)
+        self._balance_flights.forget(account_id)
+            
     async def verify_transaction(self, tx_hash: str) -> bool:
         """
         Verify an XRP transaction.
         
+        Validated transactions are cached permanently; transactions that are
+        not validated yet are cached for a short TTL.
+        
         Args:
             tx_hash: Transaction hash to verify
             
         Returns:
             True if transaction is valid and successful
         """
+        if self.verified_cache.get(tx_hash):
+            return True
+        if self.unverified_cache.get(tx_hash) is not None:
+            return False
+            
         try:
-            return await self.xrp_client.verifyTransaction(tx_hash)
+            return await self._verification_flights.do(
+                tx_hash,
+                lambda: self.xrp_client.verifyTransaction(tx_hash),
+                lambda result: self._cache_verification(tx_hash, result)
+            )
         except Exception as e:
-            raise PaymentError(f"Failed to verify XRP transaction: {str(e)}") 
\ No newline at end of file
+            raise PaymentError(f"Failed to verify XRP transaction: {str(e)}")
+            
+    def verification_stats(self) -> Dict[str, Any]:
+        """
+        Get verification cache statistics.
+        
+        Returns:
+            Statistics for the validated and not-yet-validated caches
+        """
+        return {
+            "verified": self.verified_cache.stats(),
+            "unverified": self.unverified_cache.stats(),
+            "requests": self._verification_flights.calls,
+            "coalesced": self._verification_flights.coalesced
+        }
+        
+    def close(self) -> None:
+        """Release resources held by the bridge."""
+        with self._persist_lock:
+            self._close_verified_file()
+            
+    def _close_verified_file(self) -> None:
+        if self._verified_file:
+            self._verified_file.close()
+            self._verified_file = None
+            
+    def _cache_verification(self, tx_hash: str, validated: bool) -> None:
+        """Cache a verification result, persisting validated hashes."""
+        if not validated:
+            self.unverified_cache.set(tx_hash, False)
+            return
+        self.unverified_cache.invalidate(tx_hash)
+        self.verified_cache.set(tx_hash, True)
+        if self.verification_cache_path:
+            self._persist_verified(tx_hash)
+            
+    def _load_verified_cache(self) -> None:
+        """Warm the validated-transaction cache from its persistence file."""
+        if not os.path.exists(self.verification_cache_path):
+            return
+        with open(self.verification_cache_path) as f:
+            for line in f:
+                tx_hash = line.strip()
+                if tx_hash:
+                    self.verified_cache.set(tx_hash, True)
+                    self._verified_file_lines += 1
+        
+    def _persist_verified(self, tx_hash: str) -> None:
+        """Append a validated hash to the persistence file, compacting it when it grows."""
+        with self._persist_lock:
+            self._append_verified(tx_hash)
+            
+    def _append_verified(self, tx_hash: str) -> None:
+        if self._verified_file_lines >= 2 * self.verified_cache.maxsize:
+            self._close_verified_file()
+            tmp_path = self.verification_cache_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                f.writelines(f"{key}\n" for key, _ in self.verified_cache.items())
+            os.replace(tmp_path, self.verification_cache_path)
+            self._verified_file_lines = len(self.verified_cache)
+            return
+        if self._verified_file is None:
+            self._verified_file = open(self.verification_cache_path, "a", buffering=1)
+        self._verified_file.write(f"{tx_hash}\n")
+        self._verified_file_lines += 1 
\ No newline at end of file
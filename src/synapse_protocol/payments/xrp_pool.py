@@ -0,0 +1,512 @@
+"""
+Pooled, multi-endpoint XRP Ledger JSON-RPC client
+"""
+
+import asyncio
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from typing import Dict, Any, List, Optional, Callable, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+from .exceptions import AccountNotFoundError, NetworkError, PaymentProcessingError
+
+# rippled errors that say something about the node rather than the request
+ENDPOINT_ERRORS = {"tooBusy", "noNetwork", "noCurrent", "noClosed", "amendmentBlocked", "slowDown"}
+
+DROPS_PER_XRP = Decimal("1000000")
+
+# Submission results that may still end up validated with tesSUCCESS
+PROVISIONAL_RESULTS = ("tesSUCCESS", "terQUEUED")
+
+def transaction_hash(tx_blob: str) -> str:
+    """Compute the hash of a signed transaction blob, as rippled reports it."""
+    return hashlib.sha512(b"TXN\x00" + bytes.fromhex(tx_blob)).digest()[:32].hex().upper()
+
+def wallet_signer(seeds: List[str]) -> Callable[[Dict[str, Any]], str]:
+    """
+    Create a PooledXrpClient signer that signs with local wallets.
+    
+    Requires the ``xrpl-py`` package (``pip install synapse-protocol[xrpl]``).
+    
+    Args:
+        seeds: Wallet seeds; a transaction is signed by the wallet whose
+            address is its ``Account``
+    
+    Returns:
+        Callable turning a transaction JSON into a signed tx_blob
+    """
+    try:
+        from xrpl.core.binarycodec import encode, encode_for_signing
+        from xrpl.core.keypairs import sign
+        from xrpl.wallet import Wallet
+    except ImportError:
+        raise ImportError("Signing with wallet seeds requires the xrpl-py package")
+    wallets = {}
+    for seed in seeds:
+        wallet = Wallet.from_seed(seed)
+        wallets[wallet.classic_address] = wallet
+    
+    def signer(tx_json: Dict[str, Any]) -> str:
+        wallet = wallets.get(tx_json["Account"])
+        if wallet is None:
+            raise PaymentProcessingError(f"No wallet configured for account {tx_json['Account']}")
+        tx_json = dict(tx_json, SigningPubKey=wallet.public_key)
+        tx_json["TxnSignature"] = sign(bytes.fromhex(encode_for_signing(tx_json)), wallet.private_key)
+        return encode(tx_json)
+    
+    return signer
+
+class XrplEndpoint:
+    """A rippled JSON-RPC endpoint with its keep-alive session and health statistics."""
+    
+    def __init__(self, url: str, pool_size: int = 10, timeout: float = 10.0):
+        """
+        Initialize the endpoint.
+        
+        Args:
+            url: JSON-RPC URL of the rippled server
+            pool_size: Number of keep-alive connections to keep open
+            timeout: Request timeout in seconds
+        """
+        self.url = url
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        
+        self.latency = None
+        self.error_rate = 0.0
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self._lock = threading.Lock()
+    
+    @property
+    def available(self) -> bool:
+        """Whether the endpoint is outside its failure cooldown."""
+        return time.monotonic() >= self.cooldown_until
+    
+    def score(self, default_latency: float) -> float:
+        """
+        Get the routing cost of the endpoint; lower is better.
+        
+        Args:
+            default_latency: Latency assumed for endpoints without samples
+        
+        Returns:
+            Expected latency weighted by load and error rate
+        """
+        latency = self.latency if self.latency is not None else default_latency
+        return latency * (1 + self.in_flight) / max(1.0 - self.error_rate, 0.05)
+    
+    def call(self, payload: Dict[str, Any]) -> Tuple[Dict[str, Any], float]:
+        """
+        Perform a blocking JSON-RPC call.
+        
+        Args:
+            payload: JSON-RPC request body
+        
+        Returns:
+            Parsed response body and the round-trip time in seconds
+        """
+        start = time.monotonic()
+        response = self.session.post(self.url, json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json(), time.monotonic() - start
+    
+    def record(self, latency: Optional[float], success: bool, alpha: float, cooldown: float) -> None:
+        """Fold the outcome of one call into the endpoint statistics."""
+        with self._lock:
+            self.requests += 1
+            if latency is not None:
+                self.latency = latency if self.latency is None else (
+                    alpha * latency + (1 - alpha) * self.latency
+                )
+            self.error_rate = alpha * (0.0 if success else 1.0) + (1 - alpha) * self.error_rate
+            if success:
+                self.consecutive_failures = 0
+                self.cooldown_until = 0.0
+            else:
+                self.failures += 1
+                self.consecutive_failures += 1
+                # Back off exponentially while the endpoint keeps failing
+                backoff = cooldown * 2 ** min(self.consecutive_failures - 1, 6)
+                self.cooldown_until = time.monotonic() + backoff
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get endpoint statistics."""
+        return {
+            "url": self.url,
+            "latency": self.latency,
+            "error_rate": self.error_rate,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "failures": self.failures,
+            "available": self.available
+        }
+    
+    def close(self) -> None:
+        """Close the endpoint's connections."""
+        self.session.close()
+
+class PooledXrpClient:
+    """
+    XRP client that spreads JSON-RPC calls across several rippled endpoints.
+    
+    Each endpoint keeps a pool of keep-alive connections. Calls are routed
+    to the endpoint with the lowest expected latency, based on a moving
+    average of its response times, its current load and its recent error
+    rate. Endpoints that keep failing are put in an exponentially growing
+    cooldown, and failed calls are retried on the next best endpoint.
+    
+    Submissions are never repeated on another endpoint: if ``submit`` fails
+    in transit, the transaction is looked up by hash instead. Unless
+    ``wait_for_validation`` is off, e.g. because a ConfirmationTracker
+    follows submitted payments, ``sendPayment`` polls ``tx`` until the
+    transaction is validated or its ``LastLedgerSequence`` has passed, so
+    a provisional ``tesSUCCESS`` is never reported as final.
+    
+    The client implements the interface expected by XrpPaymentBridge, so it
+    can be passed as ``xrp_client`` to PaymentProtocol.
+    """
+    
+    def __init__(
+        self,
+        urls: List[str],
+        pool_size: int = 10,
+        timeout: float = 10.0,
+        max_attempts: int = 3,
+        cooldown: float = 1.0,
+        latency_alpha: float = 0.2,
+        signer: Optional[Callable[[Dict[str, Any]], str]] = None,
+        wait_for_validation: bool = True,
+        poll_interval: float = 1.0,
+        ledger_window: int = 20,
+        fee_drops: int = 12
+    ):
+        """
+        Initialize the pooled client.
+        
+        Args:
+            urls: JSON-RPC URLs of the rippled servers
+            pool_size: Keep-alive connections per endpoint
+            timeout: Request timeout in seconds
+            max_attempts: Maximum endpoints tried per call
+            cooldown: Base cooldown in seconds for a failing endpoint
+            latency_alpha: Smoothing factor for latency and error averages
+            signer: Callable turning a transaction JSON into a signed tx_blob
+            wait_for_validation: Whether sendPayment waits until the payment
+                is validated or expired
+            poll_interval: Seconds between ``tx`` polls while waiting
+            ledger_window: Ledgers until LastLedgerSequence, when the request
+                does not set one
+            fee_drops: Transaction fee in drops
+        """
+        if not urls:
+            raise ValueError("At least one endpoint URL is required")
+        self.endpoints = [XrplEndpoint(url, pool_size, timeout) for url in urls]
+        self.max_attempts = max_attempts
+        self.cooldown = cooldown
+        self.latency_alpha = latency_alpha
+        self.signer = signer
+        self.wait_for_validation = wait_for_validation
+        self.poll_interval = poll_interval
+        self.ledger_window = ledger_window
+        self.fee_drops = fee_drops
+        self._executor = ThreadPoolExecutor(
+            max_workers=pool_size * len(self.endpoints),
+            thread_name_prefix="xrpl-rpc"
+        )
+    
+    def select_endpoint(self, exclude: Optional[List[XrplEndpoint]] = None) -> XrplEndpoint:
+        """
+        Pick the healthiest endpoint.
+        
+        Args:
+            exclude: Endpoints already tried for the current call
+        
+        Returns:
+            The endpoint to use
+        """
+        candidates = [e for e in self.endpoints if not exclude or e not in exclude] or self.endpoints
+        available = [e for e in candidates if e.available]
+        if not available:
+            # Everything is cooling down: use the one that recovers first
+            return min(candidates, key=lambda e: e.cooldown_until)
+        known = [e.latency for e in available if e.latency is not None]
+        default_latency = min(known) if known else 0.0
+        return min(available, key=lambda e: e.score(default_latency))
+    
+    async def request(
+        self,
+        method: str,
+        params: Optional[Dict[str, Any]] = None,
+        idempotent: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Perform a JSON-RPC call on the healthiest endpoint, failing over if needed.
+        
+        Args:
+            method: rippled method name
+            params: Method parameters
+            idempotent: Whether the call may be repeated on another endpoint
+                after a transport error, when the first endpoint may have
+                received it; endpoint errors reported by rippled are always
+                retried
+        
+        Returns:
+            The ``result`` object of the response
+        """
+        payload = {"method": method, "params": [params or {}]}
+        loop = asyncio.get_running_loop()
+        tried: List[XrplEndpoint] = []
+        last_error: Optional[Exception] = None
+        
+        for _ in range(min(self.max_attempts, len(self.endpoints))):
+            endpoint = self.select_endpoint(tried)
+            tried.append(endpoint)
+            endpoint.in_flight += 1
+            try:
+                body, latency = await loop.run_in_executor(self._executor, endpoint.call, payload)
+            except Exception as e:
+                endpoint.record(None, False, self.latency_alpha, self.cooldown)
+                last_error = e
+                if not idempotent:
+                    break
+                continue
+            finally:
+                endpoint.in_flight -= 1
+            
+            result = body.get("result", {})
+            if result.get("status") == "error" and result.get("error") in ENDPOINT_ERRORS:
+                endpoint.record(latency, False, self.latency_alpha, self.cooldown)
+                last_error = NetworkError(f"{endpoint.url}: {result.get('error')}")
+                continue
+            endpoint.record(latency, True, self.latency_alpha, self.cooldown)
+            return result
+        
+        raise NetworkError(f"All XRPL endpoints failed for {method}: {str(last_error)}")
+    
+    async def health_check(self) -> Dict[str, bool]:
+        """
+        Probe every endpoint with ``server_info`` and update its statistics.
+        
+        Returns:
+            Mapping of endpoint URL to whether it responded healthily
+        """
+        loop = asyncio.get_running_loop()
+        payload = {"method": "server_info", "params": [{}]}
+        
+        async def probe(endpoint: XrplEndpoint) -> bool:
+            latency = None
+            try:
+                body, latency = await loop.run_in_executor(self._executor, endpoint.call, payload)
+                healthy = body.get("result", {}).get("status") == "success"
+            except Exception:
+                healthy = False
+            endpoint.record(latency, healthy, self.latency_alpha, self.cooldown)
+            return healthy
+        
+        results = await asyncio.gather(*(probe(e) for e in self.endpoints))
+        return {e.url: healthy for e, healthy in zip(self.endpoints, results)}
+    
+    def stats(self) -> List[Dict[str, Any]]:
+        """Get per-endpoint statistics."""
+        return [endpoint.stats() for endpoint in self.endpoints]
+    
+    def close(self) -> None:
+        """Shut down the worker threads and close all connections."""
+        self._executor.shutdown(wait=False)
+        for endpoint in self.endpoints:
+            endpoint.close()
+    
+    async def sendPayment(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Sign and submit an XRP payment.
+        
+        Args:
+            request: Dictionary containing payment details
+                - fromAgentId: Sender's account address
+                - toAgentId: Receiver's account address
+                - amount: Amount in XRP
+                - memo: Optional payment memo
+                - sequence: Optional account Sequence to use
+                - lastLedgerSequence: Optional LastLedgerSequence to use
+        
+        Returns:
+            Dictionary containing the submission result; ``validated`` tells
+            whether ``engine_result`` is final
+        """
+        tx_hash = None
+        last_ledger_sequence = request.get("lastLedgerSequence")
+        try:
+            if self.signer is None:
+                raise PaymentProcessingError("No transaction signer configured")
+            tx_json = {
+                "TransactionType": "Payment",
+                "Account": request["fromAgentId"],
+                "Destination": request["toAgentId"],
+                "Amount": str(int(Decimal(str(request["amount"])) * DROPS_PER_XRP)),
+                "Fee": str(self.fee_drops)
+            }
+            if request.get("sequence") is not None:
+                tx_json["Sequence"] = request["sequence"]
+            else:
+                tx_json["Sequence"] = await self.getAccountSequence(request["fromAgentId"])
+            if last_ledger_sequence is None:
+                last_ledger_sequence = await self.getLedgerIndex() + self.ledger_window
+            tx_json["LastLedgerSequence"] = last_ledger_sequence
+            if request.get("memo"):
+                tx_json["Memos"] = [{"Memo": {"MemoData": request["memo"].encode().hex().upper()}}]
+            
+            tx_blob = self.signer(tx_json)
+            tx_hash = transaction_hash(tx_blob)
+            try:
+                result = await self.request("submit", {"tx_blob": tx_blob}, idempotent=False)
+                engine_result = result.get("engine_result")
+                if engine_result not in PROVISIONAL_RESULTS:
+                    return self._payment_result(tx_hash, last_ledger_sequence, engine_result, False, (
+                        result.get("engine_result_message") or result.get("error_message")
+                        or engine_result or result.get("error") or "Submission rejected"
+                    ))
+            except NetworkError:
+                # The submission may have reached the network: settle it by hash
+                engine_result = None
+            
+            if not self.wait_for_validation:
+                return self._payment_result(tx_hash, last_ledger_sequence, engine_result, False)
+            engine_result = await self._wait_for_validation(tx_hash, last_ledger_sequence)
+            return self._payment_result(
+                tx_hash, last_ledger_sequence, engine_result, True,
+                None if engine_result == "tesSUCCESS" else engine_result
+            )
+        except Exception as e:
+            return {
+                "success": False,
+                "transaction_hash": tx_hash,
+                "last_ledger_sequence": last_ledger_sequence,
+                "engine_result": None,
+                "validated": False,
+                "timestamp": None,
+                "error": str(e) if tx_hash is None else f"Outcome of {tx_hash} unknown: {str(e)}"
+            }
+    
+    @staticmethod
+    def _payment_result(
+        tx_hash: str,
+        last_ledger_sequence: int,
+        engine_result: Optional[str],
+        validated: bool,
+        error: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Build the sendPayment result for a signed transaction."""
+        return {
+            "success": error is None,
+            "transaction_hash": tx_hash,
+            "last_ledger_sequence": last_ledger_sequence,
+            "engine_result": engine_result,
+            "validated": validated,
+            "timestamp": None,
+            "error": error
+        }
+    
+    async def _wait_for_validation(self, tx_hash: str, last_ledger_sequence: int) -> str:
+        """
+        Poll a submitted transaction until it is validated or can no longer be.
+        
+        Args:
+            tx_hash: Hash of the transaction
+            last_ledger_sequence: LastLedgerSequence of the transaction
+        
+        Returns:
+            The validated engine result, or ``tefMAX_LEDGER`` if a validated
+            ledger past LastLedgerSequence does not contain the transaction
+        """
+        while True:
+            # Read the ledger first: a miss after it was validated is final
+            ledger_index = await self.getLedgerIndex()
+            result = await self.request("tx", {"transaction": tx_hash})
+            if result.get("validated"):
+                return result.get("meta", {}).get("TransactionResult")
+            if ledger_index > last_ledger_sequence:
+                return "tefMAX_LEDGER"
+            await asyncio.sleep(self.poll_interval)
+    
+    async def getBalance(self, account_id: str) -> float:
+        """
+        Get XRP balance for an account.
+        
+        Args:
+            account_id: Account address
+        
+        Returns:
+            Account balance in XRP
+        """
+        result = await self.request("account_info", {
+            "account": account_id,
+            "ledger_index": "validated",
+            "strict": True
+        })
+        if result.get("status") == "error":
+            if result.get("error") == "actNotFound":
+                raise AccountNotFoundError(f"Account {account_id} not found")
+            raise PaymentProcessingError(result.get("error_message") or result.get("error"))
+        return float(Decimal(result["account_data"]["Balance"]) / DROPS_PER_XRP)
+    
+    async def getAccountSequence(self, account_id: str) -> int:
+        """
+        Get the next Sequence of an account, including transactions in the open ledger.
+        
+        Args:
+            account_id: Account address
+            
+        Returns:
+            Sequence number for the account's next transaction
+        """
+        result = await self.request("account_info", {
+            "account": account_id,
+            "ledger_index": "current",
+            "strict": True
+        })
+        if result.get("status") == "error":
+            if result.get("error") == "actNotFound":
+                raise AccountNotFoundError(f"Account {account_id} not found")
+            raise PaymentProcessingError(result.get("error_message") or result.get("error"))
+        return int(result["account_data"]["Sequence"])
+        
+    async def getLedgerIndex(self) -> int:
+        """
+        Get the index of the most recent validated ledger.
+        
+        Returns:
+            Ledger index
+        """
+        result = await self.request("ledger", {"ledger_index": "validated"})
+        if result.get("status") == "error":
+            raise PaymentProcessingError(result.get("error_message") or result.get("error"))
+        return int(result.get("ledger_index") or result["ledger"]["ledger_index"])
+        
+    async def verifyTransaction(self, tx_hash: str) -> bool:
+        """
+        Verify an XRP transaction.
+        
+        Args:
+            tx_hash: Transaction hash to verify
+        
+        Returns:
+            True if transaction is validated and successful
+        """
+        result = await self.request("tx", {"transaction": tx_hash})
+        if result.get("status") == "error":
+            if result.get("error") == "txnNotFound":
+                return False
+            raise PaymentProcessingError(result.get("error_message") or result.get("error"))
+        return bool(result.get("validated")) and (
+            result.get("meta", {}).get("TransactionResult") == "tesSUCCESS"
+        )
\ No newline at end of file
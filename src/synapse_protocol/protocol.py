@@ -3,37 +3,388 @@ Core protocol implementation for Synapse Protocol.
 """
 
 import asyncio
-import json
+import itertools
 import websockets
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Awaitable, Callable, List, Optional, Sequence
+from .codec import JsonCodec, negotiated_codec, subprotocols
+from .stream import MessageStream, DROP_OLDEST
 
 class SynapseProtocol:
-    """Main protocol class for handling blockchain interactions."""
+    """
+    Main protocol class for handling blockchain interactions.
     
-    def __init__(self, websocket_url: str = "ws://localhost:8765"):
-        """Initialize the protocol with a WebSocket connection URL."""
+    One connection serves any number of concurrent callers: ``request()``
+    tags each message with a correlation ``id``, which the server echoes in
+    its reply, and a background reader hands every reply to the caller
+    waiting for it. Messages without a pending ``id`` (events, notifications)
+    go to the open ``stream()`` iterators whose topics they match, or are
+    queued for ``receive_message()`` while no stream is open. When the connection drops, the
+    reader reconnects with backoff and replays subscriptions; requests in
+    flight on the lost connection fail with ``ConnectionError``, since they
+    may or may not have reached the server.
+    
+    Messages are dictionaries on both ends; on the wire they use the most
+    compact codec both peers support, negotiated as a WebSocket subprotocol
+    during the handshake. Servers that do not negotiate get JSON text frames.
+    """
+    
+    def __init__(
+        self,
+        websocket_url: str = "ws://localhost:8765",
+        request_timeout: float = 30.0,
+        max_in_flight: int = 100,
+        reconnect: bool = True,
+        reconnect_delay: float = 0.5,
+        max_reconnect_delay: float = 30.0,
+        inbox_size: int = 1000,
+        codecs: Optional[Sequence[str]] = None
+    ):
+        """
+        Initialize the protocol with a WebSocket connection URL.
+        
+        Args:
+            websocket_url: WebSocket server URL
+            request_timeout: Default seconds to wait for a reply
+            max_in_flight: Maximum number of requests awaiting a reply;
+                further requests wait for a slot
+            reconnect: Reconnect automatically when the connection drops
+            reconnect_delay: Initial delay in seconds before reconnecting
+            max_reconnect_delay: Maximum delay in seconds between reconnects
+            inbox_size: Maximum number of unsolicited messages kept for
+                ``receive_message``; the oldest is dropped when full
+            codecs: Codecs to offer in order of preference, defaults to
+                MessagePack when installed, then JSON
+        """
         self.websocket_url = websocket_url
         self.websocket: Optional[websockets.WebSocketClientProtocol] = None
-        
+        self.codecs = codecs
+        self.codec = JsonCodec()
+        self.request_timeout = request_timeout
+        self.max_in_flight = max_in_flight
+        self.reconnect = reconnect
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.reconnects = 0
+        self._ids = itertools.count(1)
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._subscriptions: List[Dict[str, Any]] = []
+        self.inbox_size = inbox_size
+        self._inbox: Optional[MessageStream] = None
+        self._streams: List[MessageStream] = []
+        self._stream_subscriptions: Dict[MessageStream, Dict[str, Any]] = {}
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._connected: Optional[asyncio.Event] = None
+        self._reader: Optional[asyncio.Task] = None
+        self._closing = False
+    
+    @property
+    def in_flight(self) -> int:
+        """Number of requests awaiting a reply."""
+        return len(self._pending)
+    
+    @property
+    def dropped(self) -> int:
+        """Number of unsolicited messages dropped from the full inbox."""
+        return self._inbox.dropped if self._inbox is not None else 0
+    
     async def connect(self) -> None:
-        """Establish WebSocket connection."""
-        self.websocket = await websockets.connect(self.websocket_url)
+        """Establish WebSocket connection and start the reader."""
+        self._closing = False
+        if self._connected is None:
+            # Created on the loop the protocol is used from
+            self._connected = asyncio.Event()
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+            self._inbox = MessageStream(self.inbox_size, DROP_OLDEST)
+        await self._open()
+        self._connected.set()
+        if self._reader is None or self._reader.done():
+            self._reader = asyncio.get_running_loop().create_task(self._read())
+    
+    async def _open(self) -> None:
+        """Open the connection and adopt the codec the server selected."""
+        self.websocket = await websockets.connect(self.websocket_url, subprotocols=subprotocols(self.codecs))
+        self.codec = negotiated_codec(self.websocket.subprotocol)
         
     async def disconnect(self) -> None:
         """Close the WebSocket connection."""
+        self._closing = True
+        if self._reader:
+            self._reader.cancel()
+            await asyncio.gather(self._reader, return_exceptions=True)
+            self._reader = None
         if self.websocket:
             await self.websocket.close()
             self.websocket = None
-            
+        if self._connected is not None:
+            self._connected.clear()
+        self._fail_pending(ConnectionError("Disconnected from WebSocket server"))
+        for stream in list(self._streams):
+            stream.close()
+    
     async def send_message(self, message: Dict[str, Any]) -> None:
         """Send a message through the WebSocket connection."""
         if not self.websocket:
             raise ConnectionError("Not connected to WebSocket server")
-        await self.websocket.send(json.dumps(message))
-        
+        await self.websocket.send(self.codec.encode(message))
+    
     async def receive_message(self) -> Dict[str, Any]:
-        """Receive a message from the WebSocket connection."""
-        if not self.websocket:
+        """Receive the next message that is not a reply to a request."""
+        if self._inbox is None or (not self.websocket and not self._inbox.lag):
             raise ConnectionError("Not connected to WebSocket server")
-        message = await self.websocket.recv()
-        return json.loads(message) 
\ No newline at end of file
+        return await self._inbox.__anext__()
+        
+    def stream(
+        self,
+        topics: Optional[Sequence[str]] = None,
+        maxsize: int = 1000,
+        overflow: str = DROP_OLDEST,
+        subscribe: bool = True
+    ) -> MessageStream:
+        """
+        Iterate over unsolicited messages with ``async for``.
+        
+        Messages are buffered from the moment the stream is created, so none
+        are missed between creating and consuming it. Under the ``block``
+        policy a full stream stops the connection's reader, which also delays
+        replies to ``request()``.
+        
+        Args:
+            topics: Only receive messages whose ``topic`` is one of these;
+                with ``subscribe`` the server is asked to send only these
+                topics with ``{"command": "subscribe", "topics": [...]}``,
+                replayed after reconnects and undone when the stream closes
+            maxsize: Maximum number of buffered messages
+            overflow: Policy for a full buffer: ``drop_oldest``,
+                ``drop_newest`` or ``block``
+            subscribe: Subscribe to the topics on the server
+        
+        Returns:
+            MessageStream; close it with ``aclose()`` or use it as an async
+            context manager
+        """
+        subscription = {"command": "subscribe", "topics": list(topics)} if topics is not None and subscribe else None
+        stream = MessageStream(
+            maxsize,
+            overflow,
+            topics,
+            on_open=(lambda: self.subscribe(subscription)) if subscription else None,
+            on_close=self._stream_closed
+        )
+        self._streams.append(stream)
+        if subscription:
+            self._stream_subscriptions[stream] = subscription
+        return stream
+        
+    def _stream_closed(self, stream: MessageStream) -> None:
+        """Forget a closed stream and cancel its server-side subscription."""
+        if stream in self._streams:
+            self._streams.remove(stream)
+        subscription = self._stream_subscriptions.pop(stream, None)
+        if subscription is None or subscription in self._stream_subscriptions.values():
+            # No subscription, or another stream still needs it
+            return
+        if subscription not in self._subscriptions or self._closing or not self.websocket:
+            return
+        unsubscribe = {"command": "unsubscribe", "topics": subscription["topics"]}
+        task = asyncio.get_running_loop().create_task(self.unsubscribe(unsubscribe, subscription))
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+    
+    async def request(self, message: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Send a message and wait for the reply carrying its correlation id.
+        
+        Args:
+            message: Message to send; its ``id`` field is set by the protocol
+            timeout: Seconds to wait for the reply, defaults to ``request_timeout``
+        
+        Returns:
+            Reply message
+        
+        Raises:
+            ConnectionError: If not connected, or the connection dropped
+                before the reply arrived
+            asyncio.TimeoutError: If no reply arrived in time
+        """
+        if self._connected is None or self._closing:
+            raise ConnectionError("Not connected to WebSocket server")
+        timeout = self.request_timeout if timeout is None else timeout
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        async with self._slots:
+            if not self._connected.is_set():
+                # Wait out a reconnect instead of failing immediately
+                await asyncio.wait_for(self._connected.wait(), max(deadline - loop.time(), 0))
+            request_id = str(next(self._ids))
+            future = loop.create_future()
+            self._pending[request_id] = future
+            try:
+                await self.websocket.send(self.codec.encode({**message, "id": request_id}))
+                return await asyncio.wait_for(future, max(deadline - loop.time(), 0))
+            except websockets.ConnectionClosed as e:
+                raise ConnectionError(f"Connection lost: {e}") from e
+            finally:
+                self._pending.pop(request_id, None)
+                if future.done() and not future.cancelled():
+                    # Failed by the reader while the send was failing too
+                    future.exception()
+    
+    async def subscribe(self, message: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Send a subscription request, replayed on every reconnect.
+        
+        Args:
+            message: Subscription message
+            timeout: Seconds to wait for the reply
+        
+        Returns:
+            Reply message
+        """
+        reply = await self.request(message, timeout)
+        if message not in self._subscriptions:
+            self._subscriptions.append(dict(message))
+        return reply
+    
+    async def unsubscribe(self, message: Dict[str, Any], subscription: Optional[Dict[str, Any]] = None,
+                          timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Send an unsubscribe request and stop replaying a subscription.
+        
+        Args:
+            message: Unsubscribe message
+            subscription: Subscription message to forget, if not ``message``
+            timeout: Seconds to wait for the reply
+        
+        Returns:
+            Reply message
+        """
+        subscription = message if subscription is None else subscription
+        if subscription in self._subscriptions:
+            self._subscriptions.remove(subscription)
+        return await self.request(message, timeout)
+    
+    async def _read(self) -> None:
+        """Dispatch incoming messages, reconnecting when the connection drops."""
+        delay = self.reconnect_delay
+        while not self._closing:
+            websocket = self.websocket
+            try:
+                async for raw in websocket:
+                    blocked = self._dispatch(self.codec.decode(raw))
+                    if blocked:
+                        await self._deliver_blocked(*blocked)
+            except websockets.ConnectionClosed:
+                pass
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # A malformed frame ends the connection like a transport error
+                await websocket.close()
+            self._connected.clear()
+            self._fail_pending(ConnectionError("Connection to WebSocket server lost"))
+            if self._closing or not self.reconnect:
+                self.websocket = None
+                return
+            while not self._closing:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+                try:
+                    await self._open()
+                    # Replies to replayed subscriptions are queued as unsolicited messages
+                    for subscription in self._subscriptions:
+                        await self.websocket.send(self.codec.encode({**subscription, "id": f"resubscribe:{next(self._ids)}"}))
+                except (OSError, websockets.WebSocketException):
+                    continue
+                self.reconnects += 1
+                delay = self.reconnect_delay
+                self._connected.set()
+                break
+    
+    def _dispatch(self, message: Any) -> Optional[tuple]:
+        """
+        Resolve the request a reply belongs to or buffer an unsolicited message.
+        
+        Returns:
+            The message and the streams that are full under the ``block``
+            policy, if any
+        """
+        request_id = message.get("id") if isinstance(message, dict) else None
+        future = self._pending.get(str(request_id)) if request_id is not None else None
+        if future is not None:
+            if not future.done():
+                future.set_result(message)
+            return None
+        if not self._streams:
+            self._inbox.put(message)
+            return None
+        blocked = [stream for stream in self._streams if stream.matches(message) and not stream.put(message)]
+        return (message, blocked) if blocked else None
+        
+    async def _deliver_blocked(self, message: Any, streams: List[MessageStream]) -> None:
+        """Wait for room in full ``block`` streams, holding back the reader."""
+        for stream in streams:
+            while not stream.put(message):
+                await stream.wait_space()
+    
+    def _fail_pending(self, error: Exception) -> None:
+        """Fail every request awaiting a reply."""
+        for future in list(self._pending.values()):
+            if not future.done():
+                future.set_exception(error)
+
+class SynapseConnection:
+    """
+    Server side of a SynapseProtocol connection.
+    
+    Wraps an accepted WebSocket with the codec negotiated in its handshake,
+    so server handlers exchange the same dictionaries as clients.
+    """
+    
+    def __init__(self, websocket: Any):
+        """
+        Initialize the connection.
+        
+        Args:
+            websocket: Accepted WebSocket connection
+        """
+        self.websocket = websocket
+        self.codec = negotiated_codec(websocket.subprotocol)
+        
+    async def send_message(self, message: Dict[str, Any]) -> None:
+        """Send a message to the client."""
+        await self.websocket.send(self.codec.encode(message))
+        
+    async def receive_message(self) -> Dict[str, Any]:
+        """Receive a message from the client."""
+        return self.codec.decode(await self.websocket.recv())
+        
+    def __aiter__(self):
+        return self._messages()
+        
+    async def _messages(self):
+        async for raw in self.websocket:
+            yield self.codec.decode(raw)
+
+def serve(
+    handler: Callable[[SynapseConnection], Awaitable[None]],
+    host: str = "localhost",
+    port: int = 8765,
+    codecs: Optional[Sequence[str]] = None,
+    **kwargs: Any
+) -> Any:
+    """
+    Serve SynapseProtocol clients, negotiating codecs with each of them.
+    
+    Args:
+        handler: Coroutine function called with each SynapseConnection
+        host: Host to bind to
+        port: Port to bind to
+        codecs: Codecs to accept in order of preference, defaults to
+            MessagePack when installed, then JSON
+        **kwargs: Extra arguments for ``websockets.serve``
+    
+    Returns:
+        Awaitable server, as returned by ``websockets.serve``
+    """
+    async def accept(websocket: Any, *args: Any) -> None:
+        await handler(SynapseConnection(websocket))
+    return websockets.serve(accept, host, port, subprotocols=subprotocols(codecs), **kwargs)
\ No newline at end of file
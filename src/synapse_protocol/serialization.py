@@ -0,0 +1,309 @@
+"""
+Schema-compiled JSON serialization for API responses and WebSocket payloads
+"""
+
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from json.encoder import c_make_encoder, encode_basestring_ascii
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, Union
+from .payments.netting import NetTransfer
+from .payments.store import PaymentRecord
+from .payments.types import AccountBalance, PaymentRequest, PaymentResponse, from_timestamp, to_timestamp
+
+# Field kinds understood by the schema compiler
+FIELD_KINDS = ("str", "number", "bool", "enum", "datetime", "timestamp", "decimal", "mapping", "any")
+
+Field = Union[str, Tuple[str, str], Tuple[str, str, str]]
+
+# Built-in schemas: (json key, attribute, kind)
+DEFAULT_SCHEMAS: Dict[type, Tuple[Tuple[str, str, str], ...]] = {
+    PaymentRequest: (
+        ("payment_id", "payment_id", "str"),
+        ("sender_account", "sender_account", "str"),
+        ("receiver_account", "receiver_account", "str"),
+        ("amount", "amount", "number"),
+        ("currency", "currency", "str"),
+        ("description", "description", "str"),
+        ("metadata", "metadata", "mapping"),
+        ("status", "status", "enum"),
+        ("created_at", "_created_at", "timestamp")
+    ),
+    PaymentResponse: (
+        ("payment_id", "payment_id", "str"),
+        ("status", "status", "enum"),
+        ("message", "message", "str"),
+        ("error_code", "error_code", "str"),
+        ("error_message", "error_message", "str"),
+        ("completed_at", "_completed_at", "timestamp"),
+        ("transaction_hash", "transaction_hash", "str")
+    ),
+    PaymentRecord: (
+        ("payment_id", "payment_id", "str"),
+        ("sender_account", "sender_account", "str"),
+        ("receiver_account", "receiver_account", "str"),
+        ("amount", "amount", "number"),
+        ("currency", "currency", "str"),
+        ("description", "description", "str"),
+        ("metadata", "metadata", "mapping"),
+        ("status", "status", "enum"),
+        ("transaction_hash", "transaction_hash", "str"),
+        ("error_code", "error_code", "str"),
+        ("error_message", "error_message", "str"),
+        ("created_at", "created_at", "datetime"),
+        ("updated_at", "updated_at", "datetime"),
+        ("completed_at", "completed_at", "datetime")
+    ),
+    AccountBalance: (
+        ("account_id", "account_id", "str"),
+        ("currency", "currency", "str"),
+        ("available_balance", "available_balance", "number"),
+        ("pending_balance", "pending_balance", "number"),
+        ("total_balance", "total_balance", "number"),
+        ("last_updated", "_last_updated", "timestamp")
+    ),
+    NetTransfer: (
+        ("sender_account", "sender_account", "str"),
+        ("receiver_account", "receiver_account", "str"),
+        ("amount", "amount", "decimal"),
+        ("payment_ids", "payment_ids", "any")
+    )
+}
+
+class _NotNative(Exception):
+    """Raised by the stdlib encoder's default hook to fall back to compiled encoding."""
+
+def _not_native(value: Any) -> Any:
+    raise _NotNative
+
+# Containers of plain JSON values are handed to the C encoder in one call
+if c_make_encoder is not None:
+    _c_encoder = c_make_encoder(None, _not_native, encode_basestring_ascii, None, ":", ",", False, False, True)
+    
+    def _native_encode(value: Any) -> str:
+        return "".join(_c_encoder(value, 0))
+else:
+    _native_encode = json.JSONEncoder(separators=(",", ":"), check_circular=False, default=_not_native).encode
+
+def _encode_float(value: float) -> str:
+    """Encode a float the way the stdlib encoder does."""
+    if value != value:
+        return "NaN"
+    if value == float("inf"):
+        return "Infinity"
+    if value == -float("inf"):
+        return "-Infinity"
+    return float.__repr__(value)
+
+class Serializer:
+    """
+    JSON encoder that compiles one encoding function per registered type.
+    
+    A schema lists the attributes of a type together with their kind, and
+    is compiled into a single function that reads each attribute once and
+    concatenates pre-escaped key fragments with the encoded values, so no
+    intermediate dictionary is built. Enums are encoded as their values,
+    datetimes as ISO 8601 strings or epoch seconds, and Decimals as exact
+    strings. Values of other types are dispatched by type, with the
+    dispatch result cached per type.
+    """
+    
+    def __init__(self, datetime_format: str = "iso", schemas: Optional[Dict[type, Iterable[Field]]] = None):
+        """
+        Initialize the serializer.
+        
+        Args:
+            datetime_format: "iso" for ISO 8601 strings or "epoch" for epoch seconds
+            schemas: Additional schemas by type, see ``register``
+        """
+        if datetime_format not in ("iso", "epoch"):
+            raise ValueError(f"Unsupported datetime format: {datetime_format}")
+        self.datetime_format = datetime_format
+        self._schemas: Dict[type, Tuple[Tuple[str, str, str], ...]] = {}
+        self._encoders: Dict[type, Callable[[Any], str]] = {
+            str: encode_basestring_ascii,
+            int: int.__repr__,
+            float: _encode_float,
+            bool: lambda value: "true" if value else "false",
+            type(None): lambda value: "null",
+            dict: self._encode_dict,
+            list: self._encode_list,
+            tuple: self._encode_list,
+            Decimal: self._encode_decimal,
+            datetime: self._encode_datetime,
+            date: lambda value: '"' + value.isoformat() + '"'
+        }
+        for cls, fields in DEFAULT_SCHEMAS.items():
+            self.register(cls, fields)
+        for cls, fields in (schemas or {}).items():
+            self.register(cls, fields)
+    
+    def register(self, cls: type, fields: Iterable[Field]) -> None:
+        """
+        Register and compile the schema of a type.
+        
+        Args:
+            cls: Type to encode
+            fields: Attribute names, ``(key, attribute)`` pairs or
+                ``(key, attribute, kind)`` triples; the kind defaults to "any"
+        """
+        schema = []
+        for field in fields:
+            if isinstance(field, str):
+                field = (field, field, "any")
+            elif len(field) == 2:
+                field = (field[0], field[1], "any")
+            key, attribute, kind = field
+            if kind not in FIELD_KINDS:
+                raise ValueError(f"Unknown field kind {kind!r} for {cls.__name__}.{attribute}")
+            if not attribute.isidentifier():
+                raise ValueError(f"Invalid attribute name {attribute!r} for {cls.__name__}")
+            schema.append((key, attribute, kind))
+        self._schemas[cls] = tuple(schema)
+        self._encoders[cls] = self._compile(cls, self._schemas[cls])
+    
+    def encode(self, obj: Any) -> str:
+        """Encode an object to a JSON string."""
+        encoder = self._encoders.get(obj.__class__)
+        if encoder is None:
+            encoder = self._resolve(obj.__class__)
+        return encoder(obj)
+    
+    def dumps(self, obj: Any) -> bytes:
+        """Encode an object to JSON bytes."""
+        # Strings are escaped to ASCII, so the ASCII codec is safe and fastest
+        return self.encode(obj).encode("ascii")
+    
+    def socketio_json(self) -> "SocketIOJson":
+        """Get a ``json`` module replacement for Socket.IO packet encoding."""
+        return SocketIOJson(self)
+    
+    def _resolve(self, cls: type) -> Callable[[Any], str]:
+        """Find the encoder for a type without a direct entry and cache it."""
+        if issubclass(cls, Enum):
+            # Checked first: str-based enums must not be encoded as plain strings
+            encoder = lambda value: self.encode(value.value)
+        else:
+            for base in cls.__mro__[1:]:
+                if base in self._encoders:
+                    encoder = self._encoders[base]
+                    break
+            else:
+                if hasattr(cls, "to_dict"):
+                    encoder = lambda value: self._encode_dict(value.to_dict())
+                else:
+                    raise TypeError(f"Object of type {cls.__name__} is not JSON serializable")
+        self._encoders[cls] = encoder
+        return encoder
+    
+    def _compile(self, cls: type, schema: Tuple[Tuple[str, str, str], ...]) -> Callable[[Any], str]:
+        """Generate the encoding function for a schema."""
+        epoch = self.datetime_format == "epoch"
+        lines = [f"def encode_{cls.__name__}(obj):"]
+        parts = []
+        for i, (key, attribute, kind) in enumerate(schema):
+            value = f"v{i}"
+            lines.append(f"    {value} = obj.{attribute}")
+            if kind == "str":
+                expression = f'("null" if {value} is None else _str({value}))'
+            elif kind == "number":
+                expression = f'("null" if {value} is None else _float({value}) if {value}.__class__ is float else _encode({value}))'
+            elif kind == "bool":
+                expression = f'("null" if {value} is None else "true" if {value} else "false")'
+            elif kind == "enum":
+                expression = f'("null" if {value} is None else _encode({value}.value))'
+            elif kind == "datetime":
+                if epoch:
+                    expression = f'("null" if {value} is None else _datetime({value}))'
+                else:
+                    expression = f'("null" if {value} is None else \'"\' + {value}.isoformat() + \'"\')'
+            elif kind == "timestamp":
+                if epoch:
+                    expression = f'("null" if {value} is None else _float({value}))'
+                else:
+                    expression = f'("null" if {value} is None else \'"\' + _from_timestamp({value}).isoformat() + \'"\')'
+            elif kind == "decimal":
+                expression = f'("null" if {value} is None else _decimal({value}))'
+            elif kind == "mapping":
+                expression = f'(_encode({value}) if {value} else "{{}}")'
+            else:
+                expression = f"_encode({value})"
+            prefix = ("{" if i == 0 else ",") + encode_basestring_ascii(key) + ":"
+            parts.extend((repr(prefix), expression))
+        parts.append(repr("}") if schema else repr("{}"))
+        lines.append(f"    return \"\".join(({', '.join(parts)},))")
+        namespace = {
+            "_str": encode_basestring_ascii,
+            "_float": _encode_float,
+            "_encode": self.encode,
+            "_datetime": self._encode_datetime,
+            "_decimal": self._encode_decimal,
+            "_from_timestamp": from_timestamp
+        }
+        exec(compile("\n".join(lines), f"<serializer {cls.__name__}>", "exec"), namespace)
+        return namespace[f"encode_{cls.__name__}"]
+    
+    def _encode_dict(self, value: Dict[Any, Any]) -> str:
+        if not value:
+            return "{}"
+        try:
+            return _native_encode(value)
+        except _NotNative:
+            pass
+        encode = self.encode
+        return "{" + ",".join([
+            encode_basestring_ascii(key if key.__class__ is str else str(key)) + ":" + encode(item)
+            for key, item in value.items()
+        ]) + "}"
+    
+    def _encode_list(self, value: Iterable[Any]) -> str:
+        # Lists of schema objects, e.g. history pages, skip the native attempt
+        if not value or value[0].__class__ not in self._schemas:
+            try:
+                return _native_encode(value)
+            except _NotNative:
+                pass
+        encode = self.encode
+        return "[" + ",".join([encode(item) for item in value]) + "]"
+    
+    def _encode_decimal(self, value: Decimal) -> str:
+        # Quoted so no precision is lost to binary floats on the client
+        return '"' + str(value) + '"'
+    
+    def _encode_datetime(self, value: datetime) -> str:
+        if self.datetime_format == "epoch":
+            if value.tzinfo is not None:
+                return _encode_float(value.timestamp())
+            return _encode_float(to_timestamp(value))
+        return '"' + value.isoformat() + '"'
+
+class SocketIOJson:
+    """
+    Adapter exposing a Serializer through the ``dumps``/``loads`` interface
+    Socket.IO expects of its ``json`` module.
+    
+    Socket.IO frames packets as text, so emits use the string form of the
+    compiled encoders rather than the bytes form.
+    """
+    
+    def __init__(self, serializer: Serializer):
+        """
+        Initialize the adapter.
+        
+        Args:
+            serializer: Serializer used to encode packets
+        """
+        self.serializer = serializer
+    
+    def dumps(self, obj: Any, **kwargs) -> str:
+        """Encode a packet payload; stdlib keyword arguments are ignored."""
+        return self.serializer.encode(obj)
+    
+    def loads(self, s: Union[str, bytes], **kwargs) -> Any:
+        """Decode a packet payload."""
+        return json.loads(s, **kwargs)
+
+# Shared serializer with the default schemas
+serializer = Serializer()
+dumps = serializer.dumps
\ No newline at end of file
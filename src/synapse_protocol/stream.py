@@ -0,0 +1,203 @@
+"""
+Bounded message streams fed by the SynapseProtocol reader
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional
+
+# What to do with a message when a stream's buffer is full
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+BLOCK = "block"
+OVERFLOW_POLICIES = (DROP_OLDEST, DROP_NEWEST, BLOCK)
+
+class MessageStream:
+    """
+    Bounded buffer of incoming messages, consumed with ``async for``.
+    
+    The protocol's reader puts messages in and the consumer takes out every
+    buffered message per wakeup, so a burst of frames costs one task switch
+    instead of one per message. ``lag`` is the number of messages waiting;
+    under ``drop_oldest`` and ``drop_newest`` a consumer that falls behind
+    loses messages (counted in ``dropped``), under ``block`` it stops the
+    reader, which pushes back on the server through the socket.
+    """
+    
+    def __init__(
+        self,
+        maxsize: int = 1000,
+        overflow: str = DROP_OLDEST,
+        topics: Optional[Iterable[str]] = None,
+        on_open: Optional[Callable[[], Awaitable[Any]]] = None,
+        on_close: Optional[Callable[["MessageStream"], Any]] = None
+    ):
+        """
+        Initialize the stream.
+        
+        Args:
+            maxsize: Maximum number of buffered messages
+            overflow: Policy for a full buffer: ``drop_oldest``,
+                ``drop_newest`` or ``block``
+            topics: Only accept messages whose ``topic`` is one of these
+            on_open: Coroutine function awaited before the first message is
+                consumed, e.g. to subscribe on the server
+            on_close: Function called with the stream once it is closed
+        """
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.topics = frozenset(topics) if topics is not None else None
+        self.received = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.max_lag = 0
+        self.blocked_seconds = 0.0
+        self._buffer: Deque[Any] = deque()
+        self._batch: Deque[Any] = deque()
+        self._ready = asyncio.Event()
+        self._space = asyncio.Event()
+        self._on_open = on_open
+        self._on_close = on_close
+        self._closed = False
+    
+    @property
+    def lag(self) -> int:
+        """Number of messages received but not yet consumed."""
+        return len(self._buffer) + len(self._batch)
+    
+    @property
+    def closed(self) -> bool:
+        """Whether the stream accepts no more messages."""
+        return self._closed
+    
+    def matches(self, message: Any) -> bool:
+        """Whether a message belongs in this stream."""
+        if self.topics is None:
+            return True
+        return isinstance(message, dict) and message.get("topic") in self.topics
+    
+    def put(self, message: Any) -> bool:
+        """
+        Buffer a message.
+        
+        Args:
+            message: Incoming message
+        
+        Returns:
+            False if the buffer is full under the ``block`` policy and the
+            caller should ``await wait_space()`` and retry; True otherwise,
+            including when the message was dropped
+        """
+        if self._closed:
+            return True
+        if self.lag >= self.maxsize:
+            if self.overflow == BLOCK:
+                self._space.clear()
+                return False
+            self.received += 1
+            self.dropped += 1
+            if self.overflow == DROP_NEWEST:
+                return True
+            # The oldest unconsumed message may already be in the consumer's batch
+            (self._batch or self._buffer).popleft()
+        else:
+            self.received += 1
+        self._buffer.append(message)
+        lag = self.lag
+        if lag > self.max_lag:
+            self.max_lag = lag
+        self._ready.set()
+        return True
+    
+    async def wait_space(self) -> None:
+        """Wait until a full buffer has room or the stream is closed."""
+        start = time.perf_counter()
+        await self._space.wait()
+        self.blocked_seconds += time.perf_counter() - start
+    
+    async def get_batch(self) -> List[Any]:
+        """
+        Wait for messages and take all of them.
+        
+        Returns:
+            Buffered messages in arrival order
+        
+        Raises:
+            StopAsyncIteration: If the stream is closed and empty
+        """
+        batch = list(self._batch)
+        self._batch.clear()
+        if not batch:
+            batch = await self._take()
+        self._space.set()
+        self.delivered += len(batch)
+        return batch
+    
+    def __aiter__(self) -> "MessageStream":
+        return self
+    
+    async def __anext__(self) -> Any:
+        if not self._batch:
+            self._batch.extend(await self._take())
+        self.delivered += 1
+        message = self._batch.popleft()
+        if not self._space.is_set() and self.lag < self.maxsize:
+            self._space.set()
+        return message
+    
+    async def __aenter__(self) -> "MessageStream":
+        await self._open()
+        return self
+    
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+    
+    def close(self) -> None:
+        """Stop accepting messages; buffered messages can still be consumed."""
+        if self._closed:
+            return
+        self._closed = True
+        self._ready.set()
+        self._space.set()
+        if self._on_close is not None:
+            self._on_close(self)
+    
+    async def aclose(self) -> None:
+        """Close the stream and discard buffered messages."""
+        self.close()
+        self._buffer.clear()
+        self._batch.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get delivery and lag statistics."""
+        return {
+            "received": self.received,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "lag": self.lag,
+            "max_lag": self.max_lag,
+            "blocked_seconds": self.blocked_seconds,
+            "overflow": self.overflow
+        }
+    
+    async def _take(self) -> List[Any]:
+        """Wait for messages and take everything buffered."""
+        await self._open()
+        while not self._buffer:
+            if self._closed:
+                raise StopAsyncIteration
+            self._ready.clear()
+            await self._ready.wait()
+        batch = list(self._buffer)
+        self._buffer.clear()
+        return batch
+    
+    async def _open(self) -> None:
+        if self._on_open is not None:
+            on_open, self._on_open = self._on_open, None
+            await on_open()
\ No newline at end of file
@@ -2,7 +2,39 @@
 WebSocket module for real-time updates
 """
 
-from .handler import WebSocketHandler
-from .manager import WebSocketManager
+import importlib
+from typing import TYPE_CHECKING, Any, List
 
-__all__ = ['WebSocketHandler', 'WebSocketManager'] 
\ No newline at end of file
+# Public names and the modules defining them, imported on first access so the
+# asyncio server does not load Flask and the Flask server does not load the
+# asyncio handlers
+_LAZY_ATTRIBUTES = {
+    'WebSocketHandler': '.handler',
+    'WebSocketManager': '.manager',
+    'AsyncWebSocketHandler': '.async_handler',
+    'AsyncWebSocketManager': '.async_manager',
+    'UnixSocketManager': '.fanout',
+    'AsyncUnixSocketManager': '.fanout',
+    'create_client_manager': '.fanout'
+}
+
+if TYPE_CHECKING:
+    from .handler import WebSocketHandler
+    from .manager import WebSocketManager
+    from .async_handler import AsyncWebSocketHandler
+    from .async_manager import AsyncWebSocketManager
+    from .fanout import UnixSocketManager, AsyncUnixSocketManager, create_client_manager
+
+__all__ = ['WebSocketHandler', 'WebSocketManager', 'AsyncWebSocketHandler', 'AsyncWebSocketManager',
+           'UnixSocketManager', 'AsyncUnixSocketManager', 'create_client_manager']
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
\ No newline at end of file
@@ -0,0 +1,156 @@
+"""
+WebSocket handler for real-time updates on a native asyncio Socket.IO server
+"""
+
+import inspect
+from typing import Dict, Any, Optional, Set
+import socketio
+from ..payments import PaymentStatus
+from .scheduler import AsyncEmitScheduler, batch_room
+
+async def _maybe_await(result: Any) -> None:
+    # Room membership calls are coroutines only in newer python-socketio releases
+    if inspect.isawaitable(result):
+        await result
+
+class AsyncWebSocketHandler:
+    """
+    Handles WebSocket connections and real-time updates on a socketio.AsyncServer.
+    
+    Batch frames are negotiated as in ``WebSocketHandler``.
+    """
+    
+    def __init__(self, sio: socketio.AsyncServer, scheduler: Optional[AsyncEmitScheduler] = None):
+        """
+        Initialize the WebSocket handler.
+        
+        Args:
+            sio: Socket.IO asyncio server
+            scheduler: Optional scheduler coalescing and batching room updates
+        """
+        self.sio = sio
+        self.scheduler = scheduler
+        self.batch_clients: Set[str] = set()
+        self.setup_handlers()
+        
+    def setup_handlers(self) -> None:
+        """Set up WebSocket event handlers."""
+        
+        @self.sio.on('connect')
+        async def handle_connect(sid, environ, auth=None):
+            """Handle client connection."""
+            if auth:
+                self._negotiate(sid, auth)
+            await self.sio.emit('connection_response', {'data': 'Connected'}, to=sid)
+            
+        @self.sio.on('disconnect')
+        async def handle_disconnect(sid, *args):
+            """Handle client disconnection."""
+            self.batch_clients.discard(sid)
+            if self.scheduler:
+                self.scheduler.batch_subscribers.remove_client(sid)
+            
+        @self.sio.on('negotiate')
+        async def handle_negotiate(sid, data: Optional[Dict[str, Any]] = None):
+            """Handle a client announcing optional protocol features."""
+            await self.sio.emit('negotiated', self._negotiate(sid, data or {}), to=sid)
+            
+        @self.sio.on('join_room')
+        async def handle_join_room(sid, data: Dict[str, Any]):
+            """Handle room joining."""
+            room = data.get('room')
+            if room:
+                joined = room
+                if sid in self.batch_clients:
+                    joined = batch_room(room)
+                    self.scheduler.batch_subscribers.add(room, sid)
+                await _maybe_await(self.sio.enter_room(sid, joined))
+                await self.sio.emit('room_joined', {'room': room}, room=joined)
+                
+        @self.sio.on('leave_room')
+        async def handle_leave_room(sid, data: Dict[str, Any]):
+            """Handle room leaving."""
+            room = data.get('room')
+            if room:
+                left = room
+                if sid in self.batch_clients:
+                    left = batch_room(room)
+                    self.scheduler.batch_subscribers.remove(room, sid)
+                await _maybe_await(self.sio.leave_room(sid, left))
+                await self.sio.emit('room_left', {'room': room}, room=left)
+                
+    def _negotiate(self, sid: str, options: Dict[str, Any]) -> Dict[str, Any]:
+        """Record the features a client supports and return the accepted ones."""
+        batch_frames = bool(options.get('batch_frames')) and self.scheduler is not None
+        if batch_frames:
+            self.batch_clients.add(sid)
+        else:
+            self.batch_clients.discard(sid)
+        return {
+            'batch_frames': batch_frames,
+            'tick_ms': self.scheduler.tick * 1000 if self.scheduler else 0
+        }
+                
+    async def emit_payment_update(self, payment_id: str, status: PaymentStatus, data: Optional[Any] = None) -> None:
+        """
+        Emit payment status update.
+        
+        Args:
+            payment_id: Payment identifier
+            status: New payment status
+            data: Additional payment data, either a dictionary or a payment
+                object encoded by the serializer
+        """
+        payload = {
+            'payment_id': payment_id,
+            'status': status,
+            'data': data or {}
+        }
+        room = f'payment_{payment_id}'
+        if self.scheduler:
+            self.scheduler.emit(room, ('payment_update', payment_id), 'payment_update', payload)
+        else:
+            await self.sio.emit('payment_update', payload, room=room)
+        
+    async def emit_balance_update(self, account_id: str, balance: float, currency: str) -> None:
+        """
+        Emit balance update.
+        
+        Args:
+            account_id: Account identifier
+            balance: New balance
+            currency: Currency
+        """
+        payload = {
+            'account_id': account_id,
+            'balance': balance,
+            'currency': currency
+        }
+        room = f'account_{account_id}'
+        if self.scheduler:
+            self.scheduler.emit(room, ('balance_update', account_id, currency), 'balance_update', payload)
+        else:
+            await self.sio.emit('balance_update', payload, room=room)
+        
+    async def emit_error(self, error_type: str, message: str, data: Optional[Dict[str, Any]] = None, room: Optional[str] = None) -> None:
+        """
+        Emit error message to the client that caused the error.
+        
+        Args:
+            error_type: Type of error
+            message: Error message
+            data: Additional error data
+            room: Room of the requesting client, i.e. its Socket.IO session
+                id; without one the error is not emitted
+        """
+        if not room:
+            return
+        await self.sio.emit(
+            'error',
+            {
+                'type': error_type,
+                'message': message,
+                'data': data or {}
+            },
+            room=room
+        )
\ No newline at end of file
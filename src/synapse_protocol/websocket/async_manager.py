@@ -0,0 +1,151 @@
+"""
+WebSocket manager for the native asyncio (ASGI) serving mode
+"""
+
+import asyncio
+from typing import Any, Awaitable, Dict, Optional, Set
+import socketio
+from ..serialization import Serializer
+from .async_handler import AsyncWebSocketHandler
+from .scheduler import AsyncEmitScheduler
+from .fanout import create_client_manager
+from .offload import EmitQueue, AsyncEmitOffloader, DROP_OLDEST
+
+class AsyncWebSocketManager:
+    """Manages a socketio.AsyncServer sharing the event loop of the ASGI app."""
+    
+    def __init__(
+        self,
+        cors_allowed_origins: Optional[list] = None,
+        serializer: Optional[Serializer] = None,
+        emit_tick: float = 0.005,
+        message_queue: Optional[str] = None,
+        emit_queue_size: int = 10000,
+        emit_overflow: str = DROP_OLDEST
+    ):
+        """
+        Initialize the WebSocket manager.
+        
+        Args:
+            cors_allowed_origins: List of allowed CORS origins
+            serializer: Serializer used to encode emitted payloads
+            emit_tick: Seconds room updates are coalesced before being
+                emitted; 0 emits every update immediately
+            message_queue: Optional message queue URL (``unix://``, ``redis://``,
+                ``amqp://``) sharing emits between worker processes
+            emit_queue_size: Capacity of the queue emits wait in for the
+                background task sending them; 0 emits from the caller
+            emit_overflow: Policy for a full emit queue: ``drop_oldest``,
+                ``drop_newest`` or ``block``
+        """
+        self.cors_allowed_origins = cors_allowed_origins or ['*']
+        self.serializer = serializer or Serializer()
+        self.message_queue = message_queue
+        self.sio = socketio.AsyncServer(
+            async_mode='asgi',
+            cors_allowed_origins=self.cors_allowed_origins,
+            json=self.serializer.socketio_json(),
+            client_manager=create_client_manager(message_queue, asynchronous=True) if message_queue else None
+        )
+        self.scheduler = None
+        if emit_tick > 0:
+            self.scheduler = AsyncEmitScheduler(self.sio, emit_tick, local_rooms=not message_queue)
+        self.handler = AsyncWebSocketHandler(self.sio, self.scheduler)
+        self.offloader = AsyncEmitOffloader(EmitQueue(emit_queue_size, emit_overflow)) if emit_queue_size > 0 else None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: Set[asyncio.Task] = set()
+        
+    def start(self) -> None:
+        """Bind the manager to the running event loop; called at ASGI startup."""
+        self._loop = asyncio.get_running_loop()
+        if self.offloader:
+            self.offloader.start()
+        if self.scheduler:
+            self.scheduler.start()
+            
+    async def close(self) -> None:
+        """Wait for scheduled emits to finish."""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self.offloader:
+            await self.offloader.close()
+        if self.scheduler:
+            await self.scheduler.close()
+            
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get emit queue depth and scheduler statistics.
+        
+        Returns:
+            Dictionary with ``queue`` and ``scheduler`` statistics, None for
+            disabled stages
+        """
+        return {
+            'queue': self.offloader.queue.stats() if self.offloader else None,
+            'scheduler': self.scheduler.stats() if self.scheduler else None
+        }
+            
+    def schedule(self, emit: Awaitable[None]) -> None:
+        """
+        Run an emit coroutine from synchronous code, such as payment
+        listeners, which may be called outside the server's event loop.
+        
+        Args:
+            emit: Coroutine returned by one of the emit methods
+        """
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is not None and (self._loop is None or running is self._loop):
+            task = running.create_task(emit)
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        elif self._loop is not None:
+            asyncio.run_coroutine_threadsafe(emit, self._loop)
+        else:
+            # Not started yet: there is no loop to deliver the update on
+            emit.close()
+            
+    async def _submit(self, fn: Any, *args: Any) -> None:
+        if self.offloader:
+            await self.offloader.submit(fn, *args)
+        else:
+            await fn(*args)
+        
+    async def emit_payment_update(self, payment_id: str, status: str, data: Optional[Any] = None) -> None:
+        """
+        Emit payment status update.
+        
+        Args:
+            payment_id: Payment identifier
+            status: New payment status
+            data: Additional payment data, either a dictionary or a payment
+                object encoded by the serializer
+        """
+        await self._submit(self.handler.emit_payment_update, payment_id, status, data)
+        
+    async def emit_balance_update(self, account_id: str, balance: float, currency: str) -> None:
+        """
+        Emit balance update.
+        
+        Args:
+            account_id: Account identifier
+            balance: New balance
+            currency: Currency
+        """
+        await self._submit(self.handler.emit_balance_update, account_id, balance, currency)
+        
+    async def emit_error(self, error_type: str, message: str, data: Optional[dict] = None, room: Optional[str] = None) -> None:
+        """
+        Emit error message to the client that caused the error.
+        
+        Args:
+            error_type: Type of error
+            message: Error message
+            data: Additional error data
+            room: Socket.IO session id of the requesting client; without one
+                the error is not emitted
+        """
+        if room:
+            await self._submit(self.handler.emit_error, error_type, message, data, room)
\ No newline at end of file
@@ -0,0 +1,404 @@
+"""
+Cross-process Socket.IO fan-out backends
+"""
+
+import asyncio
+import errno
+import fcntl
+import os
+import selectors
+import socket
+import struct
+import threading
+import time
+from typing import Any, Dict, Iterator, Optional, Set
+from urllib.parse import urlparse
+import socketio
+from socketio.async_pubsub_manager import AsyncPubSubManager
+
+# Frames are a 4-byte big-endian length followed by the message
+_HEADER = struct.Struct(">I")
+MAX_FRAME_SIZE = 64 * 1024 * 1024
+# First byte sent on a hub connection: whether it receives frames or only publishes
+SUBSCRIBE = b"S"
+PUBLISH = b"P"
+
+class FanoutHub:
+    """
+    Relays every frame received from one Unix socket connection to all
+    subscribed connections, including the sender's if it subscribed.
+    
+    Each connection starts with one byte: ``SUBSCRIBE`` to receive frames,
+    ``PUBLISH`` to only send them; nothing is queued for publish-only
+    connections. A subscriber whose unsent frames exceed ``max_outbox``
+    bytes is disconnected rather than buffered without limit.
+    
+    The hub only parses frame lengths and forwards frames as bytes, from one
+    thread driven by a selector. Exactly one process per socket path runs
+    the hub: ownership is an exclusive ``flock`` on ``<path>.lock``, so when
+    the owning worker exits another worker can take over.
+    """
+    
+    def __init__(self, path: str, max_outbox: int = 16 * 1024 * 1024):
+        """
+        Initialize the hub.
+        
+        Args:
+            path: Filesystem path of the Unix socket
+            max_outbox: Most bytes queued for one subscriber before it is
+                dropped as too slow
+        """
+        self.path = path
+        self.max_outbox = max_outbox
+        self.frames = 0
+        self.bytes = 0
+        self.slow_drops = 0
+        self._selector = selectors.DefaultSelector()
+        self._clients: Dict[socket.socket, bytearray] = {}
+        self._roles: Dict[socket.socket, bytes] = {}
+        self._subscribers: Set[socket.socket] = set()
+        self._outbox: Dict[socket.socket, bytearray] = {}
+        self._server: Optional[socket.socket] = None
+        self._lock_file = None
+        self._thread: Optional[threading.Thread] = None
+    
+    @property
+    def connections(self) -> int:
+        """Number of connected workers."""
+        return len(self._clients)
+    
+    def try_start(self) -> bool:
+        """
+        Become the hub for the socket path if no other process is.
+        
+        Returns:
+            True if this process now runs the hub
+        """
+        if self._server is not None:
+            return True
+        lock_file = open(self.path + ".lock", "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        # Any existing socket file belongs to a hub that has exited
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o177)
+        try:
+            server.bind(self.path)
+        finally:
+            os.umask(old_umask)
+        server.listen(128)
+        server.setblocking(False)
+        self._server = server
+        self._selector.register(server, selectors.EVENT_READ)
+        self._thread = threading.Thread(target=self._run, name="socketio-fanout-hub", daemon=True)
+        self._thread.start()
+        return True
+    
+    def _run(self) -> None:
+        while True:
+            for key, events in self._selector.select():
+                sock = key.fileobj
+                if sock is self._server:
+                    self._accept()
+                    continue
+                if events & selectors.EVENT_READ:
+                    self._read(sock)
+                if events & selectors.EVENT_WRITE and sock in self._outbox:
+                    self._write(sock)
+    
+    def _accept(self) -> None:
+        try:
+            client, _ = self._server.accept()
+        except BlockingIOError:
+            return
+        client.setblocking(False)
+        self._clients[client] = bytearray()
+        self._outbox[client] = bytearray()
+        self._selector.register(client, selectors.EVENT_READ)
+    
+    def _read(self, sock: socket.socket) -> None:
+        try:
+            chunk = sock.recv(65536)
+        except BlockingIOError:
+            return
+        except OSError:
+            chunk = b""
+        if not chunk:
+            self._drop(sock)
+            return
+        buffer = self._clients[sock]
+        buffer += chunk
+        if sock not in self._roles:
+            role = bytes(buffer[:1])
+            if role not in (SUBSCRIBE, PUBLISH):
+                self._drop(sock)
+                return
+            self._roles[sock] = role
+            if role == SUBSCRIBE:
+                self._subscribers.add(sock)
+            del buffer[:1]
+        # Forward every complete frame; the header travels with the payload
+        end = 0
+        while len(buffer) - end >= _HEADER.size:
+            size = _HEADER.unpack_from(buffer, end)[0]
+            if size > MAX_FRAME_SIZE:
+                self._drop(sock)
+                return
+            if len(buffer) - end - _HEADER.size < size:
+                break
+            end += _HEADER.size + size
+            self.frames += 1
+        if end:
+            frames = bytes(buffer[:end])
+            del buffer[:end]
+            self.bytes += len(frames)
+            for client in list(self._subscribers):
+                self._send(client, frames)
+    
+    def _send(self, sock: socket.socket, data: bytes) -> None:
+        outbox = self._outbox[sock]
+        if not outbox:
+            try:
+                sent = sock.send(data)
+            except BlockingIOError:
+                sent = 0
+            except OSError:
+                self._drop(sock)
+                return
+            if sent == len(data):
+                return
+            data = data[sent:]
+            self._selector.modify(sock, selectors.EVENT_READ | selectors.EVENT_WRITE)
+        elif len(outbox) + len(data) > self.max_outbox:
+            # The subscriber is not keeping up; it reconnects and resumes from new frames
+            self.slow_drops += 1
+            self._drop(sock)
+            return
+        outbox += data
+    
+    def _write(self, sock: socket.socket) -> None:
+        outbox = self._outbox[sock]
+        try:
+            sent = sock.send(outbox)
+        except BlockingIOError:
+            return
+        except OSError:
+            self._drop(sock)
+            return
+        del outbox[:sent]
+        if not outbox:
+            self._selector.modify(sock, selectors.EVENT_READ)
+    
+    def _drop(self, sock: socket.socket) -> None:
+        if sock in self._clients:
+            self._selector.unregister(sock)
+            del self._clients[sock]
+            del self._outbox[sock]
+            self._roles.pop(sock, None)
+            self._subscribers.discard(sock)
+            sock.close()
+
+def _socket_path(url: str) -> str:
+    """Get the socket path of a ``unix://`` URL."""
+    parsed = urlparse(url)
+    if parsed.scheme != "unix":
+        raise ValueError(f"Not a unix:// URL: {url}")
+    return (parsed.netloc + parsed.path) or "/tmp/synapse-socketio.sock"
+
+def _encode_frame(message: str) -> bytes:
+    payload = message.encode("utf-8")
+    return _HEADER.pack(len(payload)) + payload
+
+def _connect(path: str, hub: FanoutHub, role: bytes) -> socket.socket:
+    """Connect to the hub of a socket path as ``role``, starting it here if none is running."""
+    for attempt in range(50):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(path)
+            sock.sendall(role)
+            return sock
+        except OSError as e:
+            sock.close()
+            if e.errno not in (errno.ENOENT, errno.ECONNREFUSED):
+                raise
+        if not hub.try_start():
+            # Another worker is (re)starting the hub
+            time.sleep(min(0.01 * (attempt + 1), 0.2))
+    raise ConnectionError(f"No fan-out hub at {path}")
+
+class UnixSocketManager(socketio.PubSubManager):
+    """
+    Socket.IO client manager publishing through a Unix domain socket hub.
+    
+    Lets several worker processes on one machine share rooms without an
+    external broker: emits are published once to the hub and each worker
+    delivers them to its own connected clients. The first worker to start
+    runs the hub in a background thread; the socket file is created with
+    owner-only permissions. Under eventlet the standard library must be
+    monkey patched, as for the other message queue backends.
+    
+    Args:
+        url: ``unix:///path/to/socket``; the socket path identifies the channel
+        channel: Unused, kept for interface compatibility
+        write_only: Only publish, e.g. from a process without a server
+        logger: Optional logger
+    """
+    name = "unix"
+    
+    def __init__(self, url: str = "unix:///tmp/synapse-socketio.sock", channel: str = "socketio",
+                 write_only: bool = False, logger: Any = None, **kwargs):
+        super().__init__(channel=channel, write_only=write_only, logger=logger, **kwargs)
+        self.path = _socket_path(url)
+        self.hub = FanoutHub(self.path)
+        self._publisher: Optional[socket.socket] = None
+        self._publish_lock = threading.Lock()
+    
+    def _publish(self, data: Dict[str, Any]) -> None:
+        frame = _encode_frame(self.json.dumps(data))
+        with self._publish_lock:
+            for attempt in range(2):
+                try:
+                    if self._publisher is None:
+                        self._publisher = _connect(self.path, self.hub, PUBLISH)
+                    self._publisher.sendall(frame)
+                    return
+                except OSError:
+                    if self._publisher is not None:
+                        self._publisher.close()
+                        self._publisher = None
+                    if attempt:
+                        self._get_logger().error("Cannot publish to fan-out hub at %s", self.path)
+    
+    def _listen(self) -> Iterator[bytes]:
+        retry_delay = 0.05
+        while True:
+            try:
+                sock = _connect(self.path, self.hub, SUBSCRIBE)
+            except OSError:
+                time.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, 2.0)
+                continue
+            retry_delay = 0.05
+            reader = sock.makefile("rb")
+            try:
+                while True:
+                    header = reader.read(_HEADER.size)
+                    if len(header) < _HEADER.size:
+                        break
+                    size = _HEADER.unpack(header)[0]
+                    if size > MAX_FRAME_SIZE:
+                        break
+                    payload = reader.read(size)
+                    if len(payload) < size:
+                        break
+                    yield payload
+            except OSError:
+                pass
+            finally:
+                reader.close()
+                sock.close()
+            # The hub went away: reconnect, taking it over if needed
+
+class AsyncUnixSocketManager(AsyncPubSubManager):
+    """
+    asyncio variant of ``UnixSocketManager`` for ``socketio.AsyncServer``.
+    
+    Args:
+        url: ``unix:///path/to/socket``; the socket path identifies the channel
+        channel: Unused, kept for interface compatibility
+        write_only: Only publish, e.g. from a process without a server
+        logger: Optional logger
+    """
+    name = "aiounix"
+    
+    def __init__(self, url: str = "unix:///tmp/synapse-socketio.sock", channel: str = "socketio",
+                 write_only: bool = False, logger: Any = None, **kwargs):
+        super().__init__(channel=channel, write_only=write_only, logger=logger, **kwargs)
+        self.path = _socket_path(url)
+        self.hub = FanoutHub(self.path)
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._publish_lock: Optional[asyncio.Lock] = None
+    
+    async def _open(self, role: bytes):
+        loop = asyncio.get_running_loop()
+        # Connecting may start the hub, which takes a file lock: keep it off the loop
+        sock = await loop.run_in_executor(None, _connect, self.path, self.hub, role)
+        sock.setblocking(False)
+        return await asyncio.open_unix_connection(sock=sock, limit=MAX_FRAME_SIZE)
+    
+    async def _publish(self, data: Dict[str, Any]) -> None:
+        frame = _encode_frame(self.json.dumps(data))
+        if self._publish_lock is None:
+            self._publish_lock = asyncio.Lock()
+        async with self._publish_lock:
+            for attempt in range(2):
+                try:
+                    if self._writer is None:
+                        _, self._writer = await self._open(PUBLISH)
+                    self._writer.write(frame)
+                    await self._writer.drain()
+                    return
+                except OSError:
+                    if self._writer is not None:
+                        self._writer.close()
+                        self._writer = None
+                    if attempt:
+                        self._get_logger().error("Cannot publish to fan-out hub at %s", self.path)
+    
+    async def _listen(self):
+        retry_delay = 0.05
+        while True:
+            try:
+                reader, writer = await self._open(SUBSCRIBE)
+            except OSError:
+                await asyncio.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, 2.0)
+                continue
+            retry_delay = 0.05
+            try:
+                while True:
+                    header = await reader.readexactly(_HEADER.size)
+                    size = _HEADER.unpack(header)[0]
+                    if size > MAX_FRAME_SIZE:
+                        break
+                    yield await reader.readexactly(size)
+            except (OSError, asyncio.IncompleteReadError):
+                pass
+            finally:
+                writer.close()
+
+def create_client_manager(url: str, asynchronous: bool = False, **kwargs) -> Any:
+    """
+    Create the Socket.IO client manager for a message queue URL.
+    
+    Args:
+        url: ``unix://`` for the local hub, ``redis://``/``rediss://`` for
+            Redis, or any Kombu URL (``amqp://`` for the asyncio server)
+        asynchronous: Create a manager for ``socketio.AsyncServer``
+        **kwargs: Extra arguments for the manager
+    
+    Returns:
+        Client manager instance
+    """
+    scheme = urlparse(url).scheme
+    if scheme == "unix":
+        return (AsyncUnixSocketManager if asynchronous else UnixSocketManager)(url, **kwargs)
+    if scheme in ("redis", "rediss"):
+        return (socketio.AsyncRedisManager if asynchronous else socketio.RedisManager)(url, **kwargs)
+    if asynchronous:
+        if scheme.startswith("amqp"):
+            return socketio.AsyncAioPikaManager(url, **kwargs)
+        raise ValueError(f"Unsupported message queue for the asyncio server: {url}")
+    if scheme == "kafka":
+        return socketio.KafkaManager(url, **kwargs)
+    if scheme.startswith("zmq"):
+        return socketio.ZmqManager(url, **kwargs)
+    return socketio.KombuManager(url, **kwargs)
\ No newline at end of file
@@ -2,70 +2,114 @@
 WebSocket handler for real-time updates
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Set
+from flask import request
 from flask_socketio import SocketIO, emit, join_room, leave_room
 from ..payments import PaymentStatus
+from .scheduler import EmitScheduler, batch_room
 
 class WebSocketHandler:
-    """Handles WebSocket connections and real-time updates."""
+    """
+    Handles WebSocket connections and real-time updates.
     
-    def __init__(self, socketio: SocketIO):
+    With a scheduler, payment and balance updates are coalesced per room
+    and tick. Clients opt in to batch frames by sending ``negotiate`` with
+    ``{'batch_frames': true}`` (or the same ``auth`` payload on connect)
+    before joining rooms; they then receive one ``update_batch`` event per
+    room and tick instead of individual events.
+    """
+    
+    def __init__(self, socketio: SocketIO, scheduler: Optional[EmitScheduler] = None):
         """
         Initialize the WebSocket handler.
         
         Args:
             socketio: Flask-SocketIO instance
+            scheduler: Optional scheduler coalescing and batching room updates
         """
         self.socketio = socketio
+        self.scheduler = scheduler
+        self.batch_clients: Set[str] = set()
         self.setup_handlers()
         
     def setup_handlers(self) -> None:
         """Set up WebSocket event handlers."""
         
         @self.socketio.on('connect')
-        def handle_connect():
+        def handle_connect(auth: Optional[Dict[str, Any]] = None):
             """Handle client connection."""
+            if auth:
+                self._negotiate(request.sid, auth)
             emit('connection_response', {'data': 'Connected'})
             
         @self.socketio.on('disconnect')
-        def handle_disconnect():
+        def handle_disconnect(*args):
             """Handle client disconnection."""
-            pass
+            self.batch_clients.discard(request.sid)
+            if self.scheduler:
+                self.scheduler.batch_subscribers.remove_client(request.sid)
+            
+        @self.socketio.on('negotiate')
+        def handle_negotiate(data: Optional[Dict[str, Any]] = None):
+            """Handle a client announcing optional protocol features."""
+            emit('negotiated', self._negotiate(request.sid, data or {}))
             
         @self.socketio.on('join_room')
         def handle_join_room(data: Dict[str, Any]):
             """Handle room joining."""
             room = data.get('room')
             if room:
-                join_room(room)
-                emit('room_joined', {'room': room}, room=room)
+                joined = room
+                if request.sid in self.batch_clients:
+                    joined = batch_room(room)
+                    self.scheduler.batch_subscribers.add(room, request.sid)
+                join_room(joined)
+                emit('room_joined', {'room': room}, room=joined)
                 
         @self.socketio.on('leave_room')
         def handle_leave_room(data: Dict[str, Any]):
             """Handle room leaving."""
             room = data.get('room')
             if room:
-                leave_room(room)
-                emit('room_left', {'room': room}, room=room)
+                left = room
+                if request.sid in self.batch_clients:
+                    left = batch_room(room)
+                    self.scheduler.batch_subscribers.remove(room, request.sid)
+                leave_room(left)
+                emit('room_left', {'room': room}, room=left)
+                
+    def _negotiate(self, sid: str, options: Dict[str, Any]) -> Dict[str, Any]:
+        """Record the features a client supports and return the accepted ones."""
+        batch_frames = bool(options.get('batch_frames')) and self.scheduler is not None
+        if batch_frames:
+            self.batch_clients.add(sid)
+        else:
+            self.batch_clients.discard(sid)
+        return {
+            'batch_frames': batch_frames,
+            'tick_ms': self.scheduler.tick * 1000 if self.scheduler else 0
+        }
                 
-    def emit_payment_update(self, payment_id: str, status: PaymentStatus, data: Optional[Dict[str, Any]] = None) -> None:
+    def emit_payment_update(self, payment_id: str, status: PaymentStatus, data: Optional[Any] = None) -> None:
         """
         Emit payment status update.
         
         Args:
             payment_id: Payment identifier
             status: New payment status
-            data: Additional payment data
+            data: Additional payment data, either a dictionary or a payment
+                object encoded by the serializer
         """
-        self.socketio.emit(
-            'payment_update',
-            {
-                'payment_id': payment_id,
-                'status': status,
-                'data': data or {}
-            },
-            room=f'payment_{payment_id}'
-        )
+        payload = {
+            'payment_id': payment_id,
+            'status': status,
+            'data': data or {}
+        }
+        room = f'payment_{payment_id}'
+        if self.scheduler:
+            self.scheduler.emit(room, ('payment_update', payment_id), 'payment_update', payload)
+        else:
+            self.socketio.emit('payment_update', payload, room=room)
         
     def emit_balance_update(self, account_id: str, balance: float, currency: str) -> None:
         """
@@ -76,30 +120,36 @@ class WebSocketHandler:
             balance: New balance
             currency: Currency
         """
-        self.socketio.emit(
-            'balance_update',
-            {
-                'account_id': account_id,
-                'balance': balance,
-                'currency': currency
-            },
-            room=f'account_{account_id}'
-        )
+        payload = {
+            'account_id': account_id,
+            'balance': balance,
+            'currency': currency
+        }
+        room = f'account_{account_id}'
+        if self.scheduler:
+            self.scheduler.emit(room, ('balance_update', account_id, currency), 'balance_update', payload)
+        else:
+            self.socketio.emit('balance_update', payload, room=room)
         
-    def emit_error(self, error_type: str, message: str, data: Optional[Dict[str, Any]] = None) -> None:
+    def emit_error(self, error_type: str, message: str, data: Optional[Dict[str, Any]] = None, room: Optional[str] = None) -> None:
         """
-        Emit error message.
+        Emit error message to the client that caused the error.
         
         Args:
             error_type: Type of error
             message: Error message
             data: Additional error data
+            room: Room of the requesting client, i.e. its Socket.IO session
+                id; without one the error is not emitted
         """
+        if not room:
+            return
         self.socketio.emit(
             'error',
             {
                 'type': error_type,
                 'message': message,
                 'data': data or {}
-            }
+            },
+            room=room
         ) 
\ No newline at end of file
@@ -2,26 +2,59 @@
 WebSocket manager for handling server initialization and configuration
 """
 
-from typing import Optional
+from typing import Any, Dict, Optional
 from flask import Flask
 from flask_socketio import SocketIO
+from ..serialization import Serializer
 from .handler import WebSocketHandler
+from .scheduler import EmitScheduler
+from .fanout import create_client_manager
+from .offload import EmitQueue, EmitOffloader, DROP_OLDEST
 
 class WebSocketManager:
     """Manages WebSocket server initialization and configuration."""
     
-    def __init__(self, app: Flask, cors_allowed_origins: Optional[list] = None):
+    def __init__(
+        self,
+        app: Flask,
+        cors_allowed_origins: Optional[list] = None,
+        serializer: Optional[Serializer] = None,
+        emit_tick: float = 0.005,
+        message_queue: Optional[str] = None,
+        emit_queue_size: int = 10000,
+        emit_overflow: str = DROP_OLDEST
+    ):
         """
         Initialize the WebSocket manager.
         
         Args:
             app: Flask application instance
             cors_allowed_origins: List of allowed CORS origins
+            serializer: Serializer used to encode emitted payloads
+            emit_tick: Seconds room updates are coalesced before being
+                emitted; 0 emits every update immediately
+            message_queue: Optional message queue URL (``unix://``, ``redis://``,
+                Kombu) sharing emits between worker processes
+            emit_queue_size: Capacity of the queue emits wait in for the
+                background task sending them; 0 emits from the caller
+            emit_overflow: Policy for a full emit queue: ``drop_oldest``,
+                ``drop_newest`` or ``block``
         """
         self.app = app
         self.cors_allowed_origins = cors_allowed_origins or ['*']
+        self.serializer = serializer or Serializer()
+        self.message_queue = message_queue
         self.socketio = self._initialize_socketio()
-        self.handler = WebSocketHandler(self.socketio)
+        self.scheduler = None
+        if emit_tick > 0:
+            self.scheduler = EmitScheduler(self.socketio, emit_tick, local_rooms=not message_queue)
+            self.scheduler.start()
+        self.handler = WebSocketHandler(self.socketio, self.scheduler)
+        self.offloader = None
+        if emit_queue_size > 0:
+            # HTTP handlers only enqueue; serialization and fan-out happen in the background
+            self.offloader = EmitOffloader(self.socketio, EmitQueue(emit_queue_size, emit_overflow))
+            self.offloader.start()
         
     def _initialize_socketio(self) -> SocketIO:
         """
@@ -30,12 +63,18 @@ class WebSocketManager:
         Returns:
             SocketIO instance
         """
+        options = {}
+        if self.message_queue:
+            # Emits are published once and delivered by the worker holding each room's sockets
+            options['client_manager'] = create_client_manager(self.message_queue)
         return SocketIO(
             self.app,
             cors_allowed_origins=self.cors_allowed_origins,
             async_mode='eventlet',
+            json=self.serializer.socketio_json(),
             logger=True,
-            engineio_logger=True
+            engineio_logger=True,
+            **options
         )
         
     def run(self, host: str = '0.0.0.0', port: int = 5000, debug: bool = False) -> None:
@@ -55,16 +94,36 @@ class WebSocketManager:
             use_reloader=False
         )
         
-    def emit_payment_update(self, payment_id: str, status: str, data: Optional[dict] = None) -> None:
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get emit queue depth and scheduler statistics.
+        
+        Returns:
+            Dictionary with ``queue`` and ``scheduler`` statistics, None for
+            disabled stages
+        """
+        return {
+            'queue': self.offloader.queue.stats() if self.offloader else None,
+            'scheduler': self.scheduler.stats() if self.scheduler else None
+        }
+        
+    def _submit(self, fn: Any, *args: Any) -> None:
+        if self.offloader:
+            self.offloader.submit(fn, *args)
+        else:
+            fn(*args)
+        
+    def emit_payment_update(self, payment_id: str, status: str, data: Optional[Any] = None) -> None:
         """
         Emit payment status update.
         
         Args:
             payment_id: Payment identifier
             status: New payment status
-            data: Additional payment data
+            data: Additional payment data, either a dictionary or a payment
+                object encoded by the serializer
         """
-        self.handler.emit_payment_update(payment_id, status, data)
+        self._submit(self.handler.emit_payment_update, payment_id, status, data)
         
     def emit_balance_update(self, account_id: str, balance: float, currency: str) -> None:
         """
@@ -75,15 +134,18 @@ class WebSocketManager:
             balance: New balance
             currency: Currency
         """
-        self.handler.emit_balance_update(account_id, balance, currency)
+        self._submit(self.handler.emit_balance_update, account_id, balance, currency)
         
-    def emit_error(self, error_type: str, message: str, data: Optional[dict] = None) -> None:
+    def emit_error(self, error_type: str, message: str, data: Optional[dict] = None, room: Optional[str] = None) -> None:
         """
-        Emit error message.
+        Emit error message to the client that caused the error.
         
         Args:
             error_type: Type of error
             message: Error message
             data: Additional error data
+            room: Socket.IO session id of the requesting client; without one
+                the error is not emitted
         """
-        self.handler.emit_error(error_type, message, data) 
\ No newline at end of file
+        if room:
+            self._submit(self.handler.emit_error, error_type, message, data, room) 
\ No newline at end of file
@@ -0,0 +1,253 @@
+"""
+Bounded emit queues moving socket emits off the request path
+"""
+
+import asyncio
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+# What to do with an emit when the queue is full
+DROP_OLDEST = 'drop_oldest'
+DROP_NEWEST = 'drop_newest'
+BLOCK = 'block'
+OVERFLOW_POLICIES = (DROP_OLDEST, DROP_NEWEST, BLOCK)
+
+Job = Tuple[Callable[..., Any], Tuple[Any, ...]]
+
+class EmitQueue:
+    """
+    Thread-safe bounded FIFO of pending emits with depth metrics.
+    
+    The queue only decides what to keep; the offloaders below own the
+    background task draining it and the waiting done by the ``block`` policy.
+    """
+    
+    def __init__(self, maxsize: int = 10000, overflow: str = DROP_OLDEST):
+        """
+        Initialize the queue.
+        
+        Args:
+            maxsize: Maximum number of pending emits
+            overflow: Policy for a full queue: ``drop_oldest`` discards the
+                oldest pending emit, ``drop_newest`` discards the new one and
+                ``block`` makes the producer wait for room
+        """
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.enqueued = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.failed = 0
+        self.high_water = 0
+        self._jobs: Deque[Job] = deque()
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._jobs)
+    
+    def put(self, job: Job, force: bool = False) -> bool:
+        """
+        Add an emit unless the queue is full.
+        
+        Args:
+            job: Emit function and its arguments
+            force: Apply ``drop_oldest`` or ``drop_newest`` when full, even
+                under the ``block`` policy; used once a producer gave up waiting
+        
+        Returns:
+            False if the queue is full under the ``block`` policy and the
+            caller should wait; True otherwise, including when the emit was
+            dropped
+        """
+        with self._lock:
+            if len(self._jobs) >= self.maxsize:
+                if self.overflow == BLOCK and not force:
+                    return False
+                self.dropped += 1
+                if self.overflow == DROP_OLDEST:
+                    self._jobs.popleft()
+                else:
+                    return True
+            self._jobs.append(job)
+            self.enqueued += 1
+            if len(self._jobs) > self.high_water:
+                self.high_water = len(self._jobs)
+        return True
+    
+    def drain(self) -> List[Job]:
+        """Take all pending emits."""
+        with self._lock:
+            jobs = list(self._jobs)
+            self._jobs.clear()
+        return jobs
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get queue depth and delivery statistics."""
+        return {
+            "depth": len(self._jobs),
+            "maxsize": self.maxsize,
+            "high_water": self.high_water,
+            "overflow": self.overflow,
+            "enqueued": self.enqueued,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "failed": self.failed
+        }
+
+class EmitOffloader:
+    """
+    Runs emits of a Flask-SocketIO server from a background task instead of
+    the HTTP handler that produced them.
+    """
+    
+    def __init__(self, socketio: Any, queue: EmitQueue, idle_timeout: float = 1.0, block_timeout: float = 0.05):
+        """
+        Initialize the offloader.
+        
+        Args:
+            socketio: Flask-SocketIO instance
+            queue: Queue of pending emits
+            idle_timeout: Seconds the drain task waits for a signal before
+                checking the queue anyway
+            block_timeout: Seconds a producer waits for room under the
+                ``block`` policy before the newest emit is dropped
+        """
+        self.socketio = socketio
+        self.queue = queue
+        self.idle_timeout = idle_timeout
+        self.block_timeout = block_timeout
+        self._task = None
+        # Events of the server's async mode, so waiting yields to other green threads
+        self._pending = socketio.server.eio.create_event()
+        self._space = socketio.server.eio.create_event()
+    
+    def start(self) -> None:
+        """
+        Start the drain task.
+        
+        The task sleeps until a producer signals a queued emit. Its wait is
+        bounded by ``idle_timeout``, so emits queued from a thread the
+        server's async mode does not manage, whose signal may not wake it,
+        are still delivered.
+        """
+        if self._task is None:
+            self._task = self.socketio.start_background_task(self._run)
+    
+    def submit(self, fn: Callable[..., Any], *args: Any) -> None:
+        """
+        Queue an emit.
+        
+        Args:
+            fn: Function performing the emit
+            *args: Arguments of the function
+        """
+        job = (fn, args)
+        if not self.queue.put(job):
+            self._space.clear()
+            if not self.queue.put(job):
+                self._space.wait(self.block_timeout)
+                if not self.queue.put(job):
+                    self.queue.put(job, force=True)
+        self._pending.set()
+    
+    def flush(self) -> None:
+        """Run every pending emit now."""
+        jobs = self.queue.drain()
+        self._space.set()
+        for fn, args in jobs:
+            try:
+                fn(*args)
+                self.queue.delivered += 1
+            except Exception:
+                # One failed emit must not stop the others
+                self.queue.failed += 1
+    
+    def _run(self) -> None:
+        while True:
+            self._pending.wait(self.idle_timeout)
+            self._pending.clear()
+            self.flush()
+
+class AsyncEmitOffloader:
+    """
+    Runs emit coroutines of a socketio.AsyncServer from a background task on
+    its event loop instead of the HTTP handler that produced them.
+    """
+    
+    def __init__(self, queue: EmitQueue, block_timeout: float = 0.05):
+        """
+        Initialize the offloader.
+        
+        Args:
+            queue: Queue of pending emits
+            block_timeout: Seconds a producer waits for room under the
+                ``block`` policy before the newest emit is dropped
+        """
+        self.queue = queue
+        self.block_timeout = block_timeout
+        self._task: Optional[asyncio.Task] = None
+        self._pending: Optional[asyncio.Event] = None
+        self._space: Optional[asyncio.Event] = None
+        self._closing = False
+    
+    def start(self) -> None:
+        """Start the drain task on the running event loop."""
+        if self._task is None:
+            self._pending = asyncio.Event()
+            self._space = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+            if len(self.queue):
+                self._pending.set()
+    
+    async def submit(self, fn: Callable[..., Any], *args: Any) -> None:
+        """
+        Queue an emit; must be called on the server's event loop.
+        
+        Args:
+            fn: Coroutine function performing the emit
+            *args: Arguments of the function
+        """
+        job = (fn, args)
+        if not self.queue.put(job):
+            if self._space is not None:
+                self._space.clear()
+                try:
+                    await asyncio.wait_for(self._space.wait(), self.block_timeout)
+                except asyncio.TimeoutError:
+                    pass
+            self.queue.put(job, force=True)
+        if self._pending is not None:
+            self._pending.set()
+    
+    async def flush(self) -> None:
+        """Run every pending emit now."""
+        jobs = self.queue.drain()
+        if self._space is not None:
+            self._space.set()
+        for fn, args in jobs:
+            try:
+                await fn(*args)
+                self.queue.delivered += 1
+            except Exception:
+                # One failed emit must not stop the others
+                self.queue.failed += 1
+    
+    async def close(self) -> None:
+        """Stop the drain task and run the emits still pending."""
+        if self._task is not None:
+            self._closing = True
+            self._pending.set()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+    
+    async def _run(self) -> None:
+        while not self._closing:
+            await self._pending.wait()
+            self._pending.clear()
+            await self.flush()
\ No newline at end of file
@@ -0,0 +1,311 @@
+"""
+Coalescing, batching emit schedulers for room updates
+"""
+
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Set, Tuple
+
+# Clients that negotiated batch frames join "<room><BATCH_ROOM_SUFFIX>" instead of the room
+BATCH_ROOM_SUFFIX = '#batch'
+# Event carrying all updates of one room and tick
+BATCH_EVENT = 'update_batch'
+
+Update = Tuple[str, Any]
+
+logger = logging.getLogger(__name__)
+
+def batch_room(room: str) -> str:
+    """Get the room batch-capable subscribers of a room join."""
+    return room + BATCH_ROOM_SUFFIX
+
+class EmitBuffer:
+    """
+    Per-room buffer keeping only the latest update per key.
+    
+    Keys identify the state an update describes, e.g. ``('payment_update',
+    payment_id)``, so a newer update replaces an older one still waiting in
+    the buffer while rooms and keys keep their first-seen order.
+    """
+    
+    def __init__(self):
+        self.updates = 0
+        self.coalesced = 0
+        self._rooms: Dict[str, 'OrderedDict[Hashable, Update]'] = {}
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._rooms)
+    
+    def add(self, room: str, key: Hashable, event: str, data: Any) -> bool:
+        """
+        Buffer an update.
+        
+        Args:
+            room: Room the update is emitted to
+            key: Identity of the state the update describes
+            event: Event name
+            data: Event payload
+        
+        Returns:
+            True if the buffer was empty before this update
+        """
+        with self._lock:
+            was_empty = not self._rooms
+            pending = self._rooms.get(room)
+            if pending is None:
+                pending = self._rooms[room] = OrderedDict()
+            if key in pending:
+                self.coalesced += 1
+            pending[key] = (event, data)
+            self.updates += 1
+        return was_empty
+    
+    def drain(self) -> List[Tuple[str, List[Update]]]:
+        """Take all buffered updates grouped by room."""
+        with self._lock:
+            rooms, self._rooms = self._rooms, {}
+        return [(room, list(pending.values())) for room, pending in rooms.items()]
+
+class BatchSubscribers:
+    """
+    Clients subscribed to the batch frames of each room.
+    
+    Handlers record joins and leaves of batch rooms here, so a flush only
+    builds and emits the ``update_batch`` frame of rooms someone receives.
+    Only subscribers connected to this server are known, so when rooms span
+    several servers through a message queue, every room counts as subscribed.
+    """
+    
+    def __init__(self, local: bool = True):
+        """
+        Initialize the record.
+        
+        Args:
+            local: Whether every subscriber is connected to this server
+        """
+        self.local = local
+        self._rooms: Dict[str, Set[str]] = {}
+        self._clients: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+    
+    def __contains__(self, room: str) -> bool:
+        return room in self._rooms or not self.local
+    
+    def add(self, room: str, sid: str) -> None:
+        """Record a client joining a room's batch frames."""
+        with self._lock:
+            self._rooms.setdefault(room, set()).add(sid)
+            self._clients.setdefault(sid, set()).add(room)
+    
+    def remove(self, room: str, sid: str) -> None:
+        """Record a client leaving a room's batch frames."""
+        with self._lock:
+            self._discard(room, sid)
+            rooms = self._clients.get(sid)
+            if rooms is not None:
+                rooms.discard(room)
+                if not rooms:
+                    del self._clients[sid]
+    
+    def remove_client(self, sid: str) -> None:
+        """Forget a disconnected client."""
+        with self._lock:
+            for room in self._clients.pop(sid, ()):
+                self._discard(room, sid)
+    
+    def _discard(self, room: str, sid: str) -> None:
+        sids = self._rooms.get(room)
+        if sids is not None:
+            sids.discard(sid)
+            if not sids:
+                del self._rooms[room]
+
+class _SchedulerStats:
+    """Statistics shared by the sync and async schedulers."""
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get emit statistics."""
+        return {
+            "tick": self.tick,
+            "updates": self.buffer.updates,
+            "coalesced": self.buffer.coalesced,
+            "flushes": self.flushes,
+            "frames": self.frames,
+            "pending_rooms": len(self.buffer)
+        }
+
+class EmitScheduler(_SchedulerStats):
+    """
+    Buffers room updates for one tick and flushes them from a background
+    task of a Flask-SocketIO server.
+    
+    Each flush sends the latest update per key to legacy subscribers of a
+    room as individual events, and one ``update_batch`` frame to subscribers
+    that negotiated batch frames, if the room has any.
+    """
+    
+    def __init__(self, socketio: Any, tick: float = 0.005, idle_timeout: float = 1.0, local_rooms: bool = True):
+        """
+        Initialize the scheduler.
+        
+        Args:
+            socketio: Flask-SocketIO instance
+            tick: Seconds updates are buffered before a flush
+            idle_timeout: Seconds the flush task waits for an update before
+                checking the buffer anyway
+            local_rooms: Whether every room subscriber is connected to this
+                server, i.e. no message queue is shared with other servers
+        """
+        self.socketio = socketio
+        self.tick = tick
+        self.idle_timeout = idle_timeout
+        self.buffer = EmitBuffer()
+        self.batch_subscribers = BatchSubscribers(local_rooms)
+        self.flushes = 0
+        self.frames = 0
+        self._task = None
+        self._pending = socketio.server.eio.create_event()
+    
+    def start(self) -> None:
+        """
+        Start the flush task.
+        
+        The task sleeps while the buffer is empty and is woken by the first
+        update of the next tick. Its wait is bounded by ``idle_timeout``, so
+        updates added from a thread the server's async mode does not manage,
+        whose signal may not wake it, are still flushed.
+        """
+        if self._task is None:
+            self._task = self.socketio.start_background_task(self._run)
+    
+    def emit(self, room: str, key: Hashable, event: str, data: Any) -> None:
+        """
+        Schedule an update for a room.
+        
+        Args:
+            room: Room the update is emitted to
+            key: Identity of the state the update describes
+            event: Event name
+            data: Event payload
+        """
+        if self.buffer.add(room, key, event, data):
+            self._pending.set()
+    
+    def flush(self) -> None:
+        """Emit everything buffered now."""
+        rooms = self.buffer.drain()
+        if not rooms:
+            return
+        self.flushes += 1
+        for room, updates in rooms:
+            for event, data in updates:
+                self.socketio.emit(event, data, room=room)
+            self.frames += len(updates)
+            if room in self.batch_subscribers:
+                self.socketio.emit(BATCH_EVENT, _batch_frame(room, updates), room=batch_room(room))
+                self.frames += 1
+    
+    def _run(self) -> None:
+        while True:
+            self._pending.wait(self.idle_timeout)
+            self._pending.clear()
+            if not len(self.buffer):
+                continue
+            self.socketio.sleep(self.tick)
+            try:
+                self.flush()
+            except Exception:
+                # A failed emit must not stop later flushes
+                logger.exception("Cannot flush room updates")
+
+class AsyncEmitScheduler(_SchedulerStats):
+    """
+    Buffers room updates for one tick and flushes them on the event loop of
+    a socketio.AsyncServer.
+    
+    A flush is armed by the first update after the previous flush, so an
+    idle server does not wake up every tick.
+    """
+    
+    def __init__(self, sio: Any, tick: float = 0.005, local_rooms: bool = True):
+        """
+        Initialize the scheduler.
+        
+        Args:
+            sio: Socket.IO asyncio server
+            tick: Seconds updates are buffered before a flush
+            local_rooms: Whether every room subscriber is connected to this
+                server, i.e. no message queue is shared with other servers
+        """
+        self.sio = sio
+        self.tick = tick
+        self.buffer = EmitBuffer()
+        self.batch_subscribers = BatchSubscribers(local_rooms)
+        self.flushes = 0
+        self.frames = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._flushing: Optional[asyncio.Task] = None
+    
+    def start(self) -> None:
+        """Bind the scheduler to the running event loop."""
+        self._loop = asyncio.get_running_loop()
+        if len(self.buffer):
+            # Updates buffered before the loop was known
+            self._loop.call_later(self.tick, self._schedule_flush)
+    
+    def emit(self, room: str, key: Hashable, event: str, data: Any) -> None:
+        """
+        Schedule an update for a room; safe to call from any thread.
+        
+        Args:
+            room: Room the update is emitted to
+            key: Identity of the state the update describes
+            event: Event name
+            data: Event payload
+        """
+        if not self.buffer.add(room, key, event, data):
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if self._loop is None:
+            self._loop = running
+        if self._loop is None:
+            return
+        if running is self._loop:
+            self._loop.call_later(self.tick, self._schedule_flush)
+        else:
+            self._loop.call_soon_threadsafe(self._loop.call_later, self.tick, self._schedule_flush)
+    
+    async def flush(self) -> None:
+        """Emit everything buffered now."""
+        rooms = self.buffer.drain()
+        if not rooms:
+            return
+        self.flushes += 1
+        for room, updates in rooms:
+            for event, data in updates:
+                await self.sio.emit(event, data, room=room)
+            self.frames += len(updates)
+            if room in self.batch_subscribers:
+                await self.sio.emit(BATCH_EVENT, _batch_frame(room, updates), room=batch_room(room))
+                self.frames += 1
+    
+    async def close(self) -> None:
+        """Flush remaining updates."""
+        if self._flushing is not None:
+            await asyncio.gather(self._flushing, return_exceptions=True)
+        await self.flush()
+    
+    def _schedule_flush(self) -> None:
+        self._flushing = self._loop.create_task(self.flush())
+
+def _batch_frame(room: str, updates: List[Update]) -> Dict[str, Any]:
+    return {
+        'room': room,
+        'updates': [{'event': event, 'data': data} for event, data in updates]
+    }
\ No newline at end of file
@@ -0,0 +1,122 @@
+"""
+Local stand-ins for rippled servers
+"""
+
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import websockets
+
+class StubWebSocketServer:
+    """
+    WebSocket server on a background loop, answering each connection with
+    a test-supplied coroutine ``handler(websocket, connection_number)``.
+    """
+    
+    def __init__(self, handler):
+        self.handler = handler
+        self.connections = 0
+        self.loop = asyncio.new_event_loop()
+        self._server = None
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+    
+    @property
+    def url(self) -> str:
+        port = self._server.sockets[0].getsockname()[1]
+        return f"ws://127.0.0.1:{port}"
+    
+    def start(self) -> "StubWebSocketServer":
+        self._thread.start()
+        self._server = asyncio.run_coroutine_threadsafe(self._listen(), self.loop).result(timeout=5)
+        return self
+    
+    def stop(self) -> None:
+        self._server.close()
+        asyncio.run_coroutine_threadsafe(self._server.wait_closed(), self.loop).result(timeout=5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
+    
+    async def _listen(self):
+        return await websockets.serve(self._serve, "127.0.0.1", 0, close_timeout=0.5)
+    
+    async def _serve(self, websocket, *args) -> None:
+        self.connections += 1
+        await self.handler(websocket, self.connections)
+
+class StubRpcServer:
+    """
+    JSON-RPC server on a background thread, answering each call with a
+    test-supplied ``handler(method, params)`` returning the ``result``
+    object. Calls are recorded as (method, params) pairs.
+    """
+    
+    def __init__(self, handler):
+        self.handler = handler
+        self.calls = []
+        stub = self
+        
+        class RequestHandler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                params = body["params"][0] if body.get("params") else {}
+                stub.calls.append((body["method"], params))
+                try:
+                    payload = json.dumps({"result": stub.handler(body["method"], params)}).encode()
+                except ConnectionError:
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+            
+            def log_message(self, *args):
+                pass
+        
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), RequestHandler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+    
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+    
+    def methods(self):
+        return [method for method, _ in self.calls]
+    
+    def start(self) -> "StubRpcServer":
+        self._thread.start()
+        return self
+    
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+@pytest.fixture
+def rpc_server():
+    """Factory starting stub rippled JSON-RPC servers that are stopped after the test."""
+    servers = []
+    
+    def start(handler):
+        servers.append(StubRpcServer(handler).start())
+        return servers[-1]
+    
+    yield start
+    for server in servers:
+        server.stop()
+
+@pytest.fixture
+def ws_server():
+    """Factory starting stub WebSocket servers that are stopped after the test."""
+    servers = []
+    
+    def start(handler):
+        servers.append(StubWebSocketServer(handler).start())
+        return servers[-1]
+    
+    yield start
+    for server in servers:
+        server.stop()
\ No newline at end of file
@@ -0,0 +1,167 @@
+"""
+Tests for the ASGI serving mode of the payment API
+"""
+
+import asyncio
+import json
+
+from synapse_protocol.api.asgi import PaymentApi
+from synapse_protocol.payments.core import PaymentProtocol
+from synapse_protocol.payments.types import PaymentResponse, PaymentStatus
+from synapse_protocol.payments.xrp_bridge import XrpPaymentBridge
+from synapse_protocol.serialization import Serializer
+
+PREFIX = "/api/v1/payments"
+
+class StaticBridge(XrpPaymentBridge):
+    """Bridge that completes every payment and knows one balance."""
+    
+    def __init__(self):
+        super().__init__(xrp_client=None)
+    
+    async def process_payment(self, payment_request):
+        return PaymentResponse(payment_id=payment_request.payment_id, status=PaymentStatus.COMPLETED)
+    
+    async def get_balance(self, account_id):
+        return 42.5
+    
+    async def verify_transaction(self, tx_hash):
+        return tx_hash == "GOOD"
+
+class RecordingManager:
+    """WebSocket manager that records what it would emit."""
+    
+    def __init__(self):
+        self.emitted = []
+    
+    async def emit_payment_update(self, payment_id, status, data=None):
+        self.emitted.append(("payment_update", payment_id))
+    
+    async def emit_balance_update(self, account_id, balance, currency):
+        self.emitted.append(("balance_update", account_id))
+    
+    async def emit_error(self, error_type, message, data=None, room=None):
+        self.emitted.append((error_type, room))
+
+def make_api(**kwargs):
+    protocol = PaymentProtocol(api_key="test", xrp_client=StaticBridge())
+    return PaymentApi(protocol, RecordingManager(), Serializer(), **kwargs)
+
+async def call(api, method, path, body=None, query=b"", headers=()):
+    """Send one HTTP request through the app; return the status, headers and decoded body."""
+    payload = json.dumps(body).encode() if body is not None else b""
+    # The body arrives in two chunks
+    incoming = [
+        {"type": "http.request", "body": payload[:5], "more_body": True},
+        {"type": "http.request", "body": payload[5:], "more_body": False}
+    ]
+    sent = []
+    
+    async def receive():
+        return incoming.pop(0)
+    
+    async def send(message):
+        sent.append(message)
+    
+    scope = {"type": "http", "method": method, "path": path, "query_string": query, "headers": list(headers)}
+    await api(scope, receive, send)
+    start, response = sent
+    assert start["type"] == "http.response.start"
+    headers = dict(start["headers"])
+    assert int(headers[b"content-length"]) == len(response["body"])
+    return start["status"], headers, json.loads(response["body"]) if response["body"] else None
+
+def payment(receiver="rReceiver"):
+    return {"sender_account": "rSender", "receiver_account": receiver, "amount": 1.0, "currency": "XRP"}
+
+def test_payment_routes():
+    api = make_api()
+    
+    async def run():
+        created = await call(api, "POST", PREFIX + "/create", payment())
+        payment_id = created[2]["payment_id"]
+        status = await call(api, "GET", f"{PREFIX}/{payment_id}/status")
+        batch = await call(api, "POST", PREFIX + "/batch", {"payments": [payment("rA"), payment("rB")]})
+        history = await call(api, "GET", PREFIX + "/account/rSender/history", query=b"limit=2&offset=1")
+        balance = await call(api, "GET", PREFIX + "/balance/rSender")
+        verify = await call(api, "GET", PREFIX + "/verify/GOOD")
+        return created, status, batch, history, balance, verify
+    
+    created, status, batch, history, balance, verify = asyncio.run(run())
+    
+    assert (created[0], created[1][b"content-type"], created[2]["status"]) == (201, b"application/json", "completed")
+    assert status[0] == 200 and status[2]["payment_id"] == created[2]["payment_id"]
+    assert batch[0] == 201 and [p["status"] for p in batch[2]] == ["completed", "completed"]
+    assert history[0] == 200 and len(history[2]) == 2
+    assert balance[0] == 200 and balance[2]["available_balance"] == 42.5
+    assert verify[0] == 200 and verify[2] == {"transaction_hash": "GOOD", "verified": True}
+    assert ("balance_update", "rSender") in api.websocket_manager.emitted
+
+def test_errors_map_to_status_codes():
+    api = make_api()
+    
+    async def run():
+        return [
+            await call(api, "GET", PREFIX + "/unknown/status"),
+            await call(api, "POST", PREFIX + "/create", {"amount": -1}, headers=[(b"x-socket-id", b"sid-1")]),
+            await call(api, "GET", PREFIX + "/account/rSender/history", query=b"direction=sideways"),
+            await call(api, "POST", PREFIX + "/unknown/cancel"),
+            await call(api, "GET", PREFIX + "/account/rSender/history", query=b"limit=100000"),
+            await call(api, "POST", PREFIX + "/batch", {"max_in_flight": 2})
+        ]
+    
+    not_found, invalid, bad_direction, cancel_unknown, unbounded, no_payments = asyncio.run(run())
+    
+    assert not_found[0] == cancel_unknown[0] == 404
+    assert unbounded[0] == no_payments[0] == 400
+    assert invalid[0] == 400 and "error" in invalid[2]
+    assert bad_direction[0] == 400
+    assert ("validation_error", "sid-1") in api.websocket_manager.emitted
+
+def test_unknown_paths_and_methods():
+    api = make_api()
+    
+    async def run():
+        return [
+            await call(api, "GET", "/nowhere"),
+            await call(api, "GET", PREFIX + "/create"),
+            await call(api, "OPTIONS", PREFIX + "/create")
+        ]
+    
+    not_found, not_allowed, preflight = asyncio.run(run())
+    
+    assert (not_found[0], not_found[2]) == (404, {"error": "Not found"})
+    assert (not_allowed[0], not_allowed[2]) == (405, {"error": "Method not allowed"})
+    assert preflight[0] == 204 and preflight[2] is None
+    assert preflight[1][b"access-control-allow-origin"] == b"*"
+
+def run_lifespan(api):
+    """Run the lifespan protocol; return the messages the app sent."""
+    incoming = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+    sent = []
+    
+    async def receive():
+        return incoming.pop(0)
+    
+    async def send(message):
+        sent.append(message["type"])
+    
+    asyncio.run(api({"type": "lifespan"}, receive, send))
+    return sent
+
+def test_lifespan_runs_startup_and_shutdown_hooks():
+    calls = []
+    
+    async def shutdown():
+        calls.append("shutdown")
+    
+    api = make_api(on_startup=lambda: calls.append("startup"), on_shutdown=shutdown)
+    
+    assert run_lifespan(api) == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
+    assert calls == ["startup", "shutdown"]
+
+def test_failing_startup_hook_is_reported():
+    def startup():
+        raise RuntimeError("no database")
+    
+    assert run_lifespan(make_api(on_startup=startup)) == ["lifespan.startup.failed"]
\ No newline at end of file
@@ -0,0 +1,58 @@
+"""
+Tests for batch payment submission
+"""
+
+import asyncio
+
+import pytest
+
+from synapse_protocol.payments.core import PaymentProtocol
+from synapse_protocol.payments.exceptions import ValidationError
+from synapse_protocol.payments.types import PaymentResponse, PaymentStatus
+from synapse_protocol.payments.xrp_bridge import XrpPaymentBridge
+
+class FlakyBridge(XrpPaymentBridge):
+    """Bridge that raises for payments to rBroken and completes the rest."""
+    
+    def __init__(self):
+        super().__init__(xrp_client=None)
+    
+    async def process_payment(self, payment_request):
+        if payment_request.receiver_account == "rBroken":
+            raise RuntimeError("connection reset")
+        return PaymentResponse(payment_id=payment_request.payment_id, status=PaymentStatus.COMPLETED)
+
+def payment(receiver):
+    return {"sender_account": "rSender", "receiver_account": receiver, "amount": 1.0, "currency": "XRP"}
+
+def test_one_failing_submission_fails_only_its_payment():
+    protocol = PaymentProtocol(api_key="test", xrp_client=FlakyBridge())
+    responses = asyncio.run(protocol.initiate_payments([payment("rA"), payment("rBroken"), payment("rB")]))
+    
+    assert [response.status for response in responses] == [
+        PaymentStatus.COMPLETED, PaymentStatus.FAILED, PaymentStatus.COMPLETED
+    ]
+    assert responses[1].error_message == "connection reset"
+    assert protocol.payment_store.get(responses[1].payment_id).status == PaymentStatus.FAILED
+
+def test_batch_limits_are_enforced():
+    protocol = PaymentProtocol(api_key="test", xrp_client=FlakyBridge(), max_in_flight=4, max_batch_size=2)
+    with pytest.raises(ValidationError):
+        asyncio.run(protocol.initiate_payments([payment("rA")] * 3))
+    with pytest.raises(ValidationError):
+        asyncio.run(protocol.initiate_payments([payment("rA")], max_in_flight="all"))
+    responses = asyncio.run(protocol.initiate_payments([payment("rA")], max_in_flight=10 ** 6))
+    assert responses[0].status == PaymentStatus.COMPLETED
+
+@pytest.mark.parametrize("body", [
+    {"data": "not json"},
+    {"json": 5},
+    {"json": "payments"},
+    {"json": {"max_in_flight": 2}}
+])
+def test_batch_route_rejects_a_malformed_body(body):
+    from synapse_protocol.app import create_app
+    
+    app = create_app({"TESTING": True, "XRP_CLIENT": FlakyBridge()})
+    response = app.test_client().post("/api/v1/payments/batch", **body)
+    assert response.status_code == 400
\ No newline at end of file
@@ -0,0 +1,183 @@
+"""
+Tests for the caching primitives and the cached XRP bridge lookups
+"""
+
+import asyncio
+import threading
+import time
+
+from synapse_protocol.payments.cache import SingleFlight, TTLCache
+from synapse_protocol.payments.xrp_bridge import XrpPaymentBridge
+
+class SlowClient:
+    """XRP client whose lookups take a while, counting the calls it serves."""
+    
+    def __init__(self, delay=0.5):
+        self.delay = delay
+        self.calls = 0
+    
+    async def getBalance(self, account_id):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return 25.0
+    
+    async def verifyTransaction(self, tx_hash):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return True
+
+def run_in_threads(count, coroutine_function):
+    """Run a coroutine on its own event loop in each of ``count`` threads, like Flask async views."""
+    results = [None] * count
+    
+    def run(index):
+        try:
+            results[index] = asyncio.run(coroutine_function())
+        except Exception as e:
+            results[index] = e
+    
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return results
+
+def test_single_flight_is_shared_across_event_loops():
+    flights = SingleFlight()
+    started = threading.Event()
+    
+    async def call():
+        started.set()
+        await asyncio.sleep(0.2)
+        return "result"
+    
+    async def first():
+        return await flights.do("key", call)
+    
+    async def second():
+        started.wait(5)
+        return await flights.do("key", call)
+    
+    results = [None, None]
+    
+    def run(index, coroutine_function):
+        results[index] = asyncio.run(coroutine_function())
+    
+    threads = [threading.Thread(target=run, args=(0, first)), threading.Thread(target=run, args=(1, second))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    
+    assert results == ["result", "result"]
+    assert flights.calls == 1
+    assert flights.coalesced == 1
+
+def test_concurrent_balance_misses_from_separate_loops():
+    client = SlowClient()
+    bridge = XrpPaymentBridge(client)
+    
+    assert run_in_threads(3, lambda: bridge.get_balance("rA")) == [25.0, 25.0, 25.0]
+    assert client.calls == 1
+
+def test_forgotten_flight_does_not_publish_its_result():
+    flights = SingleFlight()
+    published = []
+    
+    async def run():
+        async def call():
+            flights.forget("key")
+            return "stale"
+        return await flights.do("key", call, published.append)
+    
+    assert asyncio.run(run()) == "stale"
+    assert published == []
+
+def test_ttl_cache_expires_and_evicts():
+    cache = TTLCache(maxsize=2, ttl=0.05)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=60)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    # "b" is the least recently used entry
+    assert "b" not in cache
+    assert cache.evictions == 1
+    time.sleep(0.06)
+    assert cache.get("a") is None
+    assert cache.get("c") is None
+    assert cache.stats()["hits"] == 1
+
+def test_validated_result_is_cached_for_good():
+    client = SlowClient(delay=0)
+    bridge = XrpPaymentBridge(client, unverified_ttl=0.05)
+    
+    assert asyncio.run(bridge.verify_transaction("AA")) is True
+    time.sleep(0.06)
+    assert asyncio.run(bridge.verify_transaction("AA")) is True
+    assert client.calls == 1
+
+def test_unvalidated_result_is_cached_briefly():
+    client = SlowClient(delay=0)
+    client.verifyTransaction = lambda tx_hash: _not_validated(client)
+    bridge = XrpPaymentBridge(client, unverified_ttl=0.05)
+    
+    assert asyncio.run(bridge.verify_transaction("AA")) is False
+    assert asyncio.run(bridge.verify_transaction("AA")) is False
+    assert client.calls == 1
+    time.sleep(0.06)
+    assert asyncio.run(bridge.verify_transaction("AA")) is False
+    assert client.calls == 2
+
+async def _not_validated(client):
+    client.calls += 1
+    return False
+
+def test_concurrent_verifications_from_separate_loops():
+    client = SlowClient()
+    bridge = XrpPaymentBridge(client)
+    
+    assert run_in_threads(3, lambda: bridge.verify_transaction("AA")) == [True, True, True]
+    assert client.calls == 1
+
+def test_validated_hashes_survive_a_restart(tmp_path):
+    path = str(tmp_path / "verified.txt")
+    bridge = XrpPaymentBridge(SlowClient(delay=0), verification_cache_path=path)
+    for tx_hash in ("AA", "BB"):
+        asyncio.run(bridge.verify_transaction(tx_hash))
+    bridge.close()
+    
+    client = SlowClient(delay=0)
+    restarted = XrpPaymentBridge(client, verification_cache_path=path)
+    assert asyncio.run(restarted.verify_transaction("AA")) is True
+    assert asyncio.run(restarted.verify_transaction("BB")) is True
+    assert client.calls == 0
+
+def test_persistence_file_is_compacted(tmp_path):
+    path = str(tmp_path / "verified.txt")
+    bridge = XrpPaymentBridge(SlowClient(delay=0), verification_cache_size=2, verification_cache_path=path)
+    for i in range(6):
+        asyncio.run(bridge.verify_transaction(f"H{i}"))
+    bridge.close()
+    
+    with open(path) as f:
+        lines = f.read().split()
+    # Evicted hashes are dropped when the file reaches twice the cache size
+    assert lines == ["H3", "H4", "H5"]
+
+def test_confirmations_invalidate_balances_while_requests_read_them():
+    bridge = XrpPaymentBridge(SlowClient(delay=0))
+    stop = threading.Event()
+    
+    def confirm():
+        while not stop.is_set():
+            bridge.invalidate_balance("rA")
+    
+    invalidator = threading.Thread(target=confirm)
+    invalidator.start()
+    try:
+        for _ in range(200):
+            assert asyncio.run(bridge.get_balance("rA")) == 25.0
+    finally:
+        stop.set()
+        invalidator.join(5)
\ No newline at end of file
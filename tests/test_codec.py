@@ -0,0 +1,97 @@
+"""
+Tests for the codecs negotiated by SynapseProtocol connections
+"""
+
+import asyncio
+
+import pytest
+
+from synapse_protocol import codec
+from synapse_protocol.codec import JsonCodec, available_codecs, get_codec, negotiated_codec, subprotocols
+from synapse_protocol.protocol import SynapseProtocol, serve
+
+MESSAGE = {"command": "payment", "amount": 1.5, "tags": ["a", "b"], "memo": None, "nested": {"ok": True}}
+
+async def echo(connection):
+    """Reply to every message with the codec the server side negotiated."""
+    async for message in connection:
+        await connection.send_message({**message, "server_codec": connection.codec.name})
+
+async def exchange(client_codecs, server_codecs):
+    """Make one request to a local server; return the reply and the client's codec."""
+    server = await serve(echo, "127.0.0.1", 0, codecs=server_codecs)
+    port = server.sockets[0].getsockname()[1]
+    protocol = SynapseProtocol(f"ws://127.0.0.1:{port}", reconnect=False, codecs=client_codecs)
+    try:
+        await protocol.connect()
+        reply = await protocol.request(MESSAGE, timeout=5)
+        frame_type = type(protocol.codec.encode(MESSAGE))
+        return reply, protocol.codec.name, frame_type
+    finally:
+        await protocol.disconnect()
+        server.close()
+        await server.wait_closed()
+
+def test_json_codec_round_trip():
+    encoded = JsonCodec().encode(MESSAGE)
+    assert isinstance(encoded, str)
+    assert " " not in encoded
+    assert JsonCodec().decode(encoded) == MESSAGE
+    assert JsonCodec().decode(encoded.encode()) == MESSAGE
+
+def test_subprotocols_follow_the_preference_order():
+    assert subprotocols(["json"]) == ["synapse.json"]
+    assert subprotocols() == [get_codec(name).subprotocol for name in available_codecs()]
+    assert available_codecs()[-1] == "json"
+    with pytest.raises(ValueError):
+        subprotocols(["xml"])
+    with pytest.raises(ValueError):
+        get_codec("xml")
+
+def test_peers_that_do_not_negotiate_get_json():
+    assert negotiated_codec(None).name == "json"
+    assert negotiated_codec("synapse.json").name == "json"
+    assert negotiated_codec("graphql-ws").name == "json"
+
+def test_msgpack_is_left_out_when_not_installed(monkeypatch):
+    monkeypatch.setattr(codec, "msgpack", None)
+    assert available_codecs() == ["json"]
+    assert subprotocols(["msgpack", "json"]) == ["synapse.json"]
+    with pytest.raises(ImportError):
+        codec.MsgpackCodec()
+
+def test_json_server_and_client():
+    reply, client_codec, frame_type = asyncio.run(exchange(["json"], ["json"]))
+    assert (client_codec, reply["server_codec"], frame_type) == ("json", "json", str)
+    assert {k: v for k, v in reply.items() if k not in ("id", "server_codec")} == MESSAGE
+
+def test_client_falls_back_to_a_server_that_does_not_negotiate(ws_server):
+    async def plain(websocket, connection):
+        message = await websocket.recv()
+        await websocket.send(message)
+    
+    server = ws_server(plain)
+    
+    async def run():
+        protocol = SynapseProtocol(server.url, reconnect=False)
+        await protocol.connect()
+        try:
+            return await protocol.request(MESSAGE, timeout=5), protocol.codec.name
+        finally:
+            await protocol.disconnect()
+    
+    reply, client_codec = asyncio.run(run())
+    assert client_codec == "json"
+    assert reply["amount"] == 1.5
+
+def test_msgpack_is_negotiated_when_both_peers_support_it():
+    pytest.importorskip("msgpack")
+    reply, client_codec, frame_type = asyncio.run(exchange(None, None))
+    assert (client_codec, reply["server_codec"], frame_type) == ("msgpack", "msgpack", bytes)
+    assert {k: v for k, v in reply.items() if k not in ("id", "server_codec")} == MESSAGE
+
+def test_msgpack_client_falls_back_to_a_json_server():
+    pytest.importorskip("msgpack")
+    reply, client_codec, frame_type = asyncio.run(exchange(["msgpack", "json"], ["json"]))
+    assert (client_codec, reply["server_codec"], frame_type) == ("json", "json", str)
+    assert codec.MsgpackCodec().decode('{"text": true}') == {"text": True}
\ No newline at end of file
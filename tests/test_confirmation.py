@@ -0,0 +1,160 @@
+"""
+Tests for ledger-stream confirmation of submitted payments
+"""
+
+import asyncio
+import json
+import threading
+from concurrent.futures import Future
+
+from synapse_protocol.payments.confirmation import ConfirmationTracker
+from synapse_protocol.payments.core import PaymentProtocol
+from synapse_protocol.payments.types import PaymentStatus
+from synapse_protocol.payments.xrp_bridge import XrpPaymentBridge
+
+class SubmittingClient:
+    """XRP client whose submissions succeed provisionally."""
+    
+    async def sendPayment(self, request):
+        return {"success": True, "transaction_hash": "AB" * 32, "engine_result": "tesSUCCESS"}
+
+class ValidatedTracker:
+    """Tracker that already saw every transaction validated."""
+    
+    def track(self, tx_hash, last_ledger_sequence=None):
+        future = Future()
+        future.set_result({
+            "transaction_hash": tx_hash,
+            "validated": True,
+            "engine_result": "tesSUCCESS",
+            "ledger_index": 99
+        })
+        return future
+    
+    def stop(self):
+        pass
+
+def test_confirmation_before_submit_returns_is_kept():
+    bridge = XrpPaymentBridge(SubmittingClient(), confirmation_tracker=ValidatedTracker())
+    protocol = PaymentProtocol(api_key="test", xrp_client=bridge)
+    updates = []
+    protocol.add_payment_listener(lambda response: updates.append(response.status))
+    
+    response = asyncio.run(protocol.initiate_payment({
+        "sender_account": "rSender",
+        "receiver_account": "rReceiver",
+        "amount": 1.0,
+        "currency": "XRP"
+    }))
+    
+    assert updates == [PaymentStatus.COMPLETED]
+    assert response.status == PaymentStatus.COMPLETED
+    assert protocol.payment_store.get(response.payment_id).status == PaymentStatus.COMPLETED
+
+TX_HASH = "CD" * 32
+
+def test_reconnect_catch_up_is_not_expired_by_subscribe_ledger(ws_server):
+    dropped = threading.Event()
+    tracked = threading.Event()
+    
+    async def rippled(websocket, connection):
+        subscribe = json.loads(await websocket.recv())
+        if connection == 1:
+            # Drop the first connection once the payment is tracked
+            await asyncio.get_running_loop().run_in_executor(None, tracked.wait, 5)
+            dropped.set()
+            return
+        lookup = json.loads(await websocket.recv())
+        assert lookup == {"id": f"tx:{TX_HASH}", "command": "tx", "transaction": TX_HASH}
+        # The ledger moved past LastLedgerSequence while disconnected...
+        await websocket.send(json.dumps({
+            "id": subscribe["id"], "type": "response", "status": "success",
+            "result": {"ledger_index": 105}
+        }))
+        # ...but the transaction was validated before that
+        await websocket.send(json.dumps({
+            "id": lookup["id"], "type": "response", "status": "success",
+            "result": {"hash": TX_HASH, "validated": True, "ledger_index": 99,
+                       "meta": {"TransactionResult": "tesSUCCESS"}}
+        }))
+        await websocket.wait_closed()
+    
+    server = ws_server(rippled)
+    tracker = ConfirmationTracker(server.url, reconnect_delay=0.01)
+    try:
+        future = tracker.track(TX_HASH, last_ledger_sequence=100)
+        tracked.set()
+        outcome = future.result(timeout=5)
+    finally:
+        tracker.stop()
+    
+    assert dropped.is_set()
+    assert outcome == {
+        "transaction_hash": TX_HASH,
+        "validated": True,
+        "engine_result": "tesSUCCESS",
+        "ledger_index": 99
+    }
+
+def test_catch_up_miss_expires_once_the_lookup_answers(ws_server):
+    tracked = threading.Event()
+    
+    async def rippled(websocket, connection):
+        subscribe = json.loads(await websocket.recv())
+        if connection == 1:
+            await asyncio.get_running_loop().run_in_executor(None, tracked.wait, 5)
+            return
+        lookup = json.loads(await websocket.recv())
+        await websocket.send(json.dumps({
+            "id": subscribe["id"], "type": "response", "status": "success",
+            "result": {"ledger_index": 105}
+        }))
+        await websocket.send(json.dumps({
+            "id": lookup["id"], "type": "response", "status": "error", "error": "txnNotFound"
+        }))
+        await websocket.wait_closed()
+    
+    server = ws_server(rippled)
+    tracker = ConfirmationTracker(server.url, reconnect_delay=0.01)
+    try:
+        future = tracker.track(TX_HASH, last_ledger_sequence=100)
+        tracked.set()
+        outcome = future.result(timeout=5)
+    finally:
+        tracker.stop()
+    
+    assert outcome["validated"] is False
+    assert outcome["engine_result"] == "tefMAX_LEDGER"
+    assert tracker.pending == 0
+
+def test_tracker_outlives_the_loop_that_started_it(ws_server):
+    subscribed = threading.Event()
+    tracked = threading.Event()
+    
+    async def rippled(websocket, connection):
+        await websocket.recv()
+        subscribed.set()
+        await asyncio.get_running_loop().run_in_executor(None, tracked.wait, 5)
+        await websocket.send(json.dumps({
+            "type": "transaction", "validated": True, "ledger_index": 42,
+            "transaction": {"hash": TX_HASH}, "meta": {"TransactionResult": "tesSUCCESS"}
+        }))
+        await websocket.wait_closed()
+    
+    server = ws_server(rippled)
+    tracker = ConfirmationTracker(server.url)
+    
+    async def request():
+        # Like a Flask async view, on a loop that is closed when it returns
+        return tracker.track(TX_HASH, last_ledger_sequence=100)
+    
+    try:
+        future = asyncio.run(request())
+        assert subscribed.wait(5)
+        tracked.set()
+        outcome = future.result(timeout=5)
+    finally:
+        tracker.stop()
+    
+    assert outcome["validated"] is True
+    assert outcome["ledger_index"] == 42
\ No newline at end of file
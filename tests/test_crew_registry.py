@@ -0,0 +1,100 @@
+"""
+Tests for crew templates and per-execution crew instances
+"""
+
+import threading
+
+import pytest
+
+pytest.importorskip("crewai")
+pytest.importorskip("langchain_core")
+
+from crewai import Crew
+
+from synapse_protocol.agents.crew_registry import CrewRegistry, CrewTemplate
+from synapse_protocol.agents.fake_llm import FakeLLM
+
+AGENTS = {
+    name: {"role": name, "goal": f"{name} goal", "backstory": f"{name} backstory", "tools": []}
+    for name in ("analyst", "reviewer")
+}
+TASKS = [
+    {"description": "Analyze {payment}", "agent": "analyst", "expected_output": "analysis"},
+    {"description": "Review {payment}", "agent": "reviewer", "expected_output": "verdict"}
+]
+
+def registry_with_template():
+    registry = CrewRegistry(FakeLLM())
+    return registry, registry.register(CrewTemplate("review_crew", AGENTS, TASKS))
+
+def test_concurrent_executions_never_share_an_agent():
+    registry, _ = registry_with_template()
+    crews = []
+    barrier = threading.Barrier(4)
+    
+    def run(index):
+        barrier.wait()
+        crews.append(registry.instantiate("review_crew", f"execution-{index}"))
+    
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    agents = [id(agent) for crew in crews for agent in crew.agents]
+    assert len(agents) == len(set(agents)) == 8
+    assert registry.stats()["peak_executions"] == 4
+
+def test_tasks_run_on_their_executions_agents():
+    registry, _ = registry_with_template()
+    crew = registry.instantiate("review_crew", "execution")
+    assert [task.agent for task in crew.tasks] == list(crew.agents)
+
+def test_release_returns_agents_to_the_pool():
+    registry, _ = registry_with_template()
+    first = registry.instantiate("review_crew", "first")
+    registry.release("first")
+    second = registry.instantiate("review_crew", "second")
+    
+    assert [id(agent) for agent in second.agents] == [id(agent) for agent in first.agents]
+    assert "first" not in registry.executions
+    stats = registry.stats()
+    assert (stats["agents_built"], stats["idle_agents"], stats["instantiated"]) == (2, 0, 2)
+    
+    registry.release("second")
+    registry.release("second")
+    assert registry.stats()["idle_agents"] == 2
+
+def test_execution_ids_are_unique_while_running():
+    registry, _ = registry_with_template()
+    with registry.execution("review_crew", "execution"):
+        with pytest.raises(ValueError):
+            registry.instantiate("review_crew", "execution")
+    assert registry.stats()["active_executions"] == 0
+    with pytest.raises(ValueError):
+        registry.instantiate("unknown_crew", "execution")
+
+def test_conflicting_agent_definitions_are_rejected():
+    registry, _ = registry_with_template()
+    agents = dict(AGENTS, analyst=dict(AGENTS["analyst"], goal="another goal"))
+    with pytest.raises(ValueError):
+        registry.register(CrewTemplate("other_crew", agents, TASKS))
+
+def test_template_kickoff_matches_crew_kickoff(monkeypatch):
+    calls = []
+    
+    def kickoff(crew, *args, **kwargs):
+        calls.append((args, kwargs))
+        return f"result of {len(crew.tasks)} tasks"
+    
+    monkeypatch.setattr(Crew, "kickoff", kickoff)
+    registry, template = registry_with_template()
+    with registry.execution("review_crew") as crew:
+        expected = [crew.kickoff(), crew.kickoff(inputs={"payment": "p"})]
+    
+    assert [template.kickoff(), template.kickoff({"payment": "p"})] == expected
+    assert calls[2:] == calls[:2]
+    assert registry.stats()["active_executions"] == 0
+    with pytest.raises(ValueError):
+        CrewTemplate("unregistered_crew", AGENTS, TASKS).kickoff()
\ No newline at end of file
@@ -0,0 +1,64 @@
+"""
+Tests for the Unix socket fan-out hub
+"""
+
+import socket
+import time
+
+from synapse_protocol.websocket.fanout import PUBLISH, SUBSCRIBE, FanoutHub, _HEADER, _connect, _encode_frame
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+def read_frames(sock, count):
+    reader = sock.makefile("rb")
+    frames = []
+    for _ in range(count):
+        size = _HEADER.unpack(reader.read(_HEADER.size))[0]
+        frames.append(reader.read(size))
+    reader.close()
+    return frames
+
+def test_publish_only_connections_get_nothing_queued(tmp_path):
+    hub = FanoutHub(str(tmp_path / "hub.sock"))
+    publisher = _connect(hub.path, hub, PUBLISH)
+    subscriber = _connect(hub.path, hub, SUBSCRIBE)
+    wait_for(lambda: len(hub._subscribers) == 1)
+    
+    frame = _encode_frame("x" * 1024)
+    for _ in range(5000):
+        publisher.sendall(frame)
+    frames = read_frames(subscriber, 5000)
+    
+    assert frames[0] == b"x" * 1024
+    wait_for(lambda: hub.frames == 5000)
+    assert sum(len(outbox) for outbox in hub._outbox.values()) == 0
+    publisher.close()
+    subscriber.close()
+
+def test_slow_subscriber_is_dropped(tmp_path):
+    hub = FanoutHub(str(tmp_path / "hub.sock"), max_outbox=256 * 1024)
+    publisher = _connect(hub.path, hub, PUBLISH)
+    slow = _connect(hub.path, hub, SUBSCRIBE)
+    slow.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    wait_for(lambda: len(hub._subscribers) == 1)
+    
+    frame = _encode_frame("x" * 1024)
+    for _ in range(5000):
+        publisher.sendall(frame)
+    
+    wait_for(lambda: hub.frames == 5000)
+    assert hub.slow_drops == 1
+    assert hub.connections == 1
+    assert all(len(outbox) <= hub.max_outbox for outbox in hub._outbox.values())
+    publisher.close()
+    slow.close()
+
+def test_unknown_role_is_rejected(tmp_path):
+    hub = FanoutHub(str(tmp_path / "hub.sock"))
+    sock = _connect(hub.path, hub, b"?")
+    assert sock.recv(1) == b""
+    sock.close()
\ No newline at end of file
@@ -0,0 +1,127 @@
+"""
+Tests for netting micro-payments into settlement transfers
+"""
+
+import asyncio
+import time
+from decimal import Decimal
+
+from synapse_protocol.payments.core import PaymentProtocol
+from synapse_protocol.payments.netting import NettingEngine
+from synapse_protocol.payments.types import PaymentRequest, PaymentResponse, PaymentStatus
+from synapse_protocol.payments.xrp_bridge import XrpPaymentBridge
+
+class SettlingBridge(XrpPaymentBridge):
+    """Bridge completing every transfer, with a hash naming its accounts."""
+    
+    def __init__(self):
+        super().__init__(xrp_client=None)
+        self.transfers = []
+    
+    async def process_payment(self, payment_request):
+        self.transfers.append((payment_request.sender_account, payment_request.receiver_account,
+                               payment_request.amount))
+        return PaymentResponse(
+            payment_id=payment_request.payment_id,
+            status=PaymentStatus.COMPLETED,
+            transaction_hash=f"{payment_request.sender_account}>{payment_request.receiver_account}"
+        )
+
+def request(payment_id, sender, receiver, amount):
+    return PaymentRequest(payment_id, sender, receiver, amount, "XRP")
+
+def payment(sender, receiver, amount):
+    return {"sender_account": sender, "receiver_account": receiver, "amount": amount, "currency": "XRP"}
+
+def netting_protocol(**kwargs):
+    bridge = SettlingBridge()
+    kwargs.setdefault("window_seconds", 60)
+    return PaymentProtocol(api_key="test", xrp_client=bridge, netting=NettingEngine(**kwargs)), bridge
+
+def test_bilateral_netting_settles_each_pair_once():
+    engine = NettingEngine()
+    transfers = engine.compute_transfers([
+        request("p1", "rA", "rB", 10), request("p2", "rB", "rA", 4), request("p3", "rA", "rC", 5)
+    ])
+    
+    assert [(t.sender_account, t.receiver_account, t.amount, t.payment_ids) for t in transfers] == [
+        ("rA", "rB", Decimal("6.000000"), ["p1", "p2"]),
+        ("rA", "rC", Decimal("5.000000"), ["p3"])
+    ]
+    assert engine.stats()["compression"] == 1.5
+
+def test_multilateral_netting_settles_net_positions():
+    engine = NettingEngine(multilateral=True)
+    transfers = engine.compute_transfers([request("p1", "rA", "rB", 10), request("p2", "rB", "rC", 10)])
+    
+    assert [(t.sender_account, t.receiver_account, t.amount) for t in transfers] == [("rA", "rC", Decimal("10"))]
+    assert transfers[0].payment_ids == ["p1", "p2"]
+
+def test_window_that_cancels_out_settles_without_transfers():
+    protocol, bridge = netting_protocol()
+    
+    async def run():
+        first = await protocol.initiate_payment(payment("rA", "rB", 5))
+        second = await protocol.initiate_payment(payment("rB", "rA", 5))
+        await protocol.flush_netting()
+        return first, second
+    
+    first, second = asyncio.run(run())
+    
+    assert first.status == PaymentStatus.PENDING
+    assert bridge.transfers == []
+    for response in (first, second):
+        record = protocol.payment_store.get(response.payment_id)
+        assert record.status == PaymentStatus.COMPLETED
+        assert record.transaction_hash is None
+
+def test_payment_cancelled_while_queued_is_not_settled():
+    protocol, bridge = netting_protocol()
+    
+    async def run():
+        kept = await protocol.initiate_payment(payment("rA", "rB", 5))
+        cancelled = await protocol.initiate_payment(payment("rA", "rC", 7))
+        await protocol.cancel_payment(cancelled.payment_id)
+        return kept, cancelled, await protocol.flush_netting()
+    
+    kept, cancelled, settled = asyncio.run(run())
+    
+    assert settled == 1
+    assert bridge.transfers == [("rA", "rB", 5.0)]
+    assert protocol.payment_store.get(cancelled.payment_id).status == PaymentStatus.CANCELLED
+    assert protocol.payment_store.get(kept.payment_id).status == PaymentStatus.COMPLETED
+
+def test_payments_take_the_hash_of_their_settlement_transfer():
+    protocol, bridge = netting_protocol()
+    
+    async def run():
+        responses = [
+            await protocol.initiate_payment(payment("rA", "rB", 10)),
+            await protocol.initiate_payment(payment("rB", "rA", 4)),
+            await protocol.initiate_payment(payment("rC", "rB", 3))
+        ]
+        await protocol.flush_netting()
+        return responses
+    
+    hashes = [protocol.payment_store.get(r.payment_id).transaction_hash for r in asyncio.run(run())]
+    
+    assert hashes == ["rA>rB", "rA>rB", "rC>rB"]
+
+def test_expired_window_is_settled_after_its_loop_closed():
+    protocol, bridge = netting_protocol(window_seconds=0.2)
+    
+    # Like a Flask async view, on a loop that is closed when it returns
+    response = asyncio.run(protocol.initiate_payment(payment("rA", "rB", 1)))
+    
+    deadline = time.monotonic() + 5
+    while protocol.payment_store.get(response.payment_id).status != PaymentStatus.COMPLETED:
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+    assert protocol._netting_timer is None
+    
+    # A later window arms a timer of its own
+    later = asyncio.run(protocol.initiate_payment(payment("rA", "rB", 2)))
+    deadline = time.monotonic() + 5
+    while protocol.payment_store.get(later.payment_id).status != PaymentStatus.COMPLETED:
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
\ No newline at end of file
@@ -0,0 +1,46 @@
+"""
+Tests for moving socket emits off the request path
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+from synapse_protocol.websocket.offload import BLOCK, EmitOffloader, EmitQueue
+
+class ThreadingSocketIO:
+    """Flask-SocketIO stand-in for the ``threading`` async mode."""
+    
+    def __init__(self):
+        self.server = SimpleNamespace(eio=SimpleNamespace(create_event=threading.Event))
+    
+    def start_background_task(self, target, *args):
+        thread = threading.Thread(target=target, args=args, daemon=True)
+        thread.start()
+        return thread
+
+def test_submitted_emit_wakes_the_drain_task():
+    offloader = EmitOffloader(ThreadingSocketIO(), EmitQueue(), idle_timeout=60)
+    offloader.start()
+    delivered = threading.Event()
+    
+    offloader.submit(delivered.set)
+    
+    assert delivered.wait(5)
+
+def test_blocked_producer_resumes_once_the_queue_drains():
+    offloader = EmitOffloader(ThreadingSocketIO(), EmitQueue(maxsize=1, overflow=BLOCK), block_timeout=60)
+    emitted = []
+    offloader.submit(emitted.append, "first")
+    producer = threading.Thread(target=offloader.submit, args=(emitted.append, "second"))
+    producer.start()
+    time.sleep(0.05)
+    assert producer.is_alive()
+    
+    offloader.flush()
+    producer.join(5)
+    
+    assert not producer.is_alive()
+    assert emitted == ["first"]
+    assert offloader.queue.dropped == 0
+    assert len(offloader.queue) == 1
\ No newline at end of file
@@ -0,0 +1,104 @@
+"""
+Tests for the deterministic risk pre-screen
+"""
+
+import pytest
+
+from synapse_protocol.agents.prescreen import RiskPrescreen
+
+class FakeClock:
+    """Clock that only moves when told to."""
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+def payment(amount, sender="rSender", receiver="rReceiver", currency="XRP"):
+    return {"sender_account": sender, "receiver_account": receiver, "amount": amount, "currency": currency}
+
+def reasons(results):
+    """Reason of each decision, None for payments escalated to the crew."""
+    return [result["reason"] if result else None for result in results]
+
+def test_clear_cut_payments_are_decided():
+    prescreen = RiskPrescreen(approve_below=100, reject_above=1000)
+    results = prescreen.screen([payment(50), payment(500), payment(5000)])
+    
+    assert reasons(results) == ["amount_below_threshold", None, "amount_above_limit"]
+    assert results[0] == {"decision": "approve", "risk_level": "low", "reason": "amount_below_threshold",
+                          "source": "prescreen"}
+    assert prescreen.stats()["escalated"] == 1
+
+@pytest.mark.parametrize("amount", [None, "abc", 0, -5, float("nan"), float("inf")])
+def test_invalid_amounts_are_rejected(amount):
+    assert reasons(RiskPrescreen().screen([payment(amount)])) == ["invalid_amount"]
+
+def test_invalid_amounts_do_not_count_towards_velocity():
+    prescreen = RiskPrescreen(max_payments_per_window=1)
+    assert reasons(prescreen.screen([payment(0), payment("abc"), payment(10)])) == [
+        "invalid_amount", "invalid_amount", "amount_below_threshold"
+    ]
+
+def test_currency_codes_are_normalised():
+    prescreen = RiskPrescreen(allowed_currencies=["xrp", "USD"])
+    results = prescreen.screen([payment(10, currency=" xrp "), payment(10, currency="usd"), payment(10, currency="EUR")])
+    
+    assert reasons(results) == ["amount_below_threshold", "amount_below_threshold", "currency_not_allowed"]
+    assert reasons(RiskPrescreen(allowed_currencies=None).screen([payment(10, currency="EUR")])) == [
+        "amount_below_threshold"
+    ]
+
+def test_denylist_is_checked_before_velocity():
+    prescreen = RiskPrescreen(denylist=["rBad"], max_payments_per_window=1)
+    results = prescreen.screen([payment(10), payment(10), payment(10, receiver="rBad")])
+    
+    assert reasons(results) == ["amount_below_threshold", None, "denylisted_counterparty"]
+
+def test_limit_is_checked_before_velocity():
+    prescreen = RiskPrescreen(reject_above=1000, max_payments_per_window=1)
+    assert reasons(prescreen.screen([payment(10), payment(5000), payment(10)])) == [
+        "amount_below_threshold", "amount_above_limit", None
+    ]
+
+def test_allowlisted_counterparties_are_approved_up_to_the_limit():
+    prescreen = RiskPrescreen(allowlist=["rA", "rB"], allowlist_limit=1000)
+    results = prescreen.screen([
+        payment(500, "rA", "rB"),
+        payment(1000, "rA", "rB"),
+        payment(1001, "rA", "rB"),
+        payment(500, "rA", "rC")
+    ])
+    
+    assert reasons(results) == ["allowlisted_counterparties", "allowlisted_counterparties", None, None]
+
+def test_velocity_by_amount():
+    prescreen = RiskPrescreen(max_amount_per_window=100, approve_below=100)
+    assert reasons(prescreen.screen([payment(60), payment(60), payment(10, sender="rOther")])) == [
+        "amount_below_threshold", None, "amount_below_threshold"
+    ]
+
+def test_velocity_window_slides():
+    clock = FakeClock()
+    prescreen = RiskPrescreen(velocity_window=60, max_payments_per_window=2, clock=clock)
+    assert reasons(prescreen.screen([payment(10), payment(10)])) == ["amount_below_threshold"] * 2
+    
+    clock.now += 30
+    assert reasons(prescreen.screen([payment(10)])) == [None]
+    
+    # The first two payments leave the window; the escalated one still counts
+    clock.now += 31
+    assert reasons(prescreen.screen([payment(10), payment(10)])) == ["amount_below_threshold", None]
+    
+    clock.now += 61
+    assert reasons(prescreen.screen([payment(10)])) == ["amount_below_threshold"]
+
+def test_reset_velocity():
+    prescreen = RiskPrescreen(max_payments_per_window=1)
+    prescreen.screen([payment(10), payment(10, sender="rOther")])
+    prescreen.reset_velocity("rSender")
+    
+    assert reasons(prescreen.screen([payment(10), payment(10, sender="rOther")])) == [
+        "amount_below_threshold", None
+    ]
\ No newline at end of file
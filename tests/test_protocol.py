@@ -0,0 +1,113 @@
+"""
+Tests for request multiplexing and reconnects of SynapseProtocol
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from synapse_protocol.protocol import SynapseProtocol
+
+async def echo_in_reverse(websocket, connection):
+    """Answer requests two at a time, the later one first, with an event in between."""
+    while True:
+        first = json.loads(await websocket.recv())
+        second = json.loads(await websocket.recv())
+        await websocket.send(json.dumps({"id": second["id"], "echo": second["value"]}))
+        await websocket.send(json.dumps({"topic": "ledger", "ledger_index": first["value"]}))
+        await websocket.send(json.dumps({"id": first["id"], "echo": first["value"]}))
+
+def test_replies_are_routed_by_correlation_id(ws_server):
+    server = ws_server(echo_in_reverse)
+    
+    async def run():
+        protocol = SynapseProtocol(server.url, reconnect=False)
+        await protocol.connect()
+        try:
+            replies = await asyncio.gather(*(protocol.request({"value": i}, timeout=5) for i in range(6)))
+            events = [await protocol.receive_message() for _ in range(3)]
+        finally:
+            await protocol.disconnect()
+        return replies, events, protocol.in_flight
+    
+    replies, events, in_flight = asyncio.run(run())
+    
+    assert [reply["echo"] for reply in replies] == list(range(6))
+    assert all(reply["id"] == str(i + 1) for i, reply in enumerate(replies))
+    assert sorted(event["ledger_index"] for event in events) == [0, 2, 4]
+    assert in_flight == 0
+
+def test_request_times_out_without_a_reply(ws_server):
+    async def silent(websocket, connection):
+        await websocket.wait_closed()
+    
+    server = ws_server(silent)
+    
+    async def run():
+        protocol = SynapseProtocol(server.url, reconnect=False)
+        await protocol.connect()
+        try:
+            with pytest.raises(asyncio.TimeoutError):
+                await protocol.request({"command": "ping"}, timeout=0.05)
+            return protocol.in_flight
+        finally:
+            await protocol.disconnect()
+    
+    assert asyncio.run(run()) == 0
+
+def test_reconnect_replays_subscriptions(ws_server):
+    received = []
+    
+    async def server_handler(websocket, connection):
+        async for raw in websocket:
+            message = json.loads(raw)
+            received.append((connection, message))
+            if message.get("command") == "subscribe":
+                await websocket.send(json.dumps({"id": message["id"], "status": "success"}))
+                if connection == 1:
+                    return
+            elif message.get("command") == "ping":
+                await websocket.send(json.dumps({"id": message["id"], "connection": connection}))
+    
+    server = ws_server(server_handler)
+    
+    async def run():
+        protocol = SynapseProtocol(server.url, reconnect_delay=0.01)
+        await protocol.connect()
+        try:
+            await protocol.subscribe({"command": "subscribe", "streams": ["ledger"]}, timeout=5)
+            while not protocol.reconnects:
+                await asyncio.sleep(0.01)
+            reply = await protocol.request({"command": "ping"}, timeout=5)
+            resubscribed = await asyncio.wait_for(protocol.receive_message(), 5)
+        finally:
+            await protocol.disconnect()
+        return reply, resubscribed, protocol.reconnects
+    
+    reply, resubscribed, reconnects = asyncio.run(run())
+    
+    assert reply["connection"] == 2
+    assert reconnects == 1
+    assert resubscribed["id"].startswith("resubscribe:")
+    replayed = [message for connection, message in received if connection == 2 and message.get("command") == "subscribe"]
+    assert [{k: v for k, v in message.items() if k != "id"} for message in replayed] == [
+        {"command": "subscribe", "streams": ["ledger"]}
+    ]
+
+def test_requests_in_flight_fail_when_the_connection_drops(ws_server):
+    async def hang_up(websocket, connection):
+        await websocket.recv()
+    
+    server = ws_server(hang_up)
+    
+    async def run():
+        protocol = SynapseProtocol(server.url, reconnect=False)
+        await protocol.connect()
+        try:
+            with pytest.raises(ConnectionError):
+                await protocol.request({"command": "ping"}, timeout=5)
+        finally:
+            await protocol.disconnect()
+    
+    asyncio.run(run())
\ No newline at end of file
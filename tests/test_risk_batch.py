@@ -0,0 +1,84 @@
+"""
+Tests for packing payments into batched risk-assessment prompts
+"""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from synapse_protocol.agents.risk_batch import RiskBatcher
+
+def payment(amount, description="Payment"):
+    return {"sender_account": "rSender", "receiver_account": "rReceiver", "amount": amount,
+            "currency": "XRP", "description": description}
+
+VERDICTS = [
+    {"ref": "p0", "risk_level": "low", "decision": "approve", "reason": "small"},
+    {"ref": "p1", "risk_level": "HIGH", "reason": "large"}
+]
+
+def test_pack_respects_batch_size():
+    batcher = RiskBatcher(max_batch_size=3)
+    assert batcher.pack([payment(i) for i in range(7)]) == [[0, 1, 2], [3, 4, 5], [6]]
+
+def test_pack_respects_the_token_budget():
+    batcher = RiskBatcher(max_batch_size=25, max_prompt_tokens=60)
+    line_tokens = batcher.estimate_tokens(batcher.line("p0", payment(1))) + 1
+    batches = batcher.pack([payment(1) for _ in range(6)])
+    
+    assert all(len(batch) * line_tokens <= 60 for batch in batches)
+    assert [i for batch in batches for i in batch] == list(range(6))
+
+def test_oversized_payment_gets_a_batch_of_its_own():
+    batcher = RiskBatcher(max_prompt_tokens=40, max_field_chars=1000)
+    assert batcher.pack([payment(1), payment(2, "x" * 500), payment(3)]) == [[0], [1], [2]]
+
+def test_long_fields_are_truncated():
+    line = RiskBatcher(max_field_chars=10).line("p0", payment(1, "x" * 50))
+    assert json.loads(line.split(": ", 1)[1])["description"] == "x" * 10 + "..."
+
+@pytest.mark.parametrize("output", [
+    "Final verdicts:\n```json\n" + json.dumps(VERDICTS) + "\n```",
+    json.dumps(VERDICTS),
+    "Here you go: " + json.dumps(VERDICTS) + " Done.",
+    {"verdicts": VERDICTS},
+    SimpleNamespace(raw=json.dumps(VERDICTS))
+])
+def test_parse_reads_fenced_raw_and_mapping_output(output):
+    verdicts = RiskBatcher().parse(output, ["p0", "p1"])
+    
+    assert verdicts["p0"]["decision"] == "approve"
+    # A missing decision follows from the risk level
+    assert verdicts["p1"] == {"risk_level": "high", "decision": "reject", "reason": "large", "source": "batch"}
+
+def test_parse_skips_unknown_refs_and_invalid_levels():
+    output = [{"ref": "p9", "risk_level": "low"}, {"ref": "p0", "risk_level": "extreme"}, {"ref": "p1", "risk_level": "low"}]
+    assert list(RiskBatcher().parse(output, ["p0", "p1"])) == ["p1"]
+
+def test_truncated_output_resolves_nothing():
+    truncated = json.dumps(VERDICTS)[:-20]
+    assert RiskBatcher().parse(truncated, ["p0", "p1"]) == {}
+
+def test_batch_size_halves_on_failure_and_grows_on_success():
+    batcher = RiskBatcher(max_batch_size=8, min_batch_size=2)
+    batcher.record_batch(8, 3)
+    assert batcher.batch_size == 4
+    batcher.record_batch(4, 0, failed=True)
+    assert batcher.batch_size == 2
+    batcher.record_batch(2, 0, failed=True)
+    assert batcher.batch_size == 2
+    for _ in range(10):
+        batcher.record_batch(2, 2)
+    assert batcher.batch_size == 8
+    assert batcher.stats()["failed_batches"] == 2
+
+def test_batch_crew_runs_its_tasks_in_order():
+    pytest.importorskip("crewai")
+    from synapse_protocol.agents.agent_manager import AgentManager
+    from synapse_protocol.agents.fake_llm import FakeLLM
+    
+    template = AgentManager(api_key="offline", llm=FakeLLM()).create_batch_risk_assessment_crew()
+    
+    # The compliance task combines the analysis, so nothing may run ahead of it
+    assert not any(task.get("async_execution") for task in template.tasks)
\ No newline at end of file
@@ -0,0 +1,68 @@
+"""
+Tests for the memoization of risk-assessment decisions
+"""
+
+import time
+
+from synapse_protocol.agents.risk_cache import RiskDecisionCache
+
+def payment(amount, sender="rSender", receiver="rReceiver", currency="XRP"):
+    return {"sender_account": sender, "receiver_account": receiver, "amount": amount, "currency": currency}
+
+def test_amounts_in_one_band_share_a_key():
+    cache = RiskDecisionCache(amount_buckets=(10, 100))
+    keys = [cache.features(payment(amount), 1) for amount in (5, 10, 11, 100, 101, 1e9)]
+    
+    assert [key[3] for key in keys] == [0, 1, 1, 2, 2, 2]
+    assert cache.features(payment(15), 1) == cache.features(payment("99.5"), 1)
+
+def test_key_normalises_the_payment():
+    cache = RiskDecisionCache()
+    assert cache.features(payment(20, " rA ", "rB", " xrp"), "v1") == ("rA", "rB", "XRP", 1, "v1")
+    assert cache.features(payment(None), 1)[3] is None
+    assert cache.features(payment("abc"), 1)[3] is None
+    assert cache.features(payment(20), 1) != cache.features(payment(20), 2)
+
+def test_decisions_expire():
+    cache = RiskDecisionCache(ttl=0.05)
+    key = cache.features(payment(20), 1)
+    cache.set(key, {"decision": "approve"})
+    assert cache.get(key) == {"decision": "approve"}
+    
+    time.sleep(0.06)
+    assert cache.get(key) is None
+
+def test_least_recently_used_decision_is_evicted():
+    cache = RiskDecisionCache(maxsize=2)
+    first, second, third = (cache.features(payment(20, sender), 1) for sender in ("rA", "rB", "rC"))
+    cache.set(first, "first")
+    cache.set(second, "second")
+    cache.get(first)
+    cache.set(third, "third")
+    
+    assert cache.get(second) is None
+    assert cache.get(first) == "first"
+    assert cache.get(third) == "third"
+    assert cache.stats()["evictions"] == 1
+
+def test_invalidate_by_account_and_policy_version():
+    cache = RiskDecisionCache()
+    for sender, receiver, version in [("rA", "rB", 1), ("rC", "rA", 1), ("rC", "rD", 1), ("rC", "rD", 2)]:
+        cache.set(cache.features(payment(20, sender, receiver), version), "decision")
+    
+    assert cache.invalidate(account="rA") == 2
+    assert cache.invalidate(account="rC", policy_version=2) == 1
+    assert len(cache) == 1
+    assert cache.invalidate() == 1
+    assert len(cache) == 0
+
+def test_hits_count_as_llm_calls_saved():
+    cache = RiskDecisionCache()
+    key = cache.features(payment(20), 1)
+    assert cache.get(key) is None
+    cache.set(key, "decision")
+    cache.get(key)
+    cache.get(cache.features(payment(25), 1))
+    
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["llm_calls_saved"]) == (2, 1, 2)
\ No newline at end of file
@@ -0,0 +1,30 @@
+"""
+Tests for the Flask payment routes
+"""
+
+import pytest
+
+from synapse_protocol.app import create_app
+from synapse_protocol.payments.xrp_bridge import XrpPaymentBridge
+
+PREFIX = "/api/v1/payments"
+
+@pytest.fixture
+def client():
+    return create_app({"TESTING": True, "XRP_CLIENT": XrpPaymentBridge(xrp_client=None)}).test_client()
+
+def test_cancelling_an_unknown_payment_is_not_found(client):
+    response = client.post(PREFIX + "/unknown/cancel")
+    assert response.status_code == 404
+    assert "unknown" in response.get_json()["error"]
+
+@pytest.mark.parametrize("query, status", [
+    ("", 200),
+    ("?limit=1000", 200),
+    ("?limit=1001", 400),
+    ("?limit=0", 400),
+    ("?limit=-1", 400),
+    ("?offset=-1", 400)
+])
+def test_history_limit_is_bounded(client, query, status):
+    assert client.get(PREFIX + "/account/rSender/history" + query).status_code == status
\ No newline at end of file
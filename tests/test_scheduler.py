@@ -0,0 +1,81 @@
+"""
+Tests for coalescing and batching room updates
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+from synapse_protocol.websocket.scheduler import BATCH_EVENT, EmitScheduler, batch_room
+
+class RecordingSocketIO:
+    """Flask-SocketIO stand-in for the ``threading`` async mode recording emits."""
+    
+    def __init__(self, fail=False):
+        self.server = SimpleNamespace(eio=SimpleNamespace(create_event=threading.Event))
+        self.emitted = []
+        self.fail = fail
+    
+    def start_background_task(self, target, *args):
+        thread = threading.Thread(target=target, args=args, daemon=True)
+        thread.start()
+        return thread
+    
+    def sleep(self, seconds):
+        time.sleep(seconds)
+    
+    def emit(self, event, data, room=None):
+        if self.fail:
+            raise ConnectionError("emit failed")
+        self.emitted.append((event, room))
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+def test_batch_frame_is_only_emitted_to_subscribed_rooms():
+    socketio = RecordingSocketIO()
+    scheduler = EmitScheduler(socketio)
+    
+    scheduler.emit("payment_1", "p1", "payment_update", {})
+    scheduler.flush()
+    assert socketio.emitted == [("payment_update", "payment_1")]
+    
+    scheduler.batch_subscribers.add("payment_1", "sid")
+    scheduler.emit("payment_1", "p1", "payment_update", {})
+    scheduler.flush()
+    assert socketio.emitted[1:] == [("payment_update", "payment_1"), (BATCH_EVENT, batch_room("payment_1"))]
+    
+    scheduler.batch_subscribers.remove_client("sid")
+    scheduler.emit("payment_1", "p1", "payment_update", {})
+    scheduler.flush()
+    assert socketio.emitted[3:] == [("payment_update", "payment_1")]
+
+def test_batch_frame_is_always_emitted_when_rooms_span_servers():
+    socketio = RecordingSocketIO()
+    scheduler = EmitScheduler(socketio, local_rooms=False)
+    
+    scheduler.emit("payment_1", "p1", "payment_update", {})
+    scheduler.flush()
+    
+    assert socketio.emitted == [("payment_update", "payment_1"), (BATCH_EVENT, batch_room("payment_1"))]
+
+def test_first_update_wakes_the_flush_task():
+    socketio = RecordingSocketIO()
+    scheduler = EmitScheduler(socketio, idle_timeout=60)
+    scheduler.start()
+    
+    scheduler.emit("payment_1", "p1", "payment_update", {})
+    
+    wait_for(lambda: socketio.emitted)
+    assert scheduler.flushes == 1
+
+def test_failed_flush_is_logged(caplog):
+    scheduler = EmitScheduler(RecordingSocketIO(fail=True), idle_timeout=60)
+    scheduler.start()
+    
+    scheduler.emit("payment_1", "p1", "payment_update", {})
+    
+    wait_for(lambda: "Cannot flush room updates" in caplog.text)
\ No newline at end of file
@@ -0,0 +1,82 @@
+"""
+Tests for local account sequence allocation
+"""
+
+import asyncio
+
+from synapse_protocol.payments.sequence import SequenceManager
+
+class Ledger:
+    """Account sequences and a validated ledger index that tests move by hand."""
+    
+    def __init__(self, sequence: int, ledger_index: int = 1000):
+        self.sequence = sequence
+        self.ledger_index = ledger_index
+        self.sequence_reads = 0
+    
+    async def fetch_sequence(self, account):
+        self.sequence_reads += 1
+        return self.sequence
+    
+    async def fetch_ledger_index(self):
+        return self.ledger_index
+
+def manager_for(ledger: Ledger) -> SequenceManager:
+    return SequenceManager(ledger.fetch_sequence, ledger.fetch_ledger_index, ledger_window=5, ledger_index_ttl=0)
+
+def test_pipelined_reservations_are_consecutive():
+    async def run():
+        manager = manager_for(Ledger(10))
+        return [slot.sequence for slot in await asyncio.gather(*(manager.reserve("rA") for _ in range(4)))]
+    
+    assert sorted(asyncio.run(run())) == [10, 11, 12, 13]
+
+def test_rejected_sequence_is_reused():
+    async def run():
+        manager = manager_for(Ledger(10))
+        first = await manager.reserve("rA")
+        second = await manager.reserve("rA")
+        manager.complete(first, "temBAD_FEE")
+        manager.complete(second, "tesSUCCESS")
+        return (await manager.reserve("rA")).sequence
+    
+    assert asyncio.run(run()) == 10
+
+def test_provisional_success_that_never_applied_is_reissued():
+    async def run():
+        ledger = Ledger(10)
+        manager = manager_for(ledger)
+        lost = await manager.reserve("rA")
+        # Provisionally applied, then dropped: the account stays at Sequence 10
+        manager.complete(lost, "tesSUCCESS")
+        blocked = await manager.reserve("rA")
+        manager.complete(blocked, "terPRE_SEQ")
+        ledger.ledger_index = blocked.last_ledger_sequence + 1
+        return [(await manager.reserve("rA")).sequence for _ in range(3)]
+    
+    assert asyncio.run(run()) == [10, 11, 12]
+
+def test_resync_keeps_outstanding_slots():
+    async def run():
+        ledger = Ledger(10)
+        manager = manager_for(ledger)
+        slots = [await manager.reserve("rA") for _ in range(3)]
+        manager.complete(slots[0], "tefPAST_SEQ")
+        # 10 was used elsewhere; 11 and 12 are still being submitted
+        ledger.sequence = 11
+        return (await manager.reserve("rA")).sequence
+    
+    assert asyncio.run(run()) == 13
+
+def test_queued_transaction_holds_its_sequence_until_it_expires():
+    async def run():
+        ledger = Ledger(10)
+        manager = manager_for(ledger)
+        queued = await manager.reserve("rA")
+        manager.complete(queued, "terQUEUED")
+        # Force a resync while the payment waits in the queue, which is not
+        # part of the account's Sequence
+        manager.complete(await manager.reserve("rA"), "tefPAST_SEQ")
+        return (await manager.reserve("rA")).sequence
+    
+    assert asyncio.run(run()) == 11
\ No newline at end of file
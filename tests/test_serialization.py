@@ -0,0 +1,114 @@
+"""
+Tests for the schema-compiled serializer against the json.dumps output it replaced
+"""
+
+import json
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from enum import Enum
+
+import pytest
+
+from synapse_protocol.payments.netting import NetTransfer
+from synapse_protocol.payments.store import PaymentRecord
+from synapse_protocol.payments.types import AccountBalance, PaymentRequest, PaymentResponse, PaymentStatus
+from synapse_protocol.serialization import Serializer
+
+def stdlib_dumps(obj):
+    """The encoding the routes used before the serializer."""
+    if isinstance(obj, list):
+        return json.dumps([item.to_dict() for item in obj], separators=(",", ":"))
+    return json.dumps(obj.to_dict(), separators=(",", ":"))
+
+def payment_request(**overrides):
+    fields = dict(
+        payment_id="p-1",
+        sender_account="rSender",
+        receiver_account="rReceiver",
+        amount=12.5,
+        currency="XRP",
+        description="Café \"settlement\"\n",
+        metadata={"task": "t-42", "tags": ["a", "b"], "nested": {"ratio": 0.1}},
+        created_at=datetime(2026, 10, 17, 8, 30, 15, 123456)
+    )
+    fields.update(overrides)
+    return PaymentRequest(**fields)
+
+def payment_record(**overrides):
+    record = PaymentRecord.from_request(payment_request(**overrides))
+    record.apply_response(PaymentResponse(
+        payment_id=record.payment_id,
+        status=PaymentStatus.COMPLETED,
+        completed_at=datetime(2026, 10, 17, 8, 31),
+        transaction_hash="AB" * 32
+    ))
+    return record
+
+PAYLOADS = [
+    payment_request(),
+    payment_request(metadata=None, description=None, amount=7),
+    PaymentResponse("p-1", PaymentStatus.FAILED, "failed", "E1", "no funds"),
+    PaymentResponse("p-1", PaymentStatus.COMPLETED, completed_at=datetime(2026, 1, 1, 0, 0, 0, 1)),
+    PaymentResponse("p-1", PaymentStatus.COMPLETED, completed_at=datetime(2026, 1, 1, 1, tzinfo=timezone(timedelta(hours=1)))),
+    AccountBalance("rA", "XRP", 100.25, 0.5, last_updated=datetime(2026, 10, 17)),
+    payment_record(),
+    [payment_record(), payment_record(payment_id="p-2", metadata=None)]
+]
+
+@pytest.mark.parametrize("obj", PAYLOADS)
+def test_iso_output_matches_json_dumps(obj):
+    assert Serializer().encode(obj) == stdlib_dumps(obj)
+
+def test_dumps_returns_ascii_bytes():
+    assert Serializer().dumps(payment_request()) == stdlib_dumps(payment_request()).encode("ascii")
+
+def test_plain_containers_match_json_dumps():
+    value = {"status": PaymentStatus.PENDING, "values": [1, 2.5, None, True, "☃"], "n": float("nan"), 3: "int key"}
+    assert Serializer().encode(value) == json.dumps(value, separators=(",", ":"))
+
+def test_epoch_format_encodes_datetimes_as_seconds():
+    serializer = Serializer(datetime_format="epoch")
+    record = json.loads(serializer.encode(payment_record()))
+    
+    assert record["created_at"] == (datetime(2026, 10, 17, 8, 30, 15, 123456) - datetime(1970, 1, 1)).total_seconds()
+    assert record["completed_at"] == (datetime(2026, 10, 17, 8, 31) - datetime(1970, 1, 1)).total_seconds()
+    assert json.loads(serializer.encode(payment_request()))["created_at"] == record["created_at"]
+    aware = datetime(2026, 1, 1, 1, tzinfo=timezone(timedelta(hours=1)))
+    assert serializer.encode(aware) == serializer.encode(datetime(2026, 1, 1))
+    with pytest.raises(ValueError):
+        Serializer(datetime_format="rfc2822")
+
+def test_enums_dates_and_decimals():
+    class Color(Enum):
+        RED = 1
+    
+    serializer = Serializer()
+    assert serializer.encode([Color.RED, PaymentStatus.REFUNDED]) == '[1,"refunded"]'
+    assert serializer.encode(date(2026, 10, 17)) == '"2026-10-17"'
+    assert serializer.encode(Decimal("0.1000000000000000001")) == '"0.1000000000000000001"'
+    transfer = NetTransfer("rA", "rB", Decimal("2.50"), ["p-1", "p-2"])
+    assert json.loads(serializer.encode(transfer)) == {
+        "sender_account": "rA", "receiver_account": "rB", "amount": "2.50", "payment_ids": ["p-1", "p-2"]
+    }
+
+def test_registered_schemas_and_fallbacks():
+    class Point:
+        def __init__(self, x, y):
+            self.x, self.y = x, y
+    
+    class Legacy:
+        def to_dict(self):
+            return {"legacy": True}
+    
+    serializer = Serializer(schemas={Point: ["x", ("Y", "y", "number")]})
+    assert serializer.encode(Point(1, 2.5)) == '{"x":1,"Y":2.5}'
+    assert serializer.encode([Legacy()]) == '[{"legacy":true}]'
+    with pytest.raises(TypeError):
+        serializer.encode(object())
+    with pytest.raises(ValueError):
+        serializer.register(Point, [("x", "x", "complex")])
+
+def test_socketio_json_round_trip():
+    adapter = Serializer().socketio_json()
+    packet = ["payment_update", payment_request()]
+    assert adapter.loads(adapter.dumps(packet, separators=(",", ":"))) == ["payment_update", payment_request().to_dict()]
\ No newline at end of file
@@ -0,0 +1,55 @@
+"""
+Tests for the SQLite-backed payment store
+"""
+
+import sqlite3
+import time
+
+from synapse_protocol.payments.store import PaymentRecord, SqlitePaymentStore
+
+def record(payment_id):
+    return PaymentRecord(payment_id, "rSender", "rReceiver", 1.0, "XRP")
+
+def stored_ids(path):
+    conn = sqlite3.connect(path)
+    try:
+        return {row[0] for row in conn.execute("SELECT payment_id FROM payments")}
+    finally:
+        conn.close()
+
+def test_writes_are_flushed_in_the_background(tmp_path):
+    path = str(tmp_path / "payments.db")
+    store = SqlitePaymentStore(path, flush_interval=0.05)
+    try:
+        store.add(record("p1"))
+        deadline = time.monotonic() + 5
+        while "p1" not in stored_ids(path):
+            assert time.monotonic() < deadline, "timed out"
+            time.sleep(0.01)
+    finally:
+        store.close()
+
+def test_writes_do_not_commit_inline(tmp_path):
+    path = str(tmp_path / "payments.db")
+    store = SqlitePaymentStore(path, flush_interval=60)
+    try:
+        for i in range(10):
+            store.add(record(f"p{i}"))
+        assert stored_ids(path) == set()
+        assert store.get("p3").payment_id == "p3"
+    finally:
+        store.close()
+    assert stored_ids(path) == {f"p{i}" for i in range(10)}
+
+def test_full_batch_wakes_the_flusher(tmp_path):
+    path = str(tmp_path / "payments.db")
+    store = SqlitePaymentStore(path, flush_batch_size=3, flush_interval=60)
+    try:
+        for i in range(3):
+            store.add(record(f"p{i}"))
+        deadline = time.monotonic() + 5
+        while len(stored_ids(path)) < 3:
+            assert time.monotonic() < deadline, "timed out"
+            time.sleep(0.01)
+    finally:
+        store.close()
\ No newline at end of file
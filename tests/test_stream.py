@@ -0,0 +1,150 @@
+"""
+Tests for the bounded message streams of SynapseProtocol
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from synapse_protocol.protocol import SynapseProtocol
+from synapse_protocol.stream import BLOCK, DROP_NEWEST, DROP_OLDEST, MessageStream
+
+async def drain(stream):
+    stream.close()
+    return [message async for message in stream]
+
+def test_drop_oldest_keeps_the_latest_messages():
+    async def run():
+        stream = MessageStream(3, DROP_OLDEST)
+        for i in range(5):
+            assert stream.put(i)
+        return await drain(stream), stream.stats()
+    
+    messages, stats = asyncio.run(run())
+    assert messages == [2, 3, 4]
+    assert (stats["received"], stats["dropped"], stats["delivered"], stats["max_lag"]) == (5, 2, 3, 3)
+
+def test_drop_oldest_reaches_into_the_consumers_batch():
+    async def run():
+        stream = MessageStream(2, DROP_OLDEST)
+        stream.put(0)
+        stream.put(1)
+        first = await stream.__anext__()
+        stream.put(2)
+        stream.put(3)
+        return [first] + await drain(stream)
+    
+    assert asyncio.run(run()) == [0, 2, 3]
+
+def test_drop_newest_keeps_the_earliest_messages():
+    async def run():
+        stream = MessageStream(3, DROP_NEWEST)
+        for i in range(5):
+            stream.put(i)
+        return await drain(stream), stream.dropped
+    
+    assert asyncio.run(run()) == ([0, 1, 2], 2)
+
+def test_block_refuses_messages_until_there_is_space():
+    async def run():
+        stream = MessageStream(2, BLOCK)
+        assert stream.put(0) and stream.put(1)
+        assert not stream.put(2)
+        waiter = asyncio.ensure_future(stream.wait_space())
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        assert await stream.__anext__() == 0
+        await asyncio.wait_for(waiter, 1)
+        assert stream.put(2)
+        return await drain(stream), stream.dropped
+    
+    assert asyncio.run(run()) == ([1, 2], 0)
+
+def test_get_batch_takes_everything_buffered():
+    async def run():
+        stream = MessageStream(10)
+        for i in range(4):
+            stream.put(i)
+        batch = await stream.get_batch()
+        stream.close()
+        with pytest.raises(StopAsyncIteration):
+            await stream.get_batch()
+        return batch
+    
+    assert asyncio.run(run()) == [0, 1, 2, 3]
+
+def test_invalid_settings_are_rejected():
+    with pytest.raises(ValueError):
+        MessageStream(0)
+    with pytest.raises(ValueError):
+        MessageStream(10, "drop_everything")
+
+def test_topic_streams_subscribe_and_unsubscribe(ws_server):
+    commands = []
+    
+    async def server_handler(websocket, connection):
+        async for raw in websocket:
+            message = json.loads(raw)
+            commands.append({k: v for k, v in message.items() if k != "id"})
+            await websocket.send(json.dumps({"id": message["id"], "status": "success"}))
+            if message["command"] == "subscribe":
+                for i in range(3):
+                    await websocket.send(json.dumps({"topic": "other", "index": i}))
+                    await websocket.send(json.dumps({"topic": "ledger", "index": i}))
+    
+    server = ws_server(server_handler)
+    
+    async def run():
+        protocol = SynapseProtocol(server.url, reconnect=False)
+        await protocol.connect()
+        try:
+            async with protocol.stream(["ledger"]) as stream:
+                received = []
+                async for message in stream:
+                    received.append(message)
+                    if len(received) == 3:
+                        break
+            while len(commands) < 2:
+                await asyncio.sleep(0.01)
+            return received
+        finally:
+            await protocol.disconnect()
+    
+    received = asyncio.run(run())
+    assert [message["index"] for message in received] == [0, 1, 2]
+    assert {message["topic"] for message in received} == {"ledger"}
+    assert commands == [
+        {"command": "subscribe", "topics": ["ledger"]},
+        {"command": "unsubscribe", "topics": ["ledger"]}
+    ]
+
+def test_blocking_stream_pushes_back_on_the_reader(ws_server):
+    async def burst(websocket, connection):
+        for i in range(50):
+            await websocket.send(json.dumps({"topic": "ledger", "index": i}))
+        await websocket.wait_closed()
+    
+    server = ws_server(burst)
+    
+    async def run():
+        protocol = SynapseProtocol(server.url, reconnect=False)
+        stream = protocol.stream(maxsize=4, overflow=BLOCK)
+        await protocol.connect()
+        try:
+            received = []
+            async for message in stream:
+                received.append(message["index"])
+                # A slow consumer
+                await asyncio.sleep(0.001)
+                if len(received) == 50:
+                    break
+            return received, stream.stats()
+        finally:
+            await protocol.disconnect()
+    
+    received, stats = asyncio.run(run())
+    assert received == list(range(50))
+    assert stats["dropped"] == 0
+    assert stats["max_lag"] <= 4
+    assert stats["blocked_seconds"] > 0
\ No newline at end of file
@@ -0,0 +1,34 @@
+"""
+Tests for the shared payment types
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from synapse_protocol.payments.core import PaymentProtocol
+from synapse_protocol.payments.exceptions import ValidationError
+from synapse_protocol.payments.types import AccountBalance, PaymentRequest, PaymentResponse, PaymentStatus, to_timestamp
+
+def test_aware_datetimes_are_converted_to_utc():
+    naive = datetime(2024, 5, 1, 12, 0)
+    aware = datetime(2024, 5, 1, 14, 0, tzinfo=timezone(timedelta(hours=2)))
+    
+    assert to_timestamp(aware) == to_timestamp(naive)
+    response = PaymentResponse("p1", PaymentStatus.COMPLETED, completed_at=aware)
+    assert response.completed_at == naive
+
+def test_non_string_identifiers_are_rejected():
+    with pytest.raises(ValidationError):
+        PaymentRequest("p1", 1, "rReceiver", 1.0, "XRP")
+    with pytest.raises(ValidationError):
+        AccountBalance("rAccount", None, 1.0)
+
+@pytest.mark.parametrize("field, value", [("sender_account", 1), ("receiver_account", None), ("amount", "10")])
+def test_initiate_payment_rejects_wrong_types(field, value):
+    protocol = PaymentProtocol(api_key="test", xrp_client=object())
+    payment = {"sender_account": "rSender", "receiver_account": "rReceiver", "amount": 1.0, "currency": "XRP"}
+    payment[field] = value
+    with pytest.raises(ValidationError):
+        asyncio.run(protocol.initiate_payment(payment))
\ No newline at end of file
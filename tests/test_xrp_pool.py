@@ -0,0 +1,185 @@
+"""
+Tests for the pooled XRPL JSON-RPC client against stub rippled servers
+"""
+
+import asyncio
+import json
+import time
+
+import pytest
+
+from synapse_protocol.payments.exceptions import NetworkError
+from synapse_protocol.payments.xrp_pool import PooledXrpClient, transaction_hash
+
+def sign(tx_json):
+    """Stand-in signer: the blob is the transaction JSON, hex-encoded."""
+    return json.dumps(tx_json, sort_keys=True).encode().hex().upper()
+
+def client_for(*servers, **kwargs):
+    kwargs.setdefault("timeout", 0.5)
+    kwargs.setdefault("poll_interval", 0.01)
+    return PooledXrpClient([server.url for server in servers], signer=sign, **kwargs)
+
+PAYMENT = {"fromAgentId": "rSender", "toAgentId": "rReceiver", "amount": 1.5, "memo": "test"}
+
+class Rippled:
+    """Scripted rippled answers: ledger, account_info, submit and tx."""
+    
+    def __init__(self, submit_result="tesSUCCESS", validated_after=1, final_result="tesSUCCESS"):
+        self.ledger_index = 100
+        self.submit_result = submit_result
+        self.validated_after = validated_after
+        self.final_result = final_result
+        self.lookups = 0
+    
+    def __call__(self, method, params):
+        if method == "ledger":
+            self.ledger_index += 1
+            return {"status": "success", "ledger_index": self.ledger_index}
+        if method == "account_info":
+            return {"status": "success", "account_data": {"Balance": "25000000", "Sequence": 7}}
+        if method == "submit":
+            return {"status": "success", "engine_result": self.submit_result}
+        if method == "tx":
+            self.lookups += 1
+            if self.validated_after is None or self.lookups < self.validated_after:
+                return {"status": "error", "error": "txnNotFound"}
+            return {"status": "success", "validated": True, "meta": {"TransactionResult": self.final_result}}
+        return {"status": "error", "error": "unknownCmd"}
+
+def test_fails_over_to_the_next_endpoint(rpc_server):
+    busy = rpc_server(lambda method, params: {"status": "error", "error": "tooBusy"})
+    healthy = rpc_server(Rippled())
+    client = client_for(busy, healthy)
+    try:
+        assert asyncio.run(client.getBalance("rSender")) == 25.0
+        assert not client.endpoints[0].available
+        # The failing endpoint is avoided while it cools down
+        asyncio.run(client.getBalance("rSender"))
+        assert busy.methods() == ["account_info"]
+        assert healthy.methods() == ["account_info", "account_info"]
+    finally:
+        client.close()
+
+def test_transport_errors_fail_over_for_reads(rpc_server):
+    def dropping(method, params):
+        raise ConnectionError
+    
+    dropped = rpc_server(dropping)
+    healthy = rpc_server(Rippled())
+    client = client_for(dropped, healthy)
+    try:
+        assert asyncio.run(client.getLedgerIndex()) == 101
+    finally:
+        client.close()
+
+def test_all_endpoints_failing_raises(rpc_server):
+    busy = rpc_server(lambda method, params: {"status": "error", "error": "noNetwork"})
+    client = client_for(busy)
+    try:
+        with pytest.raises(NetworkError):
+            asyncio.run(client.getLedgerIndex())
+    finally:
+        client.close()
+
+def test_payment_waits_for_validation(rpc_server):
+    rippled = Rippled(validated_after=3)
+    server = rpc_server(rippled)
+    client = client_for(server)
+    try:
+        result = asyncio.run(client.sendPayment(dict(PAYMENT)))
+    finally:
+        client.close()
+    
+    assert result["success"] is True
+    assert result["validated"] is True
+    assert result["engine_result"] == "tesSUCCESS"
+    submitted = next(params for method, params in server.calls if method == "submit")
+    tx_json = json.loads(bytes.fromhex(submitted["tx_blob"]))
+    assert tx_json["Sequence"] == 7
+    assert tx_json["Amount"] == "1500000"
+    assert tx_json["LastLedgerSequence"] == 101 + client.ledger_window
+    assert result["transaction_hash"] == transaction_hash(submitted["tx_blob"])
+    assert server.methods().count("tx") == 3
+
+def test_provisional_success_that_expires_fails(rpc_server):
+    server = rpc_server(Rippled(validated_after=None))
+    client = client_for(server)
+    try:
+        result = asyncio.run(client.sendPayment(dict(PAYMENT, sequence=3, lastLedgerSequence=103)))
+    finally:
+        client.close()
+    
+    assert result["success"] is False
+    assert result["engine_result"] == "tefMAX_LEDGER"
+    assert "account_info" not in server.methods()
+
+def test_validated_failure_is_reported(rpc_server):
+    server = rpc_server(Rippled(final_result="tecPATH_DRY"))
+    client = client_for(server)
+    try:
+        result = asyncio.run(client.sendPayment(dict(PAYMENT)))
+    finally:
+        client.close()
+    
+    assert result["success"] is False
+    assert result["validated"] is True
+    assert result["error"] == "tecPATH_DRY"
+
+def test_rejected_submission_is_not_polled(rpc_server):
+    server = rpc_server(Rippled(submit_result="temBAD_AMOUNT"))
+    client = client_for(server)
+    try:
+        result = asyncio.run(client.sendPayment(dict(PAYMENT)))
+    finally:
+        client.close()
+    
+    assert result["success"] is False
+    assert result["engine_result"] == "temBAD_AMOUNT"
+    assert "tx" not in server.methods()
+
+def test_submit_is_not_repeated_on_another_endpoint(rpc_server):
+    def slow_submit(method, params):
+        if method == "submit":
+            time.sleep(1.0)
+        return Rippled()(method, params)
+    
+    slow = rpc_server(slow_submit)
+    standby = rpc_server(Rippled())
+    client = client_for(slow, standby, timeout=0.3)
+    # Route the reads before the submission to the slow endpoint as well
+    client.endpoints[1].cooldown_until = time.monotonic() + 0.2
+    try:
+        result = asyncio.run(client.sendPayment(dict(PAYMENT)))
+    finally:
+        client.close()
+    
+    assert slow.methods().count("submit") == 1
+    assert "submit" not in standby.methods()
+    # The outcome was settled by looking the transaction up by hash
+    assert "tx" in standby.methods()
+    assert result["success"] is True
+    assert result["validated"] is True
+
+def test_without_waiting_the_submission_stays_provisional(rpc_server):
+    server = rpc_server(Rippled())
+    client = client_for(server, wait_for_validation=False)
+    try:
+        result = asyncio.run(client.sendPayment(dict(PAYMENT)))
+    finally:
+        client.close()
+    
+    assert result["success"] is True
+    assert result["validated"] is False
+    assert "tx" not in server.methods()
+
+def test_app_wires_the_configured_signer():
+    from synapse_protocol.app import _create_payment_protocol
+    
+    protocol = _create_payment_protocol({"XRPL_RPC_URLS": ["http://127.0.0.1:1"], "XRPL_SIGNER": sign})
+    try:
+        client = protocol.xrp_bridge.xrp_client
+        assert client.signer is sign
+        assert client.wait_for_validation is True
+    finally:
+        asyncio.run(protocol.close())
\ No newline at end of file